@@ -18,6 +18,7 @@
 ###     Phase3 marks the point where the network should of healed. All issues
 ###     at this point should be considered errors.
 import logging
+from concurrent.futures import ThreadPoolExecutor
 import time
 import json
 from json import JSONEncoder
@@ -34,19 +35,24 @@ from etb.monitoring.testnet_monitor import (
 
 from etb.interfaces.client_request import (
     perform_batched_request,
+    configure_immutable_object_cache,
+    immutable_object_cache,
     BeaconAPIgetBlockV2,
     BeaconAPIgetValidators,
 )
+from etb.monitoring.chain_store import ChainStore, ChainStoreRecorder
+from etb.monitoring.chain_walker import HeaderChainWalker
+from etb.monitoring.fork_classification import classify_forks
+from etb.monitoring.skipped_slots import SkippedSlotAnalysis
 
 from typing import Union, Any
 
 # from modules.ClientRequest import perform_batched_request, beacon_getBlockV2, beacon_getValidators, beacon_getBlockV1
 
 # from modules.BeaconAPI import BeaconAPI, ETBConsensusBeaconAPI
-from etb.config.etb_config import ETBConfig, ClientInstance
+from etb.config.etb_config import ETBConfig, ClientInstance, FilesConfig
 
 # from modules.TestnetHealthMetrics import UniqueConsensusHeads
-from multiprocessing import Pool
 
 from typing import Optional
 
@@ -182,39 +188,31 @@ def check_for_consensus(
 #   ]
 # }
 
+chain_walker = HeaderChainWalker(max_retries=2, timeout=15)
+
 def get_all_slots_per_client(client):
-    p = "head"
-    parents_and_slots = []
-    # We are not checking for forks in teku
-    # This is a temporary if statement to avoid querying for teku, their api is super slow and will extend the rollout unnecessarily
-    if "teku" in client.collection_name :
+    roots_and_slots = []
+    # headers are fetched by slot ranges concurrently, so this is cheap
+    # enough to include teku again.
+    head = chain_walker.get_header(client, "head")
+    if isinstance(head, Exception):
+        print(head)
         return []
-    try:
-        while (True):
-            b = BeaconAPIgetBlockV2(max_retries= 2, timeout=15)
-            response = b.perform_request(client)
-            data = b.get_block(response)
-            print(data)
-            p = data['parent_root']
-            s = data['slot']
-            print(f"{client.collection_name}: {[p, s]}")
-            parents_and_slots.append([p, s])
-            if (p == '0x0000000000000000000000000000000000000000000000000000000000000000' or s == 0):
-                # print("End of block has been reached")
-                break
-    except Exception as e:
-        print(e)
+    headers = chain_walker.walk(client, head)
+    if isinstance(headers, Exception):
+        print(headers)
         # It could be possible that we retrieve a response for one slot but not the next slot because of connection issues, this might produce an incomplete chain, therefore we just return the empty chain. No point requering after 15 seconds
         return []
-    return [client.collection_name, parents_and_slots]
+    for header in headers:
+        roots_and_slots.append([header.root, str(header.slot)])
+    print(f"{client.collection_name}: {len(roots_and_slots)} blocks down to slot {headers[-1].slot}")
+    return [client.collection_name, roots_and_slots]
 
 def calculate_slots_skipped_by_all_clients(clients_and_data, highest_slot):
-    clients_to_skipped_slots = {}
-    for [client, data] in clients_and_data:
-        slots = [slot for [_parent, slot] in data]
-        skipped_slots = [num for num in range(1, int(highest_slot)) if str(num) not in slots]
-        clients_to_skipped_slots[client] =  skipped_slots
-    return clients_to_skipped_slots
+    clients_to_slots = {
+        client: [int(slot) for [_root, slot] in data] for [client, data] in clients_and_data
+    }
+    return SkippedSlotAnalysis(clients_to_slots, 1, int(highest_slot))
 
 def group_together_clients_with_similar_slots_or_chains(clients_and_data_str, mode="chain"):
     def seen_before(key, seen):
@@ -231,7 +229,7 @@ def group_together_clients_with_similar_slots_or_chains(clients_and_data_str, mo
             seen_before(slots_str, seen)
     return seen
 
-def rehash_parent_hash(clients_and_data): # returns the clients_and_data with rehashed parents and the hash map for rehashing
+def rehash_parent_hash(clients_and_data): # returns the clients_and_data with rehashed roots and the hash map for rehashing
     count = 1
     new_hash = {}
     clients_and_data_rehashed = []
@@ -267,60 +265,25 @@ def calculate_highest_slot_across_all_chains(clients_and_data):
                 highest = slot
     return highest
 
+# the walks are threads (not a process pool) so they all share the
+# immutable object cache. They block on requests scheduled on the shared
+# request engine, so they must not run on its executor. Created with the
+# first pass and kept for the following ones.
+walk_executor: Optional[ThreadPoolExecutor] = None
+
+def get_walk_executor(clients) -> ThreadPoolExecutor:
+    global walk_executor
+    if walk_executor is None:
+        walk_executor = ThreadPoolExecutor(
+            max_workers=max(len(clients), 1), thread_name_prefix="etb-antithesis-checker"
+        )
+    return walk_executor
+
 def get_all_slots(clients):
-    clients_and_data = []
-    with Pool(5) as p:
-        clients_and_data = p.map(get_all_slots_per_client, clients)
+    clients_and_data = list(get_walk_executor(clients).map(get_all_slots_per_client, clients))
+    print(f"BLOCK_CACHE: {immutable_object_cache.get_stats()}")
     return list(filter(lambda client_and_data: client_and_data != [], clients_and_data))
 
-def calculate_real_forks_and_unsynced_children(str_parents_to_clients):
-    parents_chains = list(str_parents_to_clients.keys())
-    parents_chains_sorted = sorted(parents_chains, key=lambda x: len(x))
-    real_forks = {}
-    parents = []
-    for c1 in parents_chains_sorted:
-        c1_is_parent = True
-        for c2 in parents_chains_sorted:
-            start = c1.find(" ")
-            end = c1.find(" ", start + 1) + 1
-            # We can't use this to separate the skipped slots because we can't assume one chain of skipped slots is the child of another based on one skipped slot.
-            if c1 != c2 and c1 != "" and c2 != "" and c1[start:end] in c2: # if we add `and c1[start:end] != ""` then we will consider chains with nothing in them a definite fork
-                c1_is_parent = False
-                if c1 in real_forks:
-                    real_forks[c2] = {c1: real_forks[c1]}
-                else:
-                    real_forks[c2] = c1
-        if c1_is_parent:
-            parents.append(c1)
-    
-    unsynced_chains_tree = {}
-    for p in parents:
-        if p in real_forks:
-            unsynced_chains_tree[p] = real_forks[p]
-        else:
-            unsynced_chains_tree[p] = ""
-    return unsynced_chains_tree
-
-
-def print_real_chains_and_unsynced_children(str_parents_to_clients, unsynced_chains_tree, clients_to_skipped_slots):
-    def recursive_print(chain_tree, level):
-        if chain_tree == "":
-            return 0
-        if isinstance(chain_tree, str):
-            start = chain_tree.find(" ")
-            end = chain_tree.find(" ", start + 1) + 1
-            print(f"SYNCING {level} latest parent hash: {chain_tree[start:end]} {str_parents_to_clients[chain_tree]}")
-            return 0
-        for chain in chain_tree.keys():
-            start = chain.find(" ")
-            end = chain.find(" ", start + 1) + 1
-            print(f"SYNCING {level} latest parent hash: {chain[start:end]} {str_parents_to_clients[chain]}")
-            return recursive_print(chain_tree[chain], level + "--")
-    for chain in unsynced_chains_tree.keys():
-        print(f"UNIQUE CHAIN {str_parents_to_clients[chain]} {chain}")
-        print(f"SKIPPED SLOTS {clients_to_skipped_slots[str_parents_to_clients[chain][0]]}")
-        recursive_print(unsynced_chains_tree[chain], "--------")
-
 def print_all_data_for_every_client(clients):
     # logger = logging.getLogger()
     # etb = ETBConfig("/data/etb-config.yaml", logger)
@@ -329,11 +292,14 @@ def print_all_data_for_every_client(clients):
     if clients_and_data == []:
         print("FAIL: No data retrieved")
     highest_slot = calculate_highest_slot_across_all_chains(clients_and_data)
-    clients_to_skipped_slots = calculate_slots_skipped_by_all_clients(clients_and_data, highest_slot)
+    skipped_slots = calculate_slots_skipped_by_all_clients(clients_and_data, highest_slot)
+    clients_to_skipped_slots = {client: skipped_slots.get_skipped_slots(client) for client in skipped_slots.skipped}
 
     print("Clients and their skipped slots")
     for client in clients_to_skipped_slots:
-        print(f'SKIPPED_SLOTS: {client} {clients_to_skipped_slots[client]}')
+        print(f'SKIPPED_SLOTS: {client} {clients_to_skipped_slots[client]} longest run: {skipped_slots.get_longest_run(client)}')
+    print(f'MISSED_BY_ALL: {list(skipped_slots.missed_by_all)}')
+    print(f'MISSED_BY_SOME: {list(skipped_slots.missed_by_some)}')
     # str_slots_to_clients = group_together_similar_slots(clients_to_slots)
 
     print("Mapping from old hash to new hash")
@@ -344,12 +310,13 @@ def print_all_data_for_every_client(clients):
     
     clients_and_data_rehashed_str = stringify_data(clients_and_data_rehashed)
     str_parents_to_clients = group_together_clients_with_similar_slots_or_chains(clients_and_data_rehashed_str, "chain")
-    print("Clients with matching chains, chains are in order and the right most hash is the root hash")
+    print("Clients with matching chains, chains are in order and the right most hash is the oldest block")
     for str_parents_to_client in str_parents_to_clients.items():
         print(f'POTENTIAL_FORKS: {str_parents_to_client}')
     print("====================================================================================\n")
-    unsynced_chains_tree = calculate_real_forks_and_unsynced_children(str_parents_to_clients)
-    print_real_chains_and_unsynced_children(str_parents_to_clients, unsynced_chains_tree, clients_to_skipped_slots)
+    classification = classify_forks(dict(clients_and_data))
+    for line in classification.get_report_lines(clients_to_skipped_slots):
+        print(line)
 
 
 class ValidatorStatus:
@@ -399,6 +366,10 @@ class TestnetStatusCheckerV2(object):
         self.clients_to_monitor = self.etb_config.get_client_instances()
         
         self.testnet_monitor = TestnetMonitor(self.etb_config)
+        # heads are recorded every slot for post-mortem fork analysis.
+        self.chain_store_recorder = ChainStoreRecorder(
+            ChainStore(FilesConfig().chain_store_file), max_retries=5, timeout=3
+        )
 
     def perform_finite_status_check(self, args):
 
@@ -453,12 +424,14 @@ class TestnetStatusCheckerV2(object):
         while self.testnet_monitor.get_slot() < phase2_slot:
             self.testnet_monitor.wait_for_next_slot()
             print(encoder.encode(get_heads_status_check_slot(self.clients_to_monitor)), flush=True)
+            self.chain_store_recorder.observe(self.clients_to_monitor)
 
         print("stop_faults", flush=True)
         print("Phase2 elapsed", flush=True)
         while self.testnet_monitor.get_slot() < phase3_slot:
             self.testnet_monitor.wait_for_next_slot()
             print(encoder.encode(get_heads_status_check_slot(self.clients_to_monitor)), flush=True)
+            self.chain_store_recorder.observe(self.clients_to_monitor)
 
         if check_for_consensus(self.clients_to_monitor):
             print("Phase3 passed.", flush=True)
@@ -543,6 +516,12 @@ if __name__ == "__main__":
             logger.debug("Waiting for %s -- check %d", "/data/etb-config-checkpoint.txt", wait_count)
         wait_count += 1
 
+    # blocks by root never change, keep them around between chain walks.
+    configure_immutable_object_cache(
+        max_size_bytes=256 * 1024 * 1024,
+        persist_dir=FilesConfig().beacon_object_cache_dir,
+    )
+
     status_checker = TestnetStatusCheckerV2(ETBConfig(Path(args.config)), logger)
 
     if args.no_terminate:
@@ -0,0 +1,120 @@
+"""
+    Post-mortem fork analysis. Reconstructs the fork tree and the divergence
+    of every node from the chain store recorded by node_watch (the
+    chain_store monitor) and the antithesis checker, without querying any
+    node.
+"""
+
+import argparse
+import datetime
+import logging
+import pathlib
+from typing import Optional
+
+from etb.common.utils import create_logger
+from etb.config.etb_config import FilesConfig
+from etb.monitoring.chain_store import ChainStore, HeadObservation
+from etb.monitoring.fork_classification import ForkClassification, classify_forks
+
+
+def format_time(t: float) -> str:
+    return datetime.datetime.fromtimestamp(t, tz=datetime.timezone.utc).isoformat()
+
+
+def classify_heads(chain_store: ChainStore, before: Optional[float]) -> ForkClassification:
+    """Classify the last heads of every node, over the stored chains."""
+    heads = chain_store.get_latest_heads(before)
+    client_chains = {
+        node: [(h.root, h.slot) for h in chain_store.get_chain(head.block_root)]
+        for node, head in heads.items()
+    }
+    return classify_forks(client_chains)
+
+
+def report_divergence(
+    chain_store: ChainStore, node: str, canonical: set[str], before: Optional[float]
+):
+    """Report the observations of a node whose head was not on the canonical
+    chain, as runs of consecutive observations."""
+    observations = chain_store.get_observations(node)
+    if before is not None:
+        observations = [o for o in observations if o.observed_at <= before]
+    runs: list[list[HeadObservation]] = []
+    diverged = False
+    for observation in observations:
+        if observation.block_root in canonical:
+            diverged = False
+            continue
+        if not diverged:
+            runs.append([])
+            diverged = True
+        runs[-1].append(observation)
+
+    num_diverged = sum(len(run) for run in runs)
+    logging.info(
+        f"DIVERGENCE: {node} {num_diverged}/{len(observations)} observations off the canonical chain"
+    )
+    for run in runs:
+        logging.info(
+            f"\tslots {run[0].slot}-{run[-1].slot} ({len(run)} observations) "
+            f"from {format_time(run[0].observed_at)} to {format_time(run[-1].observed_at)}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Reconstruct the forks of a run from the chain store."
+    )
+
+    parser.add_argument(
+        "--log-level", dest="log_level", type=str, default="info", help="Logging level"
+    )
+
+    parser.add_argument(
+        "--chain-store",
+        dest="chain_store",
+        type=pathlib.Path,
+        default=FilesConfig().chain_store_file,
+        help="The chain store to analyze.",
+    )
+
+    parser.add_argument(
+        "--before",
+        dest="before",
+        type=float,
+        default=None,
+        help="Analyze the run as it was at this unix time (defaults to the end of the run).",
+    )
+
+    args = parser.parse_args()
+
+    create_logger(
+        name="chain-forensics",
+        log_level=args.log_level.upper(),
+        format_str="%(message)s",
+    )
+
+    if not args.chain_store.exists():
+        raise Exception(f"No chain store at {args.chain_store}")
+
+    chain_store = ChainStore(args.chain_store, read_only=True)
+    logging.info(f"chain store: {chain_store.get_stats()}")
+
+    logging.info("fork tree:")
+    for parent, children in chain_store.get_forks():
+        logging.info(f"FORK: slot {parent.slot} root {parent.root}")
+        for child in children:
+            logging.info(f"\t-> slot {child.slot} root {child.root}")
+
+    classification = classify_heads(chain_store, args.before)
+    for line in classification.get_report_lines():
+        logging.info(line)
+
+    canonical_chain = classification.get_canonical_chain()
+    canonical: set[str] = set()
+    if canonical_chain is not None:
+        canonical = {h.root for h in chain_store.get_chain(canonical_chain.tip_root)}
+    for node in chain_store.get_nodes():
+        report_divergence(chain_store, node, canonical, args.before)
+
+    chain_store.close()
@@ -0,0 +1,43 @@
+"""The JSON decoder used for client responses.
+
+orjson is used when it is installed as it is several times faster than the
+stdlib decoder on the large bodies beacon nodes return, otherwise we fall
+back to the stdlib json module. A different decoder can be plugged in with
+set_json_decoder.
+"""
+import json
+from typing import Any, Callable, Union
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+JSONDecoder = Callable[[Union[bytes, str]], Any]
+
+
+def _default_json_decoder() -> JSONDecoder:
+    if orjson is not None:
+        return orjson.loads
+    return json.loads
+
+
+_json_decoder: JSONDecoder = _default_json_decoder()
+
+
+def json_loads(data: Union[bytes, str]) -> Any:
+    """Decode a JSON document with the configured decoder.
+
+    @param data: the raw JSON body.
+    @return: the decoded object.
+    """
+    return _json_decoder(data)
+
+
+def set_json_decoder(decoder: JSONDecoder = None):
+    """Set the decoder used by json_loads.
+
+    @param decoder: a callable taking bytes/str, None restores the default.
+    """
+    global _json_decoder
+    _json_decoder = decoder if decoder is not None else _default_json_decoder()
@@ -0,0 +1,221 @@
+"""Derivation of the execution layer premine accounts.
+
+The premine accounts are HD wallet paths of the account mnemonic
+(testnet-config -> execution-layer -> premines). Deriving one with
+w3.eth.account.from_mnemonic recomputes the BIP-39 seed and walks the
+whole BIP-32 path every time, and the genesis writers, the bootstrapper,
+the spammers and get_keys.py all derive the same paths again.
+
+The PremineKeyStore derives every path once:
+    - the seed of a mnemonic is computed once for every batch of paths.
+    - derived keys are memoized in-process.
+    - the bootstrapper writes every premine key to the premine keys file
+      (/data/premine-keys.json) at init, the containers that share /data
+      read it instead of deriving.
+    - large sets of missing paths are derived on a process pool.
+The file records digests of the mnemonic and passphrase it was derived
+from and is ignored if they do not match.
+"""
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+from eth_account import Account
+from eth_account.hdaccount import key_from_seed, seed_from_mnemonic
+
+from ..config.etb_config import ETBConfig, FilesConfig
+
+# derive on a process pool when at least this many paths are missing.
+PARALLEL_DERIVATION_THRESHOLD = 64
+
+
+@dataclass(frozen=True)
+class PremineAccount:
+    """An account derived from the account mnemonic."""
+
+    path: str
+    address: str  # checksummed
+    private_key: str  # 0x prefixed hex
+
+
+def _digest(value: str) -> str:
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def derive_premine_accounts(
+    mnemonic: str, paths: list[str], passphrase: str = ""
+) -> list[PremineAccount]:
+    """Derive the accounts at HD wallet paths of a mnemonic.
+
+    @param mnemonic: the account mnemonic.
+    @param paths: the derivation paths, e.g. m/44'/60'/0'/0/0
+    @param passphrase: the BIP-39 passphrase.
+    @return: the accounts in the order of the paths.
+    """
+    seed = seed_from_mnemonic(mnemonic, passphrase)
+    accounts = []
+    for path in paths:
+        key = key_from_seed(seed, path)
+        address = Account.from_key(key).address
+        accounts.append(PremineAccount(path=path, address=address, private_key=f"0x{key.hex()}"))
+    return accounts
+
+
+class PremineKeyStore:
+    """Memoized premine accounts, backed by the premine keys file."""
+
+    def __init__(self, keys_file: Optional[pathlib.Path] = None):
+        """
+        @param keys_file: the premine keys file to read, None for the default.
+        """
+        self.keys_file: Optional[pathlib.Path] = keys_file
+        # (mnemonic digest, passphrase digest) -> path -> account
+        self.accounts: dict[tuple[str, str], dict[str, PremineAccount]] = {}
+        self._loaded: bool = False
+        self._lock = threading.Lock()
+
+    def _get_keys_file(self) -> pathlib.Path:
+        if self.keys_file is None:
+            self.keys_file = FilesConfig().premine_keys_file
+        return self.keys_file
+
+    def _load(self):
+        """Add the accounts in the premine keys file to the memo."""
+        self._loaded = True
+        keys_file = self._get_keys_file()
+        if not keys_file.exists():
+            return
+        try:
+            with open(keys_file, "r", encoding="utf-8") as f:
+                contents = json.load(f)
+            accounts = self.accounts.setdefault(
+                (contents["mnemonic"], contents["passphrase"]), {}
+            )
+            for path, account in contents["accounts"].items():
+                accounts[path] = PremineAccount(
+                    path=path, address=account["address"], private_key=account["private-key"]
+                )
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"ignoring premine keys file {keys_file}: {e}")
+
+    def get_accounts(
+        self,
+        mnemonic: str,
+        paths: list[str],
+        passphrase: str = "",
+        max_workers: Optional[int] = None,
+    ) -> list[PremineAccount]:
+        """Get the accounts at HD wallet paths of a mnemonic, deriving the
+        ones not seen before.
+
+        @param mnemonic: the account mnemonic.
+        @param paths: the derivation paths.
+        @param passphrase: the BIP-39 passphrase.
+        @param max_workers: worker processes for large sets of missing
+            paths, defaults to the number of cores. 1 to derive in-process.
+        @return: the accounts in the order of the paths.
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            accounts = self.accounts.setdefault((_digest(mnemonic), _digest(passphrase)), {})
+            missing = [path for path in dict.fromkeys(paths) if path not in accounts]
+            if len(missing) > 0:
+                logging.debug(f"deriving {len(missing)} premine accounts")
+                for account in self._derive(mnemonic, missing, passphrase, max_workers):
+                    accounts[account.path] = account
+            return [accounts[path] for path in paths]
+
+    @staticmethod
+    def _derive(
+        mnemonic: str, paths: list[str], passphrase: str, max_workers: Optional[int]
+    ) -> list[PremineAccount]:
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        if max_workers == 1 or len(paths) < PARALLEL_DERIVATION_THRESHOLD:
+            return derive_premine_accounts(mnemonic, paths, passphrase)
+        chunk_size = -(-len(paths) // max_workers)
+        chunks = [paths[i : i + chunk_size] for i in range(0, len(paths), chunk_size)]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(derive_premine_accounts, mnemonic, chunk, passphrase)
+                for chunk in chunks
+            ]
+            return [account for future in futures for account in future.result()]
+
+    def write(
+        self,
+        mnemonic: str,
+        paths: list[str],
+        passphrase: str = "",
+        max_workers: Optional[int] = None,
+    ):
+        """Derive the accounts at paths and write them to the premine keys file.
+
+        @param mnemonic: the account mnemonic.
+        @param paths: the derivation paths.
+        @param passphrase: the BIP-39 passphrase.
+        @param max_workers: worker processes, defaults to the number of cores.
+        """
+        accounts = self.get_accounts(mnemonic, paths, passphrase, max_workers)
+        contents = {
+            "mnemonic": _digest(mnemonic),
+            "passphrase": _digest(passphrase),
+            "accounts": {
+                account.path: {"address": account.address, "private-key": account.private_key}
+                for account in accounts
+            },
+        }
+        keys_file = self._get_keys_file()
+        tmp_file = keys_file.with_name(f".{keys_file.name}.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(contents, f, indent=2)
+        tmp_file.rename(keys_file)
+
+
+# shared by every consumer in the process.
+premine_key_store = PremineKeyStore()
+
+
+def get_premine_accounts(
+    etb_config: ETBConfig, max_workers: Optional[int] = None
+) -> list[PremineAccount]:
+    """Get the premine accounts of the etb-config, in the order of the premines.
+
+    @param etb_config: ETBConfig
+    @param max_workers: worker processes for large sets of missing paths.
+    @return: the premine accounts.
+    """
+    if premine_key_store.keys_file is None:
+        premine_key_store.keys_file = etb_config.files.premine_keys_file
+    execution_layer = etb_config.testnet_config.execution_layer
+    return premine_key_store.get_accounts(
+        execution_layer.account_mnemonic,
+        list(execution_layer.premines),
+        execution_layer.keystore_passphrase,
+        max_workers,
+    )
+
+
+def write_premine_keys(etb_config: ETBConfig, max_workers: Optional[int] = None):
+    """Derive every premine account of the etb-config and write them to the
+    premine keys file.
+
+    @param etb_config: ETBConfig
+    @param max_workers: worker processes, defaults to the number of cores.
+    """
+    if premine_key_store.keys_file is None:
+        premine_key_store.keys_file = etb_config.files.premine_keys_file
+    execution_layer = etb_config.testnet_config.execution_layer
+    premine_key_store.write(
+        execution_layer.account_mnemonic,
+        list(execution_layer.premines),
+        execution_layer.keystore_passphrase,
+        max_workers,
+    )
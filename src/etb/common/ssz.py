@@ -0,0 +1,135 @@
+"""Lazy, read-only views over SSZ encoded beacon objects.
+
+Only fields that sit at the same position in every fork are exposed, and
+they are only decoded when accessed. This lets us fetch blocks and
+states as SSZ (much smaller than JSON) and skip decoding everything we
+don't look at.
+
+See: https://github.com/ethereum/consensus-specs/blob/dev/ssz/simple-serialize.md
+"""
+from typing import Union
+
+BYTES_PER_LENGTH_OFFSET = 4
+
+# SSZ content type as served by the beacon API.
+SSZ_CONTENT_TYPE = "application/octet-stream"
+
+
+def read_uint32(data: Union[bytes, memoryview], offset: int) -> int:
+    return int.from_bytes(data[offset : offset + 4], "little")
+
+
+def read_uint64(data: Union[bytes, memoryview], offset: int) -> int:
+    return int.from_bytes(data[offset : offset + 8], "little")
+
+
+def read_root(data: Union[bytes, memoryview], offset: int) -> str:
+    """Read a 32 byte root as a 0x prefixed hex string."""
+    return f"0x{bytes(data[offset : offset + 32]).hex()}"
+
+
+def decode_graffiti(graffiti: bytes) -> str:
+    return graffiti.decode("utf-8", errors="replace").replace("\x00", "")
+
+
+class BeaconBlockView:
+    """View over the message of an SSZ encoded SignedBeaconBlock.
+
+    SignedBeaconBlock: message (offset), signature (96 bytes)
+    BeaconBlock:       slot, proposer_index, parent_root, state_root, body (offset)
+    BeaconBlockBody:   randao_reveal (96), eth1_data (72), graffiti (32), ...
+    """
+
+    def __init__(self, signed_block: bytes):
+        self.data = memoryview(signed_block)
+        self.message_offset: int = read_uint32(self.data, 0)
+
+    @property
+    def slot(self) -> int:
+        return read_uint64(self.data, self.message_offset)
+
+    @property
+    def proposer_index(self) -> int:
+        return read_uint64(self.data, self.message_offset + 8)
+
+    @property
+    def parent_root(self) -> str:
+        return read_root(self.data, self.message_offset + 16)
+
+    @property
+    def state_root(self) -> str:
+        return read_root(self.data, self.message_offset + 48)
+
+    @property
+    def graffiti(self) -> str:
+        body_offset = self.message_offset + read_uint32(
+            self.data, self.message_offset + 80
+        )
+        graffiti_offset = body_offset + 96 + 72
+        return decode_graffiti(bytes(self.data[graffiti_offset : graffiti_offset + 32]))
+
+
+class JSONBeaconBlockView:
+    """The same interface as BeaconBlockView for clients that answered
+    with JSON instead of SSZ."""
+
+    def __init__(self, message: dict):
+        self.message: dict = message
+
+    @property
+    def slot(self) -> int:
+        return int(self.message["slot"])
+
+    @property
+    def proposer_index(self) -> int:
+        return int(self.message["proposer_index"])
+
+    @property
+    def parent_root(self) -> str:
+        return self.message["parent_root"]
+
+    @property
+    def state_root(self) -> str:
+        return self.message["state_root"]
+
+    @property
+    def graffiti(self) -> str:
+        return decode_graffiti(bytes.fromhex(self.message["body"]["graffiti"][2:]))
+
+
+class BeaconStateView:
+    """View over the leading fixed size fields of an SSZ encoded
+    BeaconState.
+
+    BeaconState: genesis_time, genesis_validators_root, slot,
+                 fork (previous_version, current_version, epoch), ...
+    """
+
+    GENESIS_TIME_OFFSET = 0
+    GENESIS_VALIDATORS_ROOT_OFFSET = 8
+    SLOT_OFFSET = 40
+    FORK_OFFSET = 48
+
+    def __init__(self, state: bytes):
+        self.data = memoryview(state)
+
+    @property
+    def genesis_time(self) -> int:
+        return read_uint64(self.data, self.GENESIS_TIME_OFFSET)
+
+    @property
+    def genesis_validators_root(self) -> str:
+        return read_root(self.data, self.GENESIS_VALIDATORS_ROOT_OFFSET)
+
+    @property
+    def slot(self) -> int:
+        return read_uint64(self.data, self.SLOT_OFFSET)
+
+    @property
+    def fork(self) -> tuple[str, str, int]:
+        """(previous_version, current_version, epoch)"""
+        return (
+            f"0x{bytes(self.data[self.FORK_OFFSET : self.FORK_OFFSET + 4]).hex()}",
+            f"0x{bytes(self.data[self.FORK_OFFSET + 4 : self.FORK_OFFSET + 8]).hex()}",
+            read_uint64(self.data, self.FORK_OFFSET + 8),
+        )
@@ -1,9 +1,8 @@
 """Various utility functions that are used throughout common applications."""
 import logging
 
-from web3.auto import w3
-
 from ..config.etb_config import FilesConfig, ETBConfig
+from .premine_keys import get_premine_accounts, premine_key_store
 
 logging_levels: dict = {
     "DEBUG": logging.DEBUG,
@@ -68,12 +67,10 @@ class PremineKey:
         self.mnemonic: str = mnemonic
         self.account: str = account
         self.passphrase: str = passphrase
-        w3.eth.account.enable_unaudited_hdwallet_features()
-        acct = w3.eth.account.from_mnemonic(
-            mnemonic, account_path=self.account, passphrase=passphrase
-        )
+        # derived once, see etb.common.premine_keys
+        (acct,) = premine_key_store.get_accounts(mnemonic, [account], passphrase)
         self.public_key: str = acct.address
-        self.private_key = acct.key.hex()
+        self.private_key = acct.private_key
 
 
 def get_premine_keypairs(etb_config: ETBConfig) -> list[PremineKey]:
@@ -85,6 +82,8 @@ def get_premine_keypairs(etb_config: ETBConfig) -> list[PremineKey]:
     mnemonic = etb_config.testnet_config.execution_layer.account_mnemonic
     account_pass = etb_config.testnet_config.execution_layer.keystore_passphrase
     premine_accts = etb_config.testnet_config.execution_layer.premines
+    # derive (or read) them all at once, PremineKey then hits the memo.
+    get_premine_accounts(etb_config)
 
     premines: list[PremineKey] = []
     for acc in premine_accts:
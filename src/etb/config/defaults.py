@@ -404,6 +404,8 @@ DEFAULT_NODE_WATCH_INSTANCE_NAME = "node-watch"
 DEFAULT_NODE_WATCH_IMAGE_NAME = "ethereum-testnet-bootstrapper"
 DEFAULT_NODE_WATCH_TAG_NAME = "latest"
 DEFAULT_NODE_WATCH_ENTRYPOINT = "python3 /source/src/node_watch.py --log-level info --monitor heads:slot --monitor checkpoints:slot --max-retries 3"
+# node_watch serves its own metrics for prometheus to scrape.
+DEFAULT_NODE_WATCH_METRICS_PORT = 9400
 
 DEFAULT_GENERIC_INSTANCE_NUM_NODES = 1
 DEFAULT_GENERIC_INSTANCE_IMAGE = "ethereum-testnet-bootstrapper"
@@ -117,6 +117,14 @@ class FilesConfig(Config):
             "local-testnet-dir": "/data/local-testnet/",
             # antithesis capture log directory
             "local-log-dir": "/data/logs/",
+            # blocks fetched by root by the fork detectors
+            "beacon-object-cache-dir": "/data/beacon-object-cache/",
+            # heads observed by the monitors, for post-mortem fork analysis
+            "chain-store-file": "/data/chain-store.sqlite",
+            # premine accounts derived at init, read instead of re-deriving
+            "premine-keys-file": "/data/premine-keys.json",
+            # kept across runs (not under /data), e.g. generated keystores
+            "etb-cache-dir": "/source/.etb-cache/",
             "docker-compose-file": "/source/docker-compose.yaml",  # used by host so use /source/
             "etb-config-checkpoint-file": "/data/etb-config-checkpoint.txt",
             "consensus-checkpoint-file": "/data/consensus-checkpoint.txt",
@@ -153,6 +161,12 @@ class FilesConfig(Config):
         self.testnet_root: pathlib.Path = pathlib.Path(fields["testnet-root"])
         self.local_testnet_dir: pathlib.Path = pathlib.Path(fields["local-testnet-dir"])
         self.local_logs_dir: pathlib.Path = pathlib.Path(fields["local-log-dir"])
+        self.beacon_object_cache_dir: pathlib.Path = pathlib.Path(
+            fields["beacon-object-cache-dir"]
+        )
+        self.chain_store_file: pathlib.Path = pathlib.Path(fields["chain-store-file"])
+        self.premine_keys_file: pathlib.Path = pathlib.Path(fields["premine-keys-file"])
+        self.etb_cache_dir: pathlib.Path = pathlib.Path(fields["etb-cache-dir"])
         self.docker_compose_file: pathlib.Path = pathlib.Path(
             fields["docker-compose-file"]
         )
@@ -1,6 +1,9 @@
 """Contains all the necessary information and functionality to write the
 consensus config.yaml and genesis.ssz."""
+import json
 import logging
+import time
+from typing import Optional
 
 from ..common.consensus import (
     ForkVersionName,
@@ -12,6 +15,7 @@ from ..common.consensus import (
 )
 from ..config.etb_config import ETBConfig
 from ..interfaces.external.eth2_testnet_genesis import Eth2TestnetGenesis
+from .genesis_cache import GenesisCache, get_eth1_timestamp, get_genesis_cache_key
 
 
 class ConsensusGenesisWriter:
@@ -189,9 +193,19 @@ TARGET_NUMBER_OF_PEERS: 70
 """
         return config_file
 
-    def create_consensus_genesis_ssz(self) -> bytes:
+    def create_consensus_genesis_ssz(
+        self, eth1_block_hash: Optional[str] = None, use_cache: bool = True
+    ) -> bytes:
         """Create the consensus genesis state and return the SSZ encoded bytes.
 
+        A state generated for an earlier genesis time of the same experiment
+        is re-stamped from the genesis cache instead of generated. The
+        config.yaml (and the geth genesis for bellatrix+) must already be
+        written.
+
+        @param eth1_block_hash: the hash of the execution genesis block,
+            required to use the genesis cache.
+        @param use_cache: use (and fill) the genesis cache.
         @return: genesis_ssz as bytes
         """
         validator_mnemonic = (
@@ -238,6 +252,33 @@ TARGET_NUMBER_OF_PEERS: 70
             preset_args.append("--preset-capella")
             preset_args.append(preset_base_str)
 
+        cache: Optional[GenesisCache] = None
+        if (
+            use_cache
+            and eth1_block_hash is not None
+            and genesis_fork.name >= ForkVersionName.bellatrix
+        ):
+            cache = GenesisCache(self.etb_config.files.etb_cache_dir / "genesis")
+            with open(self.etb_config.files.consensus_config_file, "r", encoding="utf-8") as f:
+                config_yaml = f.read()
+            with open(self.etb_config.files.geth_genesis_file, "r", encoding="utf-8") as f:
+                eth1_genesis = json.load(f)
+            cache_key = get_genesis_cache_key(
+                config_yaml,
+                eth1_genesis,
+                validator_mnemonic,
+                num_validators,
+                genesis_fork.name.name.lower(),
+                preset_args,
+            )
+            eth1_timestamp = get_eth1_timestamp(eth1_genesis)
+            block_hash = bytes.fromhex(eth1_block_hash.replace("0x", ""))
+            genesis_ssz = cache.get(cache_key, block_hash, eth1_timestamp)
+            if genesis_ssz is not None:
+                logging.info(f"re-stamped cached genesis state {cache_key}")
+                return genesis_ssz
+
+        start = time.monotonic()
         out = eth2_testnet_genesis.get_genesis_ssz(
             genesis_fork_name=genesis_fork.name.name.lower(),
             config_in=self.etb_config.files.consensus_config_file,
@@ -247,6 +288,16 @@ TARGET_NUMBER_OF_PEERS: 70
         # there was an issue
         if isinstance(out, Exception):
             raise out
+        logging.info(
+            f"generated genesis state for {num_validators} validators "
+            f"in {time.monotonic() - start:.2f}s"
+        )
+
+        if cache is not None:
+            cache.put(cache_key, out, block_hash, eth1_timestamp)
+            num_evicted = cache.evict()
+            if num_evicted > 0:
+                logging.info(f"evicted {num_evicted} genesis cache entries")
 
         return out
 
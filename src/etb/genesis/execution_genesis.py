@@ -4,18 +4,17 @@ This module contains the logic for creating the execution layer genesis files.
 from typing import Any
 import logging
 
-from web3.auto import w3
 import requests
 import time
 from ..common.consensus import Epoch, ConsensusFork
+from ..common.premine_keys import get_premine_accounts
 from ..config.etb_config import ETBConfig, ForkVersionName
 
-w3.eth.account.enable_unaudited_hdwallet_features()
-
 from etb.interfaces.client_request import (
     eth_sendRawTransaction,
     eth_getTransactionReceipt,
-    eth_getCode
+    eth_getCode,
+    ExecutionJSONRPCBatchRequest,
 )
 class ExecutionGenesisWriter:
     """
@@ -78,15 +77,9 @@ class ExecutionGenesisWriter:
             }
 
         # account allocations
-        mnemonic = self.etb_config.testnet_config.execution_layer.account_mnemonic
-        password = self.etb_config.testnet_config.execution_layer.keystore_passphrase
         premines = self.etb_config.testnet_config.execution_layer.premines
-
-        for acc in premines:
-            acct = w3.eth.account.from_mnemonic(
-                mnemonic, account_path=acc, passphrase=password
-            )
-            allocs[acct.address] = {"balance": str(premines[acc]) + "0" * 18}
+        for acct in get_premine_accounts(self.etb_config):
+            allocs[acct.address] = {"balance": str(premines[acct.path]) + "0" * 18}
         
         # add the eip4788 fund account
         allocs["0x0B799C86a49DEeb90402691F1041aa3AF2d3C875"] = {"balance": "100" + ("0" * 18) }
@@ -192,14 +185,8 @@ class ExecutionGenesisWriter:
 
         # besu doesn't use keystores like geth, however you can embed the
         # accounts in the genesis.
-        mnemonic = self.etb_config.testnet_config.execution_layer.account_mnemonic
-        password = self.etb_config.testnet_config.execution_layer.keystore_passphrase
-        premines = self.etb_config.testnet_config.execution_layer.premines
-        for acc in premines:
-            acct = w3.eth.account.from_mnemonic(
-                mnemonic, account_path=acc, passphrase=password
-            )
-            self.genesis["alloc"][acct.address]["privateKey"] = acct.key.hex()[2:]
+        for acct in get_premine_accounts(self.etb_config):
+            self.genesis["alloc"][acct.address]["privateKey"] = acct.private_key[2:]
 
         return self.genesis
 
@@ -298,7 +285,7 @@ class ExecutionGenesisWriter:
 
         return self.genesis
     
-    def deploy_4788(self) -> bool:
+    def deploy_4788(self, max_receipt_polls: int = 3, receipt_poll_interval: int = 6) -> bool:
         now = int(time.time())
         if now < self.etb_config.genesis_time:
             time_to_genesis = now - self.etb_config.genesis_time
@@ -321,25 +308,37 @@ class ExecutionGenesisWriter:
             raw_tx = "0xf8838085e8d4a510008303d0908080b86a60618060095f395ff33373fffffffffffffffffffffffffffffffffffffffe14604d57602036146024575f5ffd5b5f35801560495762001fff810690815414603c575f5ffd5b62001fff01545f5260205ff35b5f5ffd5b62001fff42064281555f359062001fff0155001b820539851b9b6eb1f0"
 
 
-            send_tx = eth_sendRawTransaction(raw_tx)
+            send_tx = eth_sendRawTransaction(raw_tx, use_circuit_breaker=False)
             resp = send_tx.perform_request(instance)
             if not send_tx.is_valid(resp):
                 logging.error(f"error sending raw transaction {resp}")
                 raise resp
             tx_hash = send_tx.get_hash(resp)
             
-            tx_reciept = eth_getTransactionReceipt(tx_hash)
-            resp = tx_reciept.perform_request(instance)
-            if not tx_reciept.is_valid(resp):
-                logging.error(f"error getting transaction receipt {resp}")
-                raise resp
-           
-            eth_code = eth_getCode("0x000F3df6D732807Ef1319fB7B8bB8522d0Beac02", "latest")
-            resp = eth_code.perform_request(instance)
-            if not eth_code.is_valid(resp):
-                logging.error(f"error getting code {resp}")
-                raise resp
-            code = eth_code.get_code(resp)
+            # poll the receipt and the deployed code in a single round trip.
+            deployment_status = ExecutionJSONRPCBatchRequest(
+                [
+                    eth_getTransactionReceipt(tx_hash),
+                    eth_getCode(eip4788_contract_address, "latest"),
+                ],
+                use_circuit_breaker=False,
+            )
+            for _ in range(max_receipt_polls):
+                resp = deployment_status.perform_request(instance)
+                if not deployment_status.is_valid(resp):
+                    logging.error(f"error getting transaction receipt {resp}")
+                    raise resp
+                tx_reciept, code = deployment_status.get_results(resp)
+                if isinstance(tx_reciept, Exception):
+                    logging.error(f"error getting transaction receipt {tx_reciept}")
+                    raise tx_reciept
+                if tx_reciept is not None:
+                    break
+                time.sleep(receipt_poll_interval)
+
+            if isinstance(code, Exception):
+                logging.error(f"error getting code {code}")
+                raise code
 
             if code == '0x3373fffffffffffffffffffffffffffffffffffffffe14604d57602036146024575f5ffd5b5f35801560495762001fff810690815414603c575f5ffd5b62001fff01545f5260205ff35b5f5ffd5b62001fff42064281555f359062001fff015500':
                     logging.info("Successfully deployed eip4788 contract")
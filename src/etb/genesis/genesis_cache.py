@@ -0,0 +1,237 @@
+"""A persistent cache of consensus genesis states.
+
+eth2-testnet-genesis builds the genesis state from the full validator set
+at every bootstrap, although between runs of the same experiment only the
+genesis time (and so the execution genesis block) changes. The
+GenesisCache keeps the genesis.ssz of every experiment under
+/source/.etb-cache/genesis/, keyed by a hash of the generator's inputs with
+the times taken out:
+    - config.yaml without MIN_GENESIS_TIME.
+    - the geth genesis without its timestamp, fork times relative to it.
+    - the validator mnemonic and count, the genesis fork and presets.
+
+On a hit the cached state is re-stamped in place instead of generated.
+Only these fields of a (bellatrix+) genesis state depend on the time:
+    - genesis_time, the first field of the state.
+    - the execution genesis block hash, in eth1_data.block_hash, every
+      randao mix and latest_execution_payload_header.block_hash.
+    - latest_execution_payload_header.timestamp, 44 bytes before its
+      block_hash (timestamp, extra_data offset, base_fee_per_gas).
+The fork and everything derived from the validators are part of the key
+and left as they are. Every entry records the stamp (times and block hash)
+it was generated with.
+"""
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import shutil
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from ..common.ssz import BeaconStateView, read_uint64
+
+# 1 GiB
+DEFAULT_GENESIS_CACHE_MAX_SIZE = 1024 * 1024 * 1024
+
+# latest_execution_payload_header.timestamp relative to its block_hash.
+PAYLOAD_TIMESTAMP_OFFSET = -44
+
+
+@dataclass(frozen=True)
+class GenesisStamp:
+    """The time dependent inputs of a genesis state."""
+
+    genesis_time: int
+    eth1_block_hash: bytes
+    eth1_timestamp: int
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "genesis-time": self.genesis_time,
+            "eth1-block-hash": f"0x{self.eth1_block_hash.hex()}",
+            "eth1-timestamp": self.eth1_timestamp,
+        }
+
+    @classmethod
+    def from_dict(cls, stamp: dict[str, Any]) -> "GenesisStamp":
+        return cls(
+            genesis_time=stamp["genesis-time"],
+            eth1_block_hash=bytes.fromhex(stamp["eth1-block-hash"].replace("0x", "")),
+            eth1_timestamp=stamp["eth1-timestamp"],
+        )
+
+
+def _get_int(value: Any) -> int:
+    return int(value, 0) if isinstance(value, str) else int(value)
+
+
+def get_eth1_timestamp(eth1_genesis: dict) -> int:
+    """Get the timestamp of a geth genesis."""
+    return _get_int(eth1_genesis["timestamp"])
+
+
+def get_genesis_cache_key(
+    config_yaml: str,
+    eth1_genesis: dict,
+    validator_mnemonic: str,
+    num_validators: int,
+    genesis_fork_name: str,
+    preset_args: list[str],
+) -> str:
+    """The key of a genesis state, the same for every genesis time.
+
+    @param config_yaml: the consensus config.yaml contents.
+    @param eth1_genesis: the geth genesis.
+    @param validator_mnemonic: the validator mnemonic, only stored hashed.
+    @param num_validators: the number of genesis validators.
+    @param genesis_fork_name: the genesis fork (bellatrix, capella, etc..)
+    @param preset_args: the preset args passed to eth2-testnet-genesis.
+    """
+    config_lines = [
+        line for line in config_yaml.splitlines() if not line.startswith("MIN_GENESIS_TIME:")
+    ]
+    eth1_genesis = json.loads(json.dumps(eth1_genesis))
+    timestamp = get_eth1_timestamp(eth1_genesis)
+    del eth1_genesis["timestamp"]
+    for field, value in eth1_genesis.get("config", {}).items():
+        if field.endswith("Time"):
+            eth1_genesis["config"][field] = _get_int(value) - timestamp
+    fields = {
+        "config": "\n".join(config_lines),
+        "eth1-genesis": eth1_genesis,
+        "mnemonic": hashlib.sha256(validator_mnemonic.encode()).hexdigest(),
+        "num-validators": num_validators,
+        "genesis-fork": genesis_fork_name,
+        "preset-args": preset_args,
+    }
+    return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+
+
+def restamp_genesis_ssz(state: bytes, old: GenesisStamp, new: GenesisStamp) -> Optional[bytes]:
+    """Patch the time dependent fields of a genesis state.
+
+    @param state: the SSZ encoded genesis state stamped with old.
+    @param old: the stamp of the state.
+    @param new: the stamp to apply.
+    @return: the re-stamped state, None if the fields to patch could not be
+        found.
+    """
+    patched = bytearray(state)
+    # the execution payload header is the occurrence of the block hash
+    # preceded by the eth1 timestamp.
+    num_timestamps = 0
+    pos = patched.find(old.eth1_block_hash)
+    while pos != -1:
+        timestamp_pos = pos + PAYLOAD_TIMESTAMP_OFFSET
+        if timestamp_pos >= 0 and read_uint64(patched, timestamp_pos) == old.eth1_timestamp:
+            patched[timestamp_pos : timestamp_pos + 8] = new.eth1_timestamp.to_bytes(8, "little")
+            num_timestamps += 1
+        pos = patched.find(old.eth1_block_hash, pos + 32)
+    if num_timestamps != 1:
+        return None
+    patched = bytearray(patched.replace(old.eth1_block_hash, new.eth1_block_hash))
+    offset = BeaconStateView.GENESIS_TIME_OFFSET
+    patched[offset : offset + 8] = new.genesis_time.to_bytes(8, "little")
+    return bytes(patched)
+
+
+class GenesisCache:
+    """Genesis states stored by key, each entry is:
+    <cache_dir>/<key>/genesis.ssz  the state.
+    <cache_dir>/<key>/stamp.json   the GenesisStamp of the state.
+    The mtime of <cache_dir>/<key> is its last use.
+    """
+
+    def __init__(self, cache_dir: pathlib.Path, max_size: int = DEFAULT_GENESIS_CACHE_MAX_SIZE):
+        """
+        @param cache_dir: where the entries are kept, created if needed.
+        @param max_size: bytes the cache is evicted down to.
+        """
+        self.cache_dir: pathlib.Path = cache_dir
+        self.max_size: int = max_size
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str, eth1_block_hash: bytes, eth1_timestamp: int) -> Optional[bytes]:
+        """Get a cached state re-stamped for a new execution genesis block.
+
+        @param key: the entry.
+        @param eth1_block_hash: the hash of the execution genesis block.
+        @param eth1_timestamp: the timestamp of the execution genesis block.
+        @return: the state, None on a miss.
+        """
+        entry = self.cache_dir / key
+        try:
+            state = (entry / "genesis.ssz").read_bytes()
+            old = GenesisStamp.from_dict(json.loads((entry / "stamp.json").read_text()))
+            os.utime(entry)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"failed to use genesis cache entry {key}: {e}")
+            return None
+        new = GenesisStamp(
+            genesis_time=old.genesis_time + eth1_timestamp - old.eth1_timestamp,
+            eth1_block_hash=eth1_block_hash,
+            eth1_timestamp=eth1_timestamp,
+        )
+        restamped = restamp_genesis_ssz(state, old, new)
+        if restamped is None:
+            logging.warning(f"failed to re-stamp genesis cache entry {key}")
+        return restamped
+
+    def put(self, key: str, state: bytes, eth1_block_hash: bytes, eth1_timestamp: int):
+        """Cache a generated genesis state.
+
+        @param key: the entry.
+        @param state: the SSZ encoded genesis state.
+        @param eth1_block_hash: the hash of the execution genesis block.
+        @param eth1_timestamp: the timestamp of the execution genesis block.
+        """
+        stamp = GenesisStamp(
+            genesis_time=BeaconStateView(state).genesis_time,
+            eth1_block_hash=eth1_block_hash,
+            eth1_timestamp=eth1_timestamp,
+        )
+        # only cache states we know how to re-stamp.
+        if restamp_genesis_ssz(state, stamp, stamp) is None:
+            logging.debug(f"not caching genesis {key}, the execution payload header was not found")
+            return
+        entry = self.cache_dir / key
+        tmp = self.cache_dir / f".tmp-{key}-{os.getpid()}"
+        try:
+            tmp.mkdir()
+            (tmp / "genesis.ssz").write_bytes(state)
+            (tmp / "stamp.json").write_text(json.dumps(stamp.to_dict()))
+            if entry.exists():
+                shutil.rmtree(entry)
+            tmp.rename(entry)
+        except OSError as e:
+            logging.debug(f"did not cache genesis {key}: {e}")
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def evict(self) -> int:
+        """Remove the least recently used entries until the cache is under
+        max_size.
+
+        @return: the number of entries removed.
+        """
+        entries = []
+        for entry in self.cache_dir.iterdir():
+            if entry.name.startswith("."):
+                continue
+            try:
+                size = (entry / "genesis.ssz").stat().st_size
+                entries.append((entry, entry.stat().st_mtime, size))
+            except OSError:
+                entries.append((entry, 0, 0))
+        total = sum(size for _, _, size in entries)
+        num_evicted = 0
+        for entry, _, size in sorted(entries, key=lambda e: e[1]):
+            if total <= self.max_size:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            num_evicted += 1
+        return num_evicted
@@ -0,0 +1,124 @@
+"""The minimum of BLS12-381 needed to get validator public keys.
+
+A BLS public key is the secret key times the G1 generator, serialized
+compressed (48 bytes). G1 is the curve y^2 = x^3 + 4 over Fp. Points are
+multiplied in Jacobian coordinates against a table of the doublings of the
+generator (computed once per process), so a public key is ~128 point
+additions and a single inversion.
+
+See: https://github.com/zkcrypto/pairing/tree/master/src/bls12_381 (serialization)
+"""
+from typing import Optional
+
+# field modulus.
+P = 0x1A0111EA397FE69A4B1BA7B6434BACD764774B84F38512BF6730D2A0F6B0F6241EABFFFEB153FFFFB9FEFFFFFFFFAAAB
+# order of G1 (and of the secret keys).
+R = 0x73EDA753299D7D483339D80809A1D80553BDA402FFFE5BFEFFFFFFFF00000001
+
+G1_X = 0x17F1D3A73197D7942695638C4FA9AC0FC3688C4F9774B905A14E3A3F171BAC586C55E83FF97A1AEFFB3AF00ADB22C6BB
+G1_Y = 0x08B3F481E3AAA0F1A09E30ED741D8AE4FCF5E095D5D00AF600DB18CB2C04B3EDD03CC744A2888AE40CAA232946C5E7E1
+
+# (X, Y, Z), Z == 0 is the point at infinity.
+JacobianPoint = tuple[int, int, int]
+INFINITY: JacobianPoint = (1, 1, 0)
+
+# 2^i * G1 in affine coordinates, for i < 255.
+_g1_doublings: Optional[list[tuple[int, int]]] = None
+
+
+def _double(point: JacobianPoint) -> JacobianPoint:
+    x, y, z = point
+    if z == 0 or y == 0:
+        return INFINITY
+    a = x * x % P
+    b = y * y % P
+    c = b * b % P
+    d = 2 * ((x + b) ** 2 - a - c) % P
+    e = 3 * a % P
+    x3 = (e * e - 2 * d) % P
+    y3 = (e * (d - x3) - 8 * c) % P
+    z3 = 2 * y * z % P
+    return x3, y3, z3
+
+
+def _add_affine(point: JacobianPoint, x2: int, y2: int) -> JacobianPoint:
+    """Add an affine point to a Jacobian point."""
+    x1, y1, z1 = point
+    if z1 == 0:
+        return x2, y2, 1
+    z1z1 = z1 * z1 % P
+    u2 = x2 * z1z1 % P
+    s2 = y2 * z1 * z1z1 % P
+    h = (u2 - x1) % P
+    r = 2 * (s2 - y1) % P
+    if h == 0:
+        if r == 0:
+            return _double(point)
+        return INFINITY
+    hh = h * h % P
+    i = 4 * hh % P
+    j = h * i % P
+    v = x1 * i % P
+    x3 = (r * r - j - 2 * v) % P
+    y3 = (r * (v - x3) - 2 * y1 * j) % P
+    z3 = ((z1 + h) ** 2 - z1z1 - hh) % P
+    return x3, y3, z3
+
+
+def _to_affine(point: JacobianPoint) -> Optional[tuple[int, int]]:
+    x, y, z = point
+    if z == 0:
+        return None
+    z_inv = pow(z, -1, P)
+    z_inv2 = z_inv * z_inv % P
+    return x * z_inv2 % P, y * z_inv2 * z_inv % P
+
+
+def _get_g1_doublings() -> list[tuple[int, int]]:
+    global _g1_doublings
+    if _g1_doublings is None:
+        doublings = []
+        point: JacobianPoint = (G1_X, G1_Y, 1)
+        for _ in range(R.bit_length()):
+            doublings.append(_to_affine(point))
+            point = _double(point)
+        _g1_doublings = doublings
+    return _g1_doublings
+
+
+def g1_multiply_generator(scalar: int) -> Optional[tuple[int, int]]:
+    """Multiply the G1 generator.
+
+    @param scalar: the multiplier.
+    @return: the affine point, None for the point at infinity.
+    """
+    scalar %= R
+    point = INFINITY
+    for i, (x, y) in enumerate(_get_g1_doublings()):
+        if scalar >> i & 1:
+            point = _add_affine(point, x, y)
+    return _to_affine(point)
+
+
+def compress_g1(point: Optional[tuple[int, int]]) -> bytes:
+    """Serialize a G1 point compressed: x, big endian, with the compression
+    flag, the infinity flag and the sign of y in the top 3 bits."""
+    if point is None:
+        return bytes([0xC0]) + bytes(47)
+    x, y = point
+    out = bytearray(x.to_bytes(48, "big"))
+    out[0] |= 0x80
+    if y > (P - 1) // 2:
+        out[0] |= 0x20
+    return bytes(out)
+
+
+def sk_to_pk(secret_key: int) -> bytes:
+    """Get the public key of a secret key.
+
+    @param secret_key: the secret key, 0 < secret_key < R.
+    @return: the 48 byte compressed public key.
+    """
+    if not 0 < secret_key < R:
+        raise ValueError("invalid BLS secret key")
+    return compress_g1(g1_multiply_generator(secret_key))
@@ -0,0 +1,126 @@
+"""Validator key derivation from a mnemonic.
+
+    - BIP-39: mnemonic -> seed.
+    - EIP-2333: seed -> master secret key -> child secret keys (lamport
+      based tree KDF).
+    - EIP-2334: validator i signs with m/12381/3600/i/0/0 and withdraws
+      with m/12381/3600/i/0.
+
+The keys of a range of validators share the m/12381/3600 prefix, it is
+derived once per range.
+
+See: https://eips.ethereum.org/EIPS/eip-2333, https://eips.ethereum.org/EIPS/eip-2334
+"""
+import hashlib
+import hmac
+import unicodedata
+from dataclasses import dataclass
+from typing import Iterator
+
+from .bls import R, sk_to_pk
+
+# m/12381/3600 (purpose/coin type) shared by every validator key.
+VALIDATOR_KEY_PREFIX = (12381, 3600)
+
+
+def mnemonic_to_seed(mnemonic: str, passphrase: str = "") -> bytes:
+    """BIP-39 seed of a mnemonic."""
+    mnemonic = unicodedata.normalize("NFKD", " ".join(mnemonic.split()))
+    salt = unicodedata.normalize("NFKD", f"mnemonic{passphrase}")
+    return hashlib.pbkdf2_hmac("sha512", mnemonic.encode(), salt.encode(), 2048)
+
+
+def _hkdf_extract(salt: bytes, ikm: bytes) -> bytes:
+    return hmac.new(salt, ikm, hashlib.sha256).digest()
+
+
+def _hkdf_expand(prk: bytes, info: bytes, length: int) -> bytes:
+    okm = b""
+    block = b""
+    i = 1
+    while len(okm) < length:
+        block = hmac.new(prk, block + info + bytes([i]), hashlib.sha256).digest()
+        okm += block
+        i += 1
+    return okm[:length]
+
+
+def _hkdf_mod_r(ikm: bytes, key_info: bytes = b"") -> int:
+    salt = b"BLS-SIG-KEYGEN-SALT-"
+    sk = 0
+    while sk == 0:
+        salt = hashlib.sha256(salt).digest()
+        prk = _hkdf_extract(salt, ikm + b"\x00")
+        okm = _hkdf_expand(prk, key_info + (48).to_bytes(2, "big"), 48)
+        sk = int.from_bytes(okm, "big") % R
+    return sk
+
+
+def _ikm_to_lamport_sk(ikm: bytes, salt: bytes) -> list[bytes]:
+    okm = _hkdf_expand(_hkdf_extract(salt, ikm), b"", 32 * 255)
+    return [okm[i : i + 32] for i in range(0, len(okm), 32)]
+
+
+def _parent_sk_to_lamport_pk(parent_sk: int, index: int) -> bytes:
+    salt = index.to_bytes(4, "big")
+    ikm = parent_sk.to_bytes(32, "big")
+    not_ikm = bytes(b ^ 0xFF for b in ikm)
+    lamport_sk = _ikm_to_lamport_sk(ikm, salt) + _ikm_to_lamport_sk(not_ikm, salt)
+    lamport_pk = b"".join(hashlib.sha256(chunk).digest() for chunk in lamport_sk)
+    return hashlib.sha256(lamport_pk).digest()
+
+
+def derive_master_sk(seed: bytes) -> int:
+    if len(seed) < 32:
+        raise ValueError("seed must be at least 32 bytes")
+    return _hkdf_mod_r(seed)
+
+
+def derive_child_sk(parent_sk: int, index: int) -> int:
+    return _hkdf_mod_r(_parent_sk_to_lamport_pk(parent_sk, index))
+
+
+def derive_path(sk: int, path: tuple[int, ...]) -> int:
+    """Derive the secret key at a path below sk."""
+    for index in path:
+        sk = derive_child_sk(sk, index)
+    return sk
+
+
+def get_signing_key_path(validator_index: int) -> str:
+    return f"m/{VALIDATOR_KEY_PREFIX[0]}/{VALIDATOR_KEY_PREFIX[1]}/{validator_index}/0/0"
+
+
+def get_withdrawal_key_path(validator_index: int) -> str:
+    return f"m/{VALIDATOR_KEY_PREFIX[0]}/{VALIDATOR_KEY_PREFIX[1]}/{validator_index}/0"
+
+
+@dataclass(frozen=True)
+class ValidatorKey:
+    """The signing key of a validator."""
+
+    index: int
+    secret_key: int
+    pubkey: bytes
+
+    @property
+    def path(self) -> str:
+        return get_signing_key_path(self.index)
+
+    @property
+    def secret_key_bytes(self) -> bytes:
+        return self.secret_key.to_bytes(32, "big")
+
+
+def derive_validator_keys(mnemonic: str, min_ndx: int, max_ndx: int) -> Iterator[ValidatorKey]:
+    """Derive the signing keys of a range of validators.
+
+    @param mnemonic: the validator mnemonic.
+    @param min_ndx: first validator index.
+    @param max_ndx: validator index to stop at (exclusive).
+    @return: the keys in index order.
+    """
+    prefix_sk = derive_path(derive_master_sk(mnemonic_to_seed(mnemonic)), VALIDATOR_KEY_PREFIX)
+    for index in range(min_ndx, max_ndx):
+        sk = derive_path(prefix_sk, (index, 0, 0))
+        yield ValidatorKey(index=index, secret_key=sk, pubkey=sk_to_pk(sk))
@@ -0,0 +1,132 @@
+"""EIP-2335 (version 4) keystores.
+
+The secret key is encrypted with AES-128-CTR under a key derived from the
+password with scrypt or pbkdf2. The KDF is what makes a keystore slow to
+write (and to unlock), so its parameters are configurable:
+    - DEFAULT_KDF: pbkdf2 with 262144 rounds, what eth2-val-tools writes.
+    - FAST_KDF: pbkdf2 with 2048 rounds, for throwaway testnets where the
+      keystores only have to be unlocked quickly by the clients.
+
+See: https://eips.ethereum.org/EIPS/eip-2335
+"""
+import hashlib
+import os
+import unicodedata
+import uuid
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from Crypto.Cipher import AES
+
+
+@dataclass(frozen=True)
+class KdfParams:
+    """The KDF used to derive the encryption key from the password."""
+
+    function: str  # pbkdf2 or scrypt
+    # pbkdf2
+    c: int = 262144
+    # scrypt
+    n: int = 262144
+    r: int = 8
+    p: int = 1
+
+    def derive(self, password: bytes, salt: bytes) -> bytes:
+        """Get the 32 byte decryption key."""
+        if self.function == "pbkdf2":
+            return hashlib.pbkdf2_hmac("sha256", password, salt, self.c, 32)
+        if self.function == "scrypt":
+            return hashlib.scrypt(
+                password,
+                salt=salt,
+                n=self.n,
+                r=self.r,
+                p=self.p,
+                maxmem=256 * self.n * self.r,
+                dklen=32,
+            )
+        raise ValueError(f"unsupported kdf: {self.function}")
+
+    def get_params(self, salt: bytes) -> dict[str, Any]:
+        if self.function == "pbkdf2":
+            return {"dklen": 32, "c": self.c, "prf": "hmac-sha256", "salt": salt.hex()}
+        return {"dklen": 32, "n": self.n, "r": self.r, "p": self.p, "salt": salt.hex()}
+
+
+DEFAULT_KDF = KdfParams("pbkdf2")
+FAST_KDF = KdfParams("pbkdf2", c=2048)
+
+
+def normalize_password(password: str) -> bytes:
+    """NFKD normalize and strip the control codes from a password."""
+    password = unicodedata.normalize("NFKD", password)
+    return "".join(
+        c for c in password if not (ord(c) < 0x20 or 0x7F <= ord(c) <= 0x9F)
+    ).encode()
+
+
+def encrypt_keystore(
+    secret_key: bytes,
+    pubkey: bytes,
+    path: str,
+    password: str,
+    kdf: KdfParams = DEFAULT_KDF,
+    salt: Optional[bytes] = None,
+    iv: Optional[bytes] = None,
+) -> dict[str, Any]:
+    """Get the keystore of a secret key.
+
+    @param secret_key: the 32 byte secret key.
+    @param pubkey: the 48 byte public key.
+    @param path: the EIP-2334 path of the key.
+    @param password: the password to encrypt it with.
+    @param kdf: the KDF to derive the encryption key with.
+    @param salt: the KDF salt, random if None.
+    @param iv: the cipher IV, random if None.
+    @return: the keystore json.
+    """
+    salt = os.urandom(32) if salt is None else salt
+    iv = os.urandom(16) if iv is None else iv
+    decryption_key = kdf.derive(normalize_password(password), salt)
+    cipher = AES.new(decryption_key[:16], AES.MODE_CTR, initial_value=iv, nonce=b"")
+    ciphertext = cipher.encrypt(secret_key)
+    checksum = hashlib.sha256(decryption_key[16:32] + ciphertext).digest()
+    return {
+        "crypto": {
+            "kdf": {"function": kdf.function, "params": kdf.get_params(salt), "message": ""},
+            "checksum": {"function": "sha256", "params": {}, "message": checksum.hex()},
+            "cipher": {
+                "function": "aes-128-ctr",
+                "params": {"iv": iv.hex()},
+                "message": ciphertext.hex(),
+            },
+        },
+        "description": "",
+        "pubkey": pubkey.hex(),
+        "path": path,
+        "uuid": str(uuid.uuid4()),
+        "version": 4,
+    }
+
+
+def decrypt_keystore(keystore: dict[str, Any], password: str) -> bytes:
+    """Get the secret key of a keystore.
+
+    @param keystore: the keystore json.
+    @param password: the password it was encrypted with.
+    @return: the 32 byte secret key.
+    """
+    crypto = keystore["crypto"]
+    params = crypto["kdf"]["params"]
+    if crypto["kdf"]["function"] == "pbkdf2":
+        kdf = KdfParams("pbkdf2", c=params["c"])
+    else:
+        kdf = KdfParams("scrypt", n=params["n"], r=params["r"], p=params["p"])
+    decryption_key = kdf.derive(normalize_password(password), bytes.fromhex(params["salt"]))
+    ciphertext = bytes.fromhex(crypto["cipher"]["message"])
+    checksum = hashlib.sha256(decryption_key[16:32] + ciphertext).digest()
+    if checksum.hex() != crypto["checksum"]["message"]:
+        raise ValueError("invalid keystore password")
+    iv = bytes.fromhex(crypto["cipher"]["params"]["iv"])
+    cipher = AES.new(decryption_key[:16], AES.MODE_CTR, initial_value=iv, nonce=b"")
+    return cipher.decrypt(ciphertext)
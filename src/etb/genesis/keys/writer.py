@@ -0,0 +1,118 @@
+"""Writes validator keystores laid out the way eth2-val-tools writes them.
+
+Only the layout of a single consensus client is written:
+    - keys/<pubkey>/voting-keystore.json and secrets/<pubkey> (lighthouse, grandine)
+    - keys/<pubkey>/voting-keystore.json and lodestar-secrets/<pubkey> (lodestar)
+    - teku-keys/<pubkey>.json and teku-secrets/<pubkey>.txt (teku)
+    - nimbus-keys/<pubkey>/keystore.json and secrets/<pubkey> (nimbus)
+every key is encrypted with its own random password. pubkey is the 0x
+prefixed hex of the public key.
+
+Deriving a key is cheap next to the KDF of its keystore, so a range of
+validators is split into chunks that are derived and encrypted in
+parallel. Each chunk only touches the files of its own keys.
+"""
+import json
+import pathlib
+import secrets
+from concurrent.futures import Executor, Future
+
+from .derivation import derive_validator_keys
+from .keystore import DEFAULT_KDF, KdfParams, encrypt_keystore
+
+# validators per task submitted to the executor.
+DEFAULT_CHUNK_SIZE = 16
+
+# client: (keystore dir, secrets dir) in the eth2-val-tools output.
+KEYSTORE_LAYOUTS: dict[str, tuple[str, str]] = {
+    "lighthouse": ("keys", "secrets"),
+    "grandine": ("keys", "secrets"),
+    "lodestar": ("keys", "lodestar-secrets"),
+    "teku": ("teku-keys", "teku-secrets"),
+    "nimbus": ("nimbus-keys", "secrets"),
+}
+
+
+def _write_keystore(out_path: pathlib.Path, client: str, pubkey: str, keystore: dict, password: str):
+    keys, secrets_dir = KEYSTORE_LAYOUTS[client]
+    if client == "teku":
+        keystore_file = out_path / keys / f"{pubkey}.json"
+        secret_file = out_path / secrets_dir / f"{pubkey}.txt"
+    else:
+        keystore_name = "keystore.json" if client == "nimbus" else "voting-keystore.json"
+        (out_path / keys / pubkey).mkdir()
+        keystore_file = out_path / keys / pubkey / keystore_name
+        secret_file = out_path / secrets_dir / pubkey
+    keystore_file.write_text(json.dumps(keystore))
+    secret_file.write_text(password)
+
+
+def write_keystore_range(
+    out_path: str,
+    client: str,
+    mnemonic: str,
+    min_ndx: int,
+    max_ndx: int,
+    kdf: KdfParams = DEFAULT_KDF,
+) -> list[str]:
+    """Derive and write the keystores of a range of validators, the layout
+    dirs must already exist.
+
+    @param out_path: where to write the layout.
+    @param client: the consensus client to lay the keystores out for.
+    @param mnemonic: the validator mnemonic.
+    @param min_ndx: first validator index.
+    @param max_ndx: validator index to stop at (exclusive).
+    @param kdf: the KDF of the keystores.
+    @return: the pubkeys written, in index order.
+    """
+    pubkeys = []
+    for key in derive_validator_keys(mnemonic, min_ndx, max_ndx):
+        password = secrets.token_hex(32)
+        keystore = encrypt_keystore(key.secret_key_bytes, key.pubkey, key.path, password, kdf)
+        pubkey = f"0x{key.pubkey.hex()}"
+        _write_keystore(pathlib.Path(out_path), client, pubkey, keystore, password)
+        pubkeys.append(pubkey)
+    return pubkeys
+
+
+def submit_keystores(
+    executor: Executor,
+    out_path: pathlib.Path,
+    client: str,
+    mnemonic: str,
+    min_ndx: int,
+    max_ndx: int,
+    kdf: KdfParams = DEFAULT_KDF,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> list[Future]:
+    """Create the layout dirs and submit the keystores of a range of
+    validators to an executor in chunks.
+
+    @param executor: the executor to derive and encrypt the keys on.
+    @param out_path: where to write the layout.
+    @param client: the consensus client to lay the keystores out for.
+    @param mnemonic: the validator mnemonic.
+    @param min_ndx: first validator index.
+    @param max_ndx: validator index to stop at (exclusive).
+    @param kdf: the KDF of the keystores.
+    @param chunk_size: validators per task.
+    @return: one future per chunk, resolving to its pubkeys.
+    """
+    if client not in KEYSTORE_LAYOUTS:
+        raise Exception(f"client: {client} not supported for native keystores")
+    for layout_dir in KEYSTORE_LAYOUTS[client]:
+        (out_path / layout_dir).mkdir(parents=True, exist_ok=True)
+    return [
+        executor.submit(
+            write_keystore_range,
+            str(out_path),
+            client,
+            mnemonic,
+            start,
+            min(start + chunk_size, max_ndx),
+            kdf,
+        )
+        for start in range(min_ndx, max_ndx, chunk_size)
+    ]
+
@@ -0,0 +1,187 @@
+"""A persistent cache of generated validator keystores.
+
+The keystores of an instance only depend on the mnemonic, the validator
+index range, the layout of its consensus client and the wallet password,
+so re-initialising the same experiment regenerates the same keys every
+time. The KeystoreCache keeps the final per-client layout of every
+generated range under /source/.etb-cache/keystores/ (outside /data, so it
+survives `make clean`), keyed by a hash of those inputs. On a hit the
+cached files are hardlinked into the node dir (copied if the cache is on
+another filesystem). Entries are evicted least recently used first once
+the cache grows past max_size.
+
+Entries are written to a temporary dir and renamed into place, so worker
+processes can fill the cache concurrently.
+"""
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import shutil
+import time
+from typing import Optional
+
+# 2 GiB
+DEFAULT_KEYSTORE_CACHE_MAX_SIZE = 2 * 1024 * 1024 * 1024
+
+# temporary entries older than this are left over from a crashed run.
+STALE_TMP_AGE = 3600
+
+
+def _link_or_copy(src: pathlib.Path, dst: pathlib.Path):
+    try:
+        os.link(src, dst)
+    except OSError:
+        # e.g. the cache and the node dir are on different filesystems.
+        shutil.copy2(src, dst)
+
+
+def _link_tree(src: pathlib.Path, dst: pathlib.Path) -> int:
+    """Recreate a file or dir tree at dst, hardlinking the files.
+
+    @return: the size of the files in bytes.
+    """
+    if src.is_file():
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        _link_or_copy(src, dst)
+        return src.stat().st_size
+    size = 0
+    for root, _, files in os.walk(src):
+        root_dst = dst / pathlib.Path(root).relative_to(src)
+        root_dst.mkdir(parents=True, exist_ok=True)
+        for file in files:
+            _link_or_copy(pathlib.Path(root) / file, root_dst / file)
+            size += (pathlib.Path(root) / file).stat().st_size
+    return size
+
+
+class KeystoreCache:
+    """Keystore layouts stored by key, each entry is:
+    <cache_dir>/<key>/data/  the files as they are laid out in the node dir.
+    <cache_dir>/<key>/size   the size of the files in bytes.
+    The mtime of <cache_dir>/<key> is its last use.
+    """
+
+    def __init__(self, cache_dir: pathlib.Path, max_size: int = DEFAULT_KEYSTORE_CACHE_MAX_SIZE):
+        """
+        @param cache_dir: where the entries are kept, created if needed.
+        @param max_size: bytes the cache is evicted down to.
+        """
+        self.cache_dir: pathlib.Path = cache_dir
+        self.max_size: int = max_size
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def get_key(
+        mnemonic: str,
+        min_ndx: int,
+        max_ndx: int,
+        layout: str,
+        password: Optional[str],
+        kdf: Optional[str] = None,
+    ) -> str:
+        """The key of the keystores of a range of validators, the mnemonic
+        and password are only stored hashed.
+
+        @param layout: the consensus client the keystores are laid out for.
+        @param kdf: the KDF the keystores were written with, None for
+            eth2-val-tools keystores.
+        """
+        fields = {
+            "mnemonic": hashlib.sha256(mnemonic.encode()).hexdigest(),
+            "min_ndx": min_ndx,
+            "max_ndx": max_ndx,
+            "layout": layout,
+            "password": hashlib.sha256((password or "").encode()).hexdigest(),
+        }
+        if kdf is not None:
+            fields["kdf"] = kdf
+        return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+
+    def get(self, key: str, dst: pathlib.Path) -> bool:
+        """Lay out a cached entry in dst.
+
+        @param key: the entry.
+        @param dst: the node dir to link the files into.
+        @return: True on a hit, False if the entry is not (or no longer) cached.
+        """
+        entry = self.cache_dir / key
+        data = entry / "data"
+        if not data.is_dir():
+            return False
+        linked = []
+        try:
+            os.utime(entry)
+            for item in data.iterdir():
+                linked.append(dst / item.name)
+                _link_tree(item, dst / item.name)
+        except OSError as e:
+            # evicted while we were linking it, undo so it can be generated.
+            logging.warning(f"failed to use keystore cache entry {key}: {e}")
+            for path in linked:
+                if path.is_dir():
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    path.unlink(missing_ok=True)
+            return False
+        return True
+
+    def put(self, key: str, src: pathlib.Path, names: list[str]):
+        """Cache the keystores laid out in a node dir.
+
+        @param key: the entry.
+        @param src: the node dir.
+        @param names: the files and dirs in src that make up the keystores.
+        """
+        entry = self.cache_dir / key
+        if entry.exists():
+            return
+        tmp = self.cache_dir / f".tmp-{key}-{os.getpid()}"
+        try:
+            size = 0
+            for name in names:
+                size += _link_tree(src / name, tmp / "data" / name)
+            (tmp / "size").write_text(str(size))
+            tmp.rename(entry)
+        except OSError as e:
+            # another worker cached it first, or the cache is not writable.
+            logging.debug(f"did not cache keystores {key}: {e}")
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def get_entries(self) -> list[tuple[pathlib.Path, float, int]]:
+        """Get the entries, least recently used first.
+
+        @return: [(entry, last used, size)]
+        """
+        entries = []
+        for entry in self.cache_dir.iterdir():
+            if entry.name.startswith("."):
+                continue
+            try:
+                size = int((entry / "size").read_text())
+                entries.append((entry, entry.stat().st_mtime, size))
+            except (OSError, ValueError):
+                # incomplete entry, treat it as the oldest.
+                entries.append((entry, 0, 0))
+        return sorted(entries, key=lambda e: e[1])
+
+    def evict(self) -> int:
+        """Remove the least recently used entries until the cache is under
+        max_size, and temporary entries left over by crashed runs.
+
+        @return: the number of entries removed.
+        """
+        for tmp in self.cache_dir.glob(".tmp-*"):
+            if time.time() - tmp.stat().st_mtime > STALE_TMP_AGE:
+                shutil.rmtree(tmp, ignore_errors=True)
+        entries = self.get_entries()
+        total = sum(size for _, _, size in entries)
+        num_evicted = 0
+        for entry, _, size in entries:
+            if total <= self.max_size:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            num_evicted += 1
+        return num_evicted
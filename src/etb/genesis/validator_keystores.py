@@ -0,0 +1,253 @@
+"""Writes the validator keystores of every client instance.
+
+Keystores are derived and encrypted in-process by etb.genesis.keys, which
+writes the layout of the instance's consensus client into its
+node_dir/keystores/ the same way eth2-val-tools does. The KDF of the
+keystores dominates, so the validators of every instance are split into
+chunks that run concurrently on a process pool sized to the host's cores.
+Prysm wallets are still generated by eth2-val-tools (one process per
+instance on the same pool), as is every instance when native keystores are
+disabled. Work is described with primitives only (KeystoreJob, KdfParams)
+so it can be sent to a worker process. The layout the instance's consensus
+client expects is then moved (renamed, not copied) into the node_dir and
+the rest is dropped.
+
+Generated layouts are kept in a KeystoreCache, so re-initialising the same
+experiment links the keystores into place instead of generating them.
+"""
+import logging
+import os
+import pathlib
+import shutil
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Union
+
+from ..config.etb_config import ETBConfig
+from ..interfaces.external.eth2_val_tools import Eth2ValTools
+from .keys.keystore import DEFAULT_KDF, KdfParams
+from .keys.writer import KEYSTORE_LAYOUTS, submit_keystores
+from .keystore_cache import KeystoreCache
+
+SUPPORTED_CLIENTS = ["prysm", "lighthouse", "teku", "nimbus", "lodestar", "grandine"]
+
+
+@dataclass(frozen=True)
+class KeystoreJob:
+    """The keystores of a single client instance."""
+
+    name: str
+    client: str
+    node_dir: str
+    min_ndx: int
+    max_ndx: int
+    mnemonic: str
+    password: Optional[str] = None
+    # None to generate the keystores with eth2-val-tools.
+    kdf: Optional[KdfParams] = None
+
+    def get_cache_key(self) -> str:
+        return KeystoreCache.get_key(
+            self.mnemonic,
+            self.min_ndx,
+            self.max_ndx,
+            self.client,
+            self.password,
+            kdf=None if self.kdf is None else repr(self.kdf),
+        )
+
+
+def get_keystore_jobs(
+    etb_config: ETBConfig, kdf: Optional[KdfParams] = DEFAULT_KDF
+) -> list[KeystoreJob]:
+    """Get the keystores to generate for every client instance.
+
+    @param etb_config: ETBConfig
+    @param kdf: the KDF of the native keystores, None to use eth2-val-tools
+        for every instance.
+    @return: one job per client instance.
+    """
+    mnemonic = etb_config.testnet_config.consensus_layer.validator_mnemonic
+    jobs = []
+    for client_instance in etb_config.get_client_instances():
+        cl_client = client_instance.consensus_config.client
+        if cl_client not in SUPPORTED_CLIENTS:
+            raise Exception(f"client: {cl_client} not supported for keystores")
+        vpn = client_instance.consensus_config.num_validators  # validators per node
+        offset = client_instance.ndx * vpn
+        min_ndx = client_instance.collection_config.validator_offset_start + offset
+        jobs.append(
+            KeystoreJob(
+                name=client_instance.name,
+                client=cl_client,
+                node_dir=str(client_instance.node_dir),
+                min_ndx=min_ndx,
+                max_ndx=min_ndx + vpn,
+                mnemonic=mnemonic,
+                password=client_instance.validator_password,
+                kdf=None if cl_client == "prysm" else kdf,
+            )
+        )
+    return jobs
+
+
+def _move_into_place(job: KeystoreJob, keystore_dir: pathlib.Path) -> list[str]:
+    """Move the layout the client expects from the eth2-val-tools output
+    into the node dir.
+
+    @return: the names of the files and dirs written to the node dir.
+    """
+    node_dir = pathlib.Path(job.node_dir)
+    if job.client == "prysm":
+        names = []
+        for item in (keystore_dir / "prysm").iterdir():
+            item.rename(node_dir / item.name)
+            names.append(item.name)
+        # prysm requires a wallet-password.txt to launch.
+        with open(node_dir / "wallet-password.txt", "w") as wallet_password_file:
+            wallet_password_file.write(job.password)
+        return names + ["wallet-password.txt"]
+
+    keys, secrets = KEYSTORE_LAYOUTS[job.client]
+    keystore_src = keystore_dir / keys
+    secret_src = keystore_dir / secrets
+    keystore_dst = node_dir / "keys"
+    secret_dst = node_dir / "secrets"
+    if job.client == "grandine":
+        # flat files: keys/<pubkey>.json and secrets/<pubkey>.txt
+        keystore_dst.mkdir()
+        for key in os.listdir(keystore_src):
+            (keystore_src / key / "voting-keystore.json").rename(keystore_dst / f"{key}.json")
+        secret_dst.mkdir()
+        for secret in os.listdir(secret_src):
+            (secret_src / secret).rename(secret_dst / f"{secret}.txt")
+        return ["keys", "secrets"]
+
+    keystore_src.rename(keystore_dst)
+    secret_src.rename(secret_dst)
+    if job.client == "lodestar":
+        # go ahead and create the validatordb dir for lodestar
+        (node_dir / "validatordb").mkdir()
+        return ["keys", "secrets", "validatordb"]
+    return ["keys", "secrets"]
+
+
+def generate_keystores(job: KeystoreJob) -> Optional[Exception]:
+    """Generate the keystores of a client instance into
+    node_dir/keystores/ with eth2-val-tools. Runs in a worker process.
+
+    @param job: the keystores to generate.
+    @return: exception on failure.
+    """
+    keystore_dir = pathlib.Path(job.node_dir) / "keystores"
+    out = Eth2ValTools().generate_keystores(
+        out_path=keystore_dir,
+        min_ndx=job.min_ndx,
+        max_ndx=job.max_ndx,
+        mnemonic=job.mnemonic,
+        prysm=job.client == "prysm",
+        prysm_password=job.password,
+    )
+    if isinstance(out, Exception):
+        # eth2-val-tools may report progress on stderr, only fail if
+        # nothing was written.
+        logging.debug(f"eth2-val-tools for {job.name}: {out}")
+        if not keystore_dir.exists():
+            return out
+    return None
+
+
+def _submit_job(executor: ProcessPoolExecutor, job: KeystoreJob) -> list[Future]:
+    if job.kdf is None:
+        return [executor.submit(generate_keystores, job)]
+    return submit_keystores(
+        executor,
+        pathlib.Path(job.node_dir) / "keystores",
+        job.client,
+        job.mnemonic,
+        job.min_ndx,
+        job.max_ndx,
+        job.kdf,
+    )
+
+
+def _finish_job(job: KeystoreJob, futures: list[Future], cache: Optional[KeystoreCache]):
+    """Wait for the keystores of a job, then move them into place and cache
+    them."""
+    for future in futures:
+        error = future.exception()
+        if error is None and job.kdf is None:
+            error = future.result()
+        if error is not None:
+            raise error
+    node_dir = pathlib.Path(job.node_dir)
+    keystore_dir = node_dir / "keystores"
+    names = _move_into_place(job, keystore_dir)
+    # finished, remove the layouts the client does not use.
+    shutil.rmtree(keystore_dir)
+    if cache is not None:
+        cache.put(job.get_cache_key(), node_dir, names)
+
+
+def write_validator_keystores(
+    etb_config: ETBConfig,
+    max_workers: Optional[int] = None,
+    use_cache: bool = True,
+    kdf: Optional[KdfParams] = DEFAULT_KDF,
+):
+    """Populates the validator keystores for all the clients, the instances
+    are generated concurrently.
+
+    @param etb_config: ETBConfig
+    @param max_workers: number of worker processes, defaults to the number of cores.
+    @param use_cache: link keystores from (and add them to) the keystore cache.
+    @param kdf: the KDF of the keystores, None to generate them all with
+        eth2-val-tools.
+    """
+    jobs = get_keystore_jobs(etb_config, kdf)
+    if len(jobs) == 0:
+        return
+    logging.debug(f"using mnemonic:\n\t{jobs[0].mnemonic}")
+    start = time.monotonic()
+    cache = None
+    if use_cache:
+        cache = KeystoreCache(etb_config.files.etb_cache_dir / "keystores")
+
+    pending = []
+    for job in jobs:
+        if cache is not None and cache.get(job.get_cache_key(), pathlib.Path(job.node_dir)):
+            logging.info(
+                f"linked cached keystores {job.min_ndx}-{job.max_ndx} for {job.name} ({job.client})"
+            )
+        else:
+            pending.append(job)
+
+    failed = []
+    if len(pending) > 0:
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        logging.info(f"generating keystores for {len(pending)} instances with {max_workers} workers")
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            submitted = [(job, _submit_job(executor, job)) for job in pending]
+            for job, futures in submitted:
+                try:
+                    _finish_job(job, futures, cache)
+                except Exception as e:
+                    logging.error(f"failed to write keystores for {job.name}: {e}")
+                    failed.append(job.name)
+                    continue
+                logging.info(
+                    f"wrote keystores {job.min_ndx}-{job.max_ndx} for {job.name} ({job.client}) "
+                    f"after {time.monotonic() - start:.2f}s"
+                )
+    if len(failed) > 0:
+        raise Exception(f"failed to write keystores for: {failed}")
+    logging.info(
+        f"wrote all keystores in {time.monotonic() - start:.2f}s "
+        f"({len(jobs) - len(pending)}/{len(jobs)} from the cache)"
+    )
+    if cache is not None:
+        num_evicted = cache.evict()
+        if num_evicted > 0:
+            logging.info(f"evicted {num_evicted} keystore cache entries")
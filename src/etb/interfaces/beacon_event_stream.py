@@ -0,0 +1,202 @@
+"""Streaming interface to the beacon API event stream (/eth/v1/events).
+
+Instead of polling every node once per slot, a BeaconEventStream holds
+one server-sent-events connection per consensus client and publishes the
+parsed events to any number of subscribers as they arrive.
+"""
+import json
+import logging
+import threading
+import time
+from enum import Enum
+from typing import Callable, Iterator, Optional
+
+import requests
+
+from ..common.json_decoder import json_loads
+from ..config.etb_config import ClientInstance
+
+
+class BeaconEventTopic(str, Enum):
+    Head = "head"
+    Block = "block"
+    FinalizedCheckpoint = "finalized_checkpoint"
+    ChainReorg = "chain_reorg"
+    BlobSidecar = "blob_sidecar"
+
+
+DEFAULT_BEACON_EVENT_TOPICS: list[BeaconEventTopic] = [
+    BeaconEventTopic.Head,
+    BeaconEventTopic.Block,
+    BeaconEventTopic.FinalizedCheckpoint,
+    BeaconEventTopic.ChainReorg,
+    BeaconEventTopic.BlobSidecar,
+]
+
+
+class BeaconEvent:
+    """A single event received from a client's event stream."""
+
+    def __init__(self, instance: ClientInstance, topic: str, data: dict):
+        self.instance: ClientInstance = instance
+        self.topic: str = topic
+        self.data: dict = data
+        self.received_at: float = time.time()
+
+    def __repr__(self):
+        return f"BeaconEvent({self.instance.name}, {self.topic}, {self.data})"
+
+
+BeaconEventCallback = Callable[[BeaconEvent], None]
+
+
+class BeaconEventStream:
+    """Subscribes to /eth/v1/events on every consensus client.
+
+    Each client gets a dedicated long-lived connection (and thread) which
+    reconnects with exponential backoff whenever the stream drops.
+    Subscribers are called from the stream threads so they should not
+    block for long.
+    """
+
+    def __init__(
+        self,
+        instances: list[ClientInstance],
+        topics: Optional[list[BeaconEventTopic]] = None,
+        read_timeout: int = 60,
+        reconnect_backoff: int = 1,
+        max_reconnect_backoff: int = 30,
+    ):
+        """
+        @param instances: the client instances to stream events from.
+        @param topics: the topics to subscribe to (default: all supported).
+        @param read_timeout: reconnect if no data arrives for this long.
+        @param reconnect_backoff: initial seconds to wait before reconnecting.
+        @param max_reconnect_backoff: cap on the reconnect backoff.
+        """
+        self.instances: list[ClientInstance] = instances
+        self.topics: list[BeaconEventTopic] = (
+            topics if topics is not None else DEFAULT_BEACON_EVENT_TOPICS
+        )
+        self.read_timeout: int = read_timeout
+        self.reconnect_backoff: int = reconnect_backoff
+        self.max_reconnect_backoff: int = max_reconnect_backoff
+
+        self._subscribers: list[tuple[BeaconEventCallback, Optional[set[str]]]] = []
+        self._subscribers_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._threads: list[threading.Thread] = []
+        # instance name -> number of times we (re)connected.
+        self.num_connections: dict[str, int] = {}
+
+    def subscribe(
+        self,
+        callback: BeaconEventCallback,
+        topics: Optional[list[BeaconEventTopic]] = None,
+    ):
+        """Register a callback for events.
+
+        @param callback: called with every matching BeaconEvent.
+        @param topics: only deliver these topics (default: all).
+        """
+        topic_filter = None if topics is None else {topic.value for topic in topics}
+        with self._subscribers_lock:
+            self._subscribers.append((callback, topic_filter))
+
+    def unsubscribe(self, callback: BeaconEventCallback):
+        with self._subscribers_lock:
+            self._subscribers = [
+                (cb, topics) for cb, topics in self._subscribers if cb != callback
+            ]
+
+    def start(self):
+        """Open a stream to every client."""
+        self._stop_event.clear()
+        for instance in self.instances:
+            thread = threading.Thread(
+                target=self._stream_events,
+                args=(instance,),
+                name=f"beacon-events-{instance.name}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Stop streaming, connections are closed the next time they yield."""
+        self._stop_event.set()
+        self._threads = []
+
+    def get_events_url(self, instance: ClientInstance) -> str:
+        topics = ",".join(topic.value for topic in self.topics)
+        return f"{instance.get_consensus_beacon_api_path()}/eth/v1/events?topics={topics}"
+
+    def _stream_events(self, instance: ClientInstance):
+        """Keep a stream open to the instance until stopped."""
+        url = self.get_events_url(instance)
+        backoff = self.reconnect_backoff
+        session = requests.Session()
+        while not self._stop_event.is_set():
+            try:
+                with session.get(
+                    url,
+                    headers={"Accept": "text/event-stream"},
+                    stream=True,
+                    timeout=(5, self.read_timeout),
+                ) as response:
+                    response.raise_for_status()
+                    self.num_connections[instance.name] = (
+                        self.num_connections.get(instance.name, 0) + 1
+                    )
+                    logging.debug(f"connected to event stream {url}")
+                    backoff = self.reconnect_backoff
+                    for topic, data in self._read_events(response):
+                        if self._stop_event.is_set():
+                            break
+                        self._publish(BeaconEvent(instance, topic, data))
+            except Exception as e:
+                logging.debug(f"event stream {url} dropped: {e}")
+
+            if self._stop_event.wait(backoff):
+                break
+            backoff = min(backoff * 2, self.max_reconnect_backoff)
+        session.close()
+
+    @staticmethod
+    def _read_events(response: requests.Response) -> Iterator[tuple[str, dict]]:
+        """Parse a server-sent-events stream into (topic, data) tuples.
+
+        @param response: the streaming response.
+        @return: iterator of parsed events.
+        """
+        topic: Optional[str] = None
+        data_lines: list[str] = []
+        for line in response.iter_lines(decode_unicode=True):
+            if line is None:
+                continue
+            if line == "":
+                # a blank line dispatches the event.
+                if topic is not None and len(data_lines) > 0:
+                    try:
+                        yield topic, json_loads("\n".join(data_lines))
+                    except json.JSONDecodeError as e:
+                        logging.debug(f"invalid event data for {topic}: {e}")
+                topic = None
+                data_lines = []
+            elif line.startswith(":"):
+                continue  # comment / keep-alive
+            elif line.startswith("event:"):
+                topic = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data_lines.append(line[len("data:"):].strip())
+
+    def _publish(self, event: BeaconEvent):
+        with self._subscribers_lock:
+            subscribers = list(self._subscribers)
+        for callback, topics in subscribers:
+            if topics is not None and event.topic not in topics:
+                continue
+            try:
+                callback(event)
+            except Exception as e:
+                logging.error(f"beacon event subscriber failed on {event}: {e}")
@@ -0,0 +1,277 @@
+"""Per client instance health tracking for the request layer.
+
+Every request records its latency (or failure) against the instance it was
+sent to. This gives us:
+    - latency percentiles per instance, and per request class (a JSON-RPC
+      method or beacon API endpoint) on the instance.
+    - an adaptive timeout derived from the p99 latency observed for the
+      request class, so a healthy node is not given the full (fixed)
+      timeout on every attempt. Heavy requests (states, full blocks) are
+      never capped by the latencies of cheap ones.
+    - a circuit breaker: after failure_threshold consecutive connection
+      failures/timeouts the circuit opens and requests to the instance fail
+      fast with CircuitOpenError. Once the (jittered, exponentially growing)
+      probe interval elapses a single request is let through to probe the
+      instance, closing the circuit again on success.
+    - a cumulative latency histogram per instance, for the metrics exporter.
+    - whether the instance accepts JSON-RPC batches, learned once per run.
+"""
+import bisect
+import random
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import Optional
+
+import requests
+
+from ..config.etb_config import ClientInstance
+
+# upper bounds (seconds) of the latency histogram buckets.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class CircuitOpenError(Exception):
+    """The circuit for the instance is open, the request was not sent."""
+
+
+class CircuitState(str, Enum):
+    Closed = "closed"
+    Open = "open"
+    HalfOpen = "half-open"
+
+
+def is_connection_failure(e: Exception) -> bool:
+    """Failures that indicate the node is down (as opposed to an error
+    response from a live node)."""
+    return isinstance(
+        e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+    )
+
+
+class ClientInstanceHealth:
+    """Latency samples and circuit breaker state for a single instance."""
+
+    def __init__(
+        self,
+        num_samples: int = 256,
+        min_samples: int = 20,
+        failure_threshold: int = 3,
+        probe_interval: float = 2.0,
+        max_probe_interval: float = 60.0,
+    ):
+        """
+        @param num_samples: number of latency samples kept.
+        @param min_samples: samples required before adapting the timeout.
+        @param failure_threshold: consecutive failures before opening the circuit.
+        @param probe_interval: initial seconds before probing an open circuit.
+        @param max_probe_interval: cap on the probe interval.
+        """
+        self.num_samples: int = num_samples
+        self.latencies: deque[float] = deque(maxlen=num_samples)
+        # request class -> latency samples of that class.
+        self.request_latencies: dict[str, deque[float]] = {}
+        self.min_samples: int = min_samples
+        self.failure_threshold: int = failure_threshold
+        self.probe_interval: float = probe_interval
+        self.max_probe_interval: float = max_probe_interval
+
+        self.state: CircuitState = CircuitState.Closed
+        self.consecutive_failures: int = 0
+        self.num_times_opened: int = 0
+        self.num_fast_failed: int = 0
+        self.num_hedged: int = 0
+        # the instance refused a JSON-RPC batch, send the calls one by one.
+        self.batch_unsupported: bool = False
+        # latencies per bucket of LATENCY_BUCKETS, the last one is +Inf.
+        self.latency_buckets: list[int] = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum: float = 0
+        self._next_probe_interval: float = probe_interval
+        self._open_until: float = 0
+        self._lock = threading.Lock()
+
+    def get_latency_percentile(
+        self, percentile: float, request_class: Optional[str] = None
+    ) -> Optional[float]:
+        """Get a latency percentile in seconds.
+
+        @param percentile: 0-100
+        @param request_class: only the samples of this request class, None
+            for every sample of the instance.
+        @return: the latency, None if we don't have enough samples.
+        """
+        with self._lock:
+            if request_class is None:
+                latencies = self.latencies
+            else:
+                latencies = self.request_latencies.get(request_class, ())
+            if len(latencies) < self.min_samples:
+                return None
+            samples = sorted(latencies)
+        index = min(int(len(samples) * percentile / 100), len(samples) - 1)
+        return samples[index]
+
+    def get_latency_histogram(self) -> tuple[list[tuple[float, int]], float, int]:
+        """Get the latencies of every recorded success (not only the kept
+        samples) as a cumulative histogram.
+
+        @return: ([(upper bound, count <= bound)], sum, count), the last
+            bound is +Inf.
+        """
+        with self._lock:
+            buckets = list(self.latency_buckets)
+            total = self.latency_sum
+        cumulative = []
+        count = 0
+        for bound, bucket in zip(LATENCY_BUCKETS + (float("inf"),), buckets):
+            count += bucket
+            cumulative.append((bound, count))
+        return cumulative, total, count
+
+    def get_adaptive_timeout(
+        self,
+        timeout: float,
+        request_class: str,
+        min_timeout: float = 0.5,
+        multiplier: float = 3.0,
+    ) -> float:
+        """A timeout derived from the p99 latency observed for the request
+        class, never more than the configured timeout.
+
+        @param timeout: the configured timeout.
+        @param request_class: the class of the request to time.
+        @param min_timeout: never go below this.
+        @param multiplier: headroom over p99.
+        @return: the timeout to use for the next attempt.
+        """
+        p99 = self.get_latency_percentile(99, request_class)
+        if p99 is None:
+            return timeout
+        return min(timeout, max(min_timeout, p99 * multiplier))
+
+    def allow_request(self) -> bool:
+        """Check if a request may be sent, moves an open circuit to half-open
+        once the probe interval elapsed (letting exactly one probe through).
+        """
+        with self._lock:
+            if self.state == CircuitState.Closed:
+                return True
+            if self.state == CircuitState.Open and time.monotonic() >= self._open_until:
+                self.state = CircuitState.HalfOpen
+                return True
+            self.num_fast_failed += 1
+            return False
+
+    def record_success(self, latency: float, request_class: Optional[str] = None):
+        with self._lock:
+            self.latencies.append(latency)
+            if request_class is not None:
+                if request_class not in self.request_latencies:
+                    self.request_latencies[request_class] = deque(maxlen=self.num_samples)
+                self.request_latencies[request_class].append(latency)
+            self.latency_buckets[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+            self.latency_sum += latency
+            self.consecutive_failures = 0
+            self.state = CircuitState.Closed
+            self._next_probe_interval = self.probe_interval
+
+    def record_hedge(self):
+        with self._lock:
+            self.num_hedged += 1
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if (
+                self.state == CircuitState.HalfOpen
+                or self.consecutive_failures >= self.failure_threshold
+            ):
+                if self.state != CircuitState.Open:
+                    self.num_times_opened += 1
+                self.state = CircuitState.Open
+                # jitter so probes to many dead nodes don't line up.
+                interval = self._next_probe_interval * random.uniform(0.5, 1.5)
+                self._open_until = time.monotonic() + interval
+                self._next_probe_interval = min(
+                    self._next_probe_interval * 2, self.max_probe_interval
+                )
+
+    def is_circuit_open(self) -> bool:
+        return self.state != CircuitState.Closed
+
+    def get_stats(self) -> dict:
+        return {
+            "state": self.state.value,
+            "p50": self.get_latency_percentile(50),
+            "p99": self.get_latency_percentile(99),
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.num_times_opened,
+            "fast_failed": self.num_fast_failed,
+            "hedged": self.num_hedged,
+            "batch_unsupported": self.batch_unsupported,
+        }
+
+
+class ClientHealthTracker:
+    """Keeps one ClientInstanceHealth per client instance."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        probe_interval: float = 2.0,
+        max_probe_interval: float = 60.0,
+        adaptive_timeouts: bool = True,
+        hedge_requests: bool = True,
+    ):
+        """
+        @param failure_threshold: consecutive failures before opening the circuit.
+        @param probe_interval: initial seconds before probing an open circuit.
+        @param max_probe_interval: cap on the probe interval.
+        @param adaptive_timeouts: derive timeouts from the observed latencies.
+        @param hedge_requests: hedge idempotent requests after the p95 latency.
+        """
+        self.failure_threshold: int = failure_threshold
+        self.probe_interval: float = probe_interval
+        self.max_probe_interval: float = max_probe_interval
+        self.adaptive_timeouts: bool = adaptive_timeouts
+        self.hedge_requests: bool = hedge_requests
+        self.instances: dict[str, ClientInstanceHealth] = {}
+        self._lock = threading.Lock()
+
+    def get(self, instance: ClientInstance) -> ClientInstanceHealth:
+        with self._lock:
+            if instance.name not in self.instances:
+                self.instances[instance.name] = ClientInstanceHealth(
+                    failure_threshold=self.failure_threshold,
+                    probe_interval=self.probe_interval,
+                    max_probe_interval=self.max_probe_interval,
+                )
+            return self.instances[instance.name]
+
+    def get_timeout(
+        self, instance: ClientInstance, timeout: float, request_class: str
+    ) -> float:
+        if not self.adaptive_timeouts:
+            return timeout
+        return self.get(instance).get_adaptive_timeout(timeout, request_class)
+
+    def get_circuit_open_instances(self) -> list[str]:
+        with self._lock:
+            return [
+                name
+                for name, health in self.instances.items()
+                if health.is_circuit_open()
+            ]
+
+    def get_instances(self) -> dict[str, ClientInstanceHealth]:
+        with self._lock:
+            return dict(self.instances)
+
+    def get_stats(self) -> dict[str, dict]:
+        instances = self.get_instances()
+        return {name: health.get_stats() for name, health in instances.items()}
+
+    def reset(self):
+        with self._lock:
+            self.instances = {}
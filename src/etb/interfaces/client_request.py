@@ -1,16 +1,40 @@
 """Interfaces for sending and receiving requests and responses from CL and EL
 clients across the network."""
 
+import asyncio
 import logging
+import pathlib
+import threading
 import time
 from abc import abstractmethod
-from concurrent.futures import ThreadPoolExecutor, Future
+from concurrent.futures import Future
+from dataclasses import dataclass
 from enum import Enum
-from typing import Union, Tuple
+from typing import Any, Optional, Union, Tuple
 
 import requests
-from requests import HTTPError
-
+from requests.adapters import HTTPAdapter
+
+from .client_health import (
+    CircuitOpenError,
+    ClientHealthTracker,
+    is_connection_failure,
+)
+from .immutable_cache import (
+    DEFAULT_MAX_DISK_SIZE_BYTES,
+    ImmutableObjectCache,
+    get_immutable_body,
+    is_block_root,
+)
+from .request_coalescing import RequestCoalescer
+from .request_engine import get_request_engine
+from ..common.json_decoder import json_loads
+from ..common.ssz import (
+    SSZ_CONTENT_TYPE,
+    BeaconBlockView,
+    BeaconStateView,
+    JSONBeaconBlockView,
+)
 from ..config.etb_config import ClientInstance
 
 
@@ -28,31 +52,528 @@ class ErrorResponse(Exception):
     """Some clients return 200 status code despite an error."""
 
 
+_NOT_DECODED = object()
+
+
+class ClientResponse(requests.Response):
+    """A requests.Response that decodes its JSON body only once.
+
+    Every accessor on a request calls response.json(), so the decoded body
+    is cached on the response and shared between them. It is decoded with
+    the configured fast decoder (see etb.common.json_decoder). Callers must
+    not mutate the returned object.
+    """
+
+    _decoded_json: Any = _NOT_DECODED
+    # set on responses served from the immutable object cache.
+    from_cache: bool = False
+
+    def json(self, **kwargs) -> Any:
+        if len(kwargs) > 0:
+            return super().json(**kwargs)
+        if self._decoded_json is _NOT_DECODED:
+            self._decoded_json = json_loads(self.content)
+        return self._decoded_json
+
+
+def as_client_response(response: requests.Response) -> ClientResponse:
+    """Turn a requests.Response into a parse-once ClientResponse in place."""
+    response.__class__ = ClientResponse
+    return response
+
+
+class ClientInstanceSession:
+    """A keep-alive http session used for all requests to a single client
+    instance.
+
+    Connections are pooled so consecutive requests to the same node reuse
+    the same TCP connection instead of paying for a new handshake.
+    """
+
+    def __init__(self, pool_size: int):
+        self.session = requests.Session()
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+        self.last_used: float = time.monotonic()
+        self.num_requests: int = 0
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        self.last_used = time.monotonic()
+        self.num_requests += 1
+        return as_client_response(self.session.get(url, **kwargs))
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        self.last_used = time.monotonic()
+        self.num_requests += 1
+        return as_client_response(self.session.post(url, **kwargs))
+
+    def get_num_connections(self) -> int:
+        """The number of TCP connections opened by this session.
+
+        @return: number of new connections made.
+        """
+        pools = self.adapter.poolmanager.pools
+        return sum(pools[key].num_connections for key in pools.keys())
+
+    def close(self):
+        self.session.close()
+
+
+class ClientInstanceSessionPool:
+    """Keeps one ClientInstanceSession per client instance.
+
+    Sessions that have not been used for idle_timeout seconds are closed
+    and evicted, they are recreated the next time the instance is queried.
+    """
+
+    def __init__(self, pool_size: int = 4, idle_timeout: int = 60):
+        """
+        @param pool_size: max number of keep-alive connections per instance.
+        @param idle_timeout: seconds a session may be idle before eviction.
+        """
+        self.pool_size: int = pool_size
+        self.idle_timeout: int = idle_timeout
+        self.sessions: dict[str, ClientInstanceSession] = {}
+        self.num_evicted: int = 0
+        self._last_eviction: float = time.monotonic()
+        self._lock = threading.Lock()
+
+    def get_session(self, instance: ClientInstance) -> ClientInstanceSession:
+        """Get the session for the instance, creating it if needed.
+
+        @param instance: the client instance to get a session for.
+        @return: the session.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_eviction > self.idle_timeout:
+                self._evict_idle_sessions(now)
+            if instance.name not in self.sessions:
+                self.sessions[instance.name] = ClientInstanceSession(self.pool_size)
+            return self.sessions[instance.name]
+
+    def _evict_idle_sessions(self, now: float):
+        for name in list(self.sessions.keys()):
+            if now - self.sessions[name].last_used > self.idle_timeout:
+                logging.debug(f"evicting idle session for {name}")
+                self.sessions.pop(name).close()
+                self.num_evicted += 1
+        self._last_eviction = now
+
+    def get_stats(self) -> dict[str, dict[str, int]]:
+        """Connection reuse counters for every instance with a live session.
+
+        @return: {instance_name: {requests, connections, reused}}
+        """
+        with self._lock:
+            stats = {}
+            for name, session in self.sessions.items():
+                num_connections = session.get_num_connections()
+                stats[name] = {
+                    "requests": session.num_requests,
+                    "connections": num_connections,
+                    "reused": max(session.num_requests - num_connections, 0),
+                }
+            return stats
+
+    def close(self):
+        with self._lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions = {}
+
+
+# shared by every ClientInstanceRequest.
+client_session_pool = ClientInstanceSessionPool()
+
+
+def configure_client_session_pool(pool_size: int, idle_timeout: int):
+    """Reconfigure the shared session pool, existing sessions are closed.
+
+    @param pool_size: max number of keep-alive connections per instance.
+    @param idle_timeout: seconds a session may be idle before eviction.
+    """
+    client_session_pool.close()
+    client_session_pool.pool_size = pool_size
+    client_session_pool.idle_timeout = idle_timeout
+
+
+# shared by every BeaconAPIRequest for an immutable object.
+immutable_object_cache = ImmutableObjectCache()
+
+
+def configure_immutable_object_cache(
+    max_size_bytes: int,
+    persist_dir: Optional[pathlib.Path] = None,
+    max_disk_size_bytes: int = DEFAULT_MAX_DISK_SIZE_BYTES,
+):
+    """Reconfigure the shared immutable object cache, existing entries are dropped.
+
+    @param max_size_bytes: max size of the cached bodies held in memory.
+    @param persist_dir: optional directory to persist entries to.
+    @param max_disk_size_bytes: max size of the persisted entries.
+    """
+    immutable_object_cache.clear()
+    immutable_object_cache.max_size_bytes = max_size_bytes
+    immutable_object_cache.persist_dir = persist_dir
+    immutable_object_cache.max_disk_size_bytes = max_disk_size_bytes
+    if persist_dir is not None:
+        persist_dir.mkdir(parents=True, exist_ok=True)
+
+
+def build_cached_response(url: str, content_type: str, body: bytes) -> ClientResponse:
+    """Build a synthetic response for an object served from the cache."""
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response.headers["Content-Type"] = content_type
+    response._content = body
+    response = as_client_response(response)
+    response.from_cache = True
+    return response
+
+
+# shared by every ClientInstanceRequest.
+request_coalescer = RequestCoalescer()
+
+
+def configure_request_coalescing(memo_ttl: float):
+    """Set how long identical requests are served from the memo.
+
+    @param memo_ttl: seconds, 0 disables the memo (in flight requests
+    are always coalesced).
+    """
+    request_coalescer.clear_memo()
+    request_coalescer.memo_ttl = memo_ttl
+
+
+# shared by every ClientInstanceRequest.
+client_health_tracker = ClientHealthTracker()
+
+
+def configure_client_health_tracker(
+    failure_threshold: int,
+    probe_interval: float,
+    max_probe_interval: float,
+    adaptive_timeouts: bool = True,
+    hedge_requests: bool = True,
+):
+    """Reconfigure the shared health tracker, existing state is dropped.
+
+    @param failure_threshold: consecutive failures before opening a circuit.
+    @param probe_interval: initial seconds before probing an open circuit.
+    @param max_probe_interval: cap on the probe interval.
+    @param adaptive_timeouts: derive timeouts from the observed latencies.
+    @param hedge_requests: hedge idempotent requests after the p95 latency.
+    """
+    client_health_tracker.reset()
+    client_health_tracker.failure_threshold = failure_threshold
+    client_health_tracker.probe_interval = probe_interval
+    client_health_tracker.max_probe_interval = max_probe_interval
+    client_health_tracker.adaptive_timeouts = adaptive_timeouts
+    client_health_tracker.hedge_requests = hedge_requests
+
+
+class DeadlineExceeded(Exception):
+    """The request could not be completed before the caller's deadline."""
+
+
+# don't start an attempt with less time than this left before the deadline.
+MIN_ATTEMPT_TIMEOUT = 0.1
+
+
 class ClientInstanceRequest:
     """A client request is any message sent to a node that expects a response.
 
     This can be either JSONRPC for ELs, or BeaconAPI for CLs.
+
+    Subclasses implement _request_once, a single attempt that raises on
+    failure. The retry loop is shared by perform_request (sync) and
+    perform_request_async (scheduled on the shared RequestEngine).
     """
 
+    # idempotent requests may be hedged (sent twice, first answer wins).
+    idempotent: bool = False
+    # a 404 for a query that may legitimately have no result (e.g. an
+    # empty slot) is final, retrying it only wastes the backoff.
+    retry_not_found: bool = True
+
     def __init__(
-        self, payload: Union[dict, str], max_retries: int = 3, timeout: int = 5, backoff: int = 1
+        self,
+        payload: Union[dict, str],
+        max_retries: int = 3,
+        timeout: int = 5,
+        backoff: int = 1,
+        use_circuit_breaker: bool = True,
     ):
         """A request to a client instance.
 
         @param payload: the payload, a dictionary for JSONRPC, a string
         for BeaconAPI. @param max_retries: max number of retries before
         bailing. @param timeout: timeout to use per request.
+        @param use_circuit_breaker: fail fast while the instance's circuit
+        is open. Bootstrap-time requests that wait for a node to come up
+        disable this so they keep retrying.
         """
         self.payload: Union[dict, str] = payload
         self.max_retries: int = max_retries
         self.timeout: int = timeout
         self.backoff: int = backoff
+        self.use_circuit_breaker: bool = use_circuit_breaker
+
+    @abstractmethod
+    def get_endpoint(self, instance: ClientInstance) -> str:
+        """The url this request is sent to for the instance."""
 
     @abstractmethod
+    def _request_once(
+        self, instance: ClientInstance, timeout: float
+    ) -> requests.Response:
+        """Perform a single attempt of the request, raises on failure."""
+
+    def get_request_class(self) -> str:
+        """Latencies are tracked (and timeouts adapted) per request class,
+        so cheap requests don't cap the timeout of heavy ones."""
+        return type(self).__name__
+
+    def get_timeout(self, instance: ClientInstance) -> float:
+        """The timeout for the next attempt, adapted to the latencies we
+        have observed for this class of request on the instance."""
+        return client_health_tracker.get_timeout(
+            instance, self.timeout, self.get_request_class()
+        )
+
+    def _get_attempt_timeout(
+        self, instance: ClientInstance, deadline: Optional[float]
+    ) -> float:
+        """The timeout for the next attempt, bounded by the deadline.
+        Raises DeadlineExceeded if there is no time left."""
+        timeout = self.get_timeout(instance)
+        if deadline is None:
+            return timeout
+        remaining = deadline - time.time()
+        if remaining <= MIN_ATTEMPT_TIMEOUT:
+            raise DeadlineExceeded(
+                f"deadline exceeded for {self.get_endpoint(instance)}"
+            )
+        return min(timeout, remaining)
+
+    def get_coalescing_key(self, instance: ClientInstance) -> Optional[tuple]:
+        """Identical requests (same key) in flight at the same time share a
+        single call. None disables coalescing for this request."""
+        return None
+
+    def _attempt(
+        self, instance: ClientInstance, timeout: float, coalesce: bool = True
+    ) -> requests.Response:
+        """A single attempt, shared with identical requests in flight.
+
+        @param instance: client instance to send the request to.
+        @param timeout: the timeout for this attempt.
+        @param coalesce: share the call with identical requests in flight.
+        @return: response on success, raises otherwise.
+        """
+        key = self.get_coalescing_key(instance) if coalesce else None
+        if key is None:
+            return self._guarded_request(instance, timeout)
+        # served without touching the node, so not recorded in its health.
+        memoized = request_coalescer.get_memoized(key)
+        if memoized is not None:
+            return memoized
+        # only the caller that performs the call (the leader) records it in
+        # the instance's health, the callers sharing it must not count the
+        # same call (or their own wait timing out) again.
+        return request_coalescer.do(
+            key, timeout, self._guarded_request, instance, timeout
+        )
+
+    def _guarded_request(
+        self, instance: ClientInstance, timeout: float
+    ) -> requests.Response:
+        """A single call guarded by the instance's circuit breaker, the
+        outcome is recorded in the instance's health.
+
+        @param instance: client instance to send the request to.
+        @param timeout: the timeout for this call.
+        @return: response on success, raises otherwise.
+        """
+        health = client_health_tracker.get(instance)
+        if self.use_circuit_breaker and not health.allow_request():
+            raise CircuitOpenError(f"circuit open for {instance.name}")
+        start = time.monotonic()
+        try:
+            response = self._request_once(instance, timeout)
+        except Exception as e:
+            if is_connection_failure(e):
+                health.record_failure()
+            else:
+                # the node answered, just not with what we wanted.
+                health.record_success(time.monotonic() - start, self.get_request_class())
+            raise
+        if not getattr(response, "from_cache", False):
+            health.record_success(time.monotonic() - start, self.get_request_class())
+        return response
+
+    async def _attempt_async(
+        self, instance: ClientInstance, timeout: float
+    ) -> requests.Response:
+        """A single attempt on the shared RequestEngine. Idempotent requests
+        are hedged: if the attempt has not completed after the instance's
+        p95 latency a second one is sent and the first success wins.
+
+        @param instance: client instance to send the request to.
+        @param timeout: the timeout for this attempt.
+        @return: response on success, raises otherwise.
+        """
+        engine = get_request_engine()
+        first = asyncio.ensure_future(
+            engine.run_blocking(instance.ip_address, self._attempt, instance, timeout)
+        )
+        hedge_after = None
+        if self.idempotent and client_health_tracker.hedge_requests:
+            hedge_after = client_health_tracker.get(instance).get_latency_percentile(
+                95, self.get_request_class()
+            )
+        if hedge_after is None or hedge_after >= timeout:
+            return await first
+
+        done, _ = await asyncio.wait({first}, timeout=hedge_after)
+        if first in done:
+            return first.result()
+
+        client_health_tracker.get(instance).record_hedge()
+        # the hedge must not be coalesced with the attempt it is hedging.
+        second = asyncio.ensure_future(
+            engine.run_blocking(
+                instance.ip_address,
+                self._attempt,
+                instance,
+                timeout - hedge_after,
+                False,
+            )
+        )
+        pending = {first, second}
+        error: Optional[BaseException] = None
+        while len(pending) > 0:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    for other in pending:
+                        # the blocking call can't be interrupted, we just
+                        # stop waiting on it (it keeps its engine permits
+                        # until it returns).
+                        other.cancel()
+                    return task.result()
+                error = task.exception()
+        raise error
+
+    def _handle_failed_attempt(
+        self, instance: ClientInstance, attempt: int, e: Exception
+    ) -> Optional[Exception]:
+        """Log a failed attempt, returns the exception if we are out of
+        retries."""
+        if isinstance(e, (CircuitOpenError, DeadlineExceeded)):
+            # the node is known to be down or we are out of time, don't wait on it.
+            logging.debug(f"{e}, skipping {self.get_endpoint(instance)}")
+            return e
+        if not self.retry_not_found and self.is_not_found(e):
+            return e
+        if attempt < self.max_retries - 1:
+            logging.debug(
+                f"{e} occurred during the API request {self.get_endpoint(instance)}. Retrying..."
+            )
+            return None
+        logging.error(
+            f"Maximum number of retries reached for {self.get_endpoint(instance)}"
+        )
+        return e
+
+    def _get_backoff(
+        self, instance: ClientInstance, deadline: Optional[float], e: Exception
+    ) -> Union[Exception, float]:
+        """The backoff before the next attempt, or the exception to return
+        if the backoff would not leave enough time before the deadline."""
+        backoff = max(self.backoff, self.get_retry_after(e))
+        if deadline is not None and time.time() + backoff >= deadline:
+            logging.debug(
+                f"no time left to retry {self.get_endpoint(instance)} before the deadline"
+            )
+            return e
+        return backoff
+
     def perform_request(
-        self, instance: ClientInstance
+        self, instance: ClientInstance, deadline: Optional[float] = None
+    ) -> Union[Exception, requests.Response]:
+        """Either returns the response or an exception.
+
+        @param instance: client instance to send the request to.
+        @param deadline: optional absolute time (time.time()) by which we
+        must have returned, attempts and backoff are fit inside it.
+        @return: response on success, exception otherwise.
+        """
+        for attempt in range(self.max_retries):
+            try:
+                timeout = self._get_attempt_timeout(instance, deadline)
+                return self._attempt(instance, timeout)
+            except Exception as e:
+                if (err := self._handle_failed_attempt(instance, attempt, e)) is not None:
+                    return err
+                backoff = self._get_backoff(instance, deadline, e)
+                if isinstance(backoff, Exception):
+                    return backoff
+            time.sleep(backoff)  # don't spam the clients.
+        return Exception("Unknown error occurred.")  # should not occur.
+
+    async def perform_request_async(
+        self, instance: ClientInstance, deadline: Optional[float] = None
     ) -> Union[Exception, requests.Response]:
-        """Either returns the response or an exception."""
+        """Same as perform_request but runs on the shared RequestEngine.
+        Backoff between retries does not hold an executor thread, and
+        idempotent requests are hedged.
+
+        @param instance: client instance to send the request to.
+        @param deadline: optional absolute time (time.time()) by which we
+        must have returned, attempts and backoff are fit inside it.
+        @return: response on success, exception otherwise.
+        """
+        for attempt in range(self.max_retries):
+            try:
+                timeout = self._get_attempt_timeout(instance, deadline)
+                return await self._attempt_async(instance, timeout)
+            except Exception as e:
+                if (err := self._handle_failed_attempt(instance, attempt, e)) is not None:
+                    return err
+                backoff = self._get_backoff(instance, deadline, e)
+                if isinstance(backoff, Exception):
+                    return backoff
+            await asyncio.sleep(backoff)  # don't spam the clients.
+        return Exception("Unknown error occurred.")  # should not occur.
+
+    @staticmethod
+    def get_retry_after(e: Exception) -> float:
+        """The seconds a throttled (429) request asks us to wait, 0 otherwise."""
+        if (
+            not isinstance(e, requests.exceptions.HTTPError)
+            or e.response is None
+            or e.response.status_code != 429
+        ):
+            return 0
+        try:
+            return float(e.response.headers.get("Retry-After", 0))
+        except ValueError:
+            return 0  # an HTTP date, we don't wait that long.
+
+    @staticmethod
+    def is_not_found(e: Union[requests.Response, Exception]) -> bool:
+        """Check if the request failed with a 404."""
+        return (
+            isinstance(e, requests.exceptions.HTTPError)
+            and e.response is not None
+            and e.response.status_code == 404
+        )
 
     def is_valid(self, response: Union[requests.Response, Exception]) -> bool:
         """Check if the response is valid.
@@ -66,126 +587,135 @@ class ClientInstanceRequest:
 class ExecutionJSONRPCRequest(ClientInstanceRequest):
     """A request to an execution client."""
 
-    def __init__(self, payload: dict, max_retries: int = 3, timeout: int = 5, backoff: int = 1):
-        super().__init__(payload=payload, max_retries=max_retries, timeout=timeout, backoff=backoff)
+    def __init__(
+        self,
+        payload: dict,
+        max_retries: int = 3,
+        timeout: int = 5,
+        backoff: int = 1,
+        use_circuit_breaker: bool = True,
+    ):
+        super().__init__(
+            payload=payload,
+            max_retries=max_retries,
+            timeout=timeout,
+            backoff=backoff,
+            use_circuit_breaker=use_circuit_breaker,
+        )
 
-    def perform_request(
-        self, instance: ClientInstance
-    ) -> Union[Exception, requests.Response]:
-        """Perform a request to the execution client. Either return an
-        exception or a response. In the case that the response is an error code
-        we also return an exception. (besu.
+    def get_endpoint(self, instance: ClientInstance) -> str:
+        return instance.get_execution_jsonrpc_path()
 
-        workaround) @param instance: client instance to send the request
-        to. @return: response on success, exception otherwise.
-        """
-        rpc_endpoint = instance.get_execution_jsonrpc_path()
-        for attempt in range(self.max_retries):
-            try:
-                response = requests.post(
-                    rpc_endpoint, json=self.payload, timeout=self.timeout
-                )
-                # raise an exception based on the response.
-                response.raise_for_status()
-                data = response.json()
-                if "error" in data:
-                    raise ErrorResponse(data["error"])
-                # response is good, optionally process data here.
-                return response
-
-            except (requests.exceptions.RequestException, HTTPError) as e:
-                if attempt < self.max_retries - 1:
-                    logging.debug(
-                        f"{e.strerror} occurred during the API request {rpc_endpoint}. Retrying..."
-                    )
-                else:
-                    logging.error(
-                        f"Maximum number of retries reached for {rpc_endpoint}"
-                    )
-                    return e
+    def get_request_class(self) -> str:
+        return self.payload["method"]
 
-            except Exception as e:
-                if attempt < self.max_retries - 1:
-                    logging.debug(
-                        f"{e} occurred during the API request {rpc_endpoint}. Retrying..."
-                    )
-                else:
-                    logging.error(
-                        f"Maximum number of retries reached for {rpc_endpoint}"
-                    )
-                    return e
-
-            time.sleep(self.backoff)  # don't spam the clients.
-        return Exception("Unknown error occurred.")  # should not occur.
+    def _request_once(
+        self, instance: ClientInstance, timeout: float
+    ) -> requests.Response:
+        """Perform a request to the execution client. In the case that the
+        response is an error code we also raise an exception. (besu
+        workaround)
+
+        @param instance: client instance to send the request to.
+        @return: response on success, raises otherwise.
+        """
+        response = client_session_pool.get_session(instance).post(
+            self.get_endpoint(instance),
+            json=self.payload,
+            timeout=timeout,
+        )
+        # raise an exception based on the response.
+        response.raise_for_status()
+        data = response.json()
+        if "error" in data:
+            raise ErrorResponse(data["error"])
+        # response is good, optionally process data here.
+        return response
 
 
 class BeaconAPIRequest(ClientInstanceRequest):
-    def __init__(self, payload: str, max_retries: int = 3, timeout: int = 5):
+    # beacon API requests are all GETs.
+    idempotent = True
+
+    def __init__(
+        self,
+        payload: str,
+        max_retries: int = 3,
+        timeout: int = 5,
+        ssz: bool = False,
+        immutable: bool = False,
+    ):
+        """
+        @param ssz: ask for the SSZ encoding (application/octet-stream)
+        instead of JSON, only some endpoints support this.
+        @param immutable: the object requested never changes (e.g. a block
+        by root) so the response is served from the immutable object cache.
+        """
         super().__init__(payload, max_retries, timeout)
+        self.ssz: bool = ssz
+        self.immutable: bool = immutable
 
-    def perform_request(
-        self, instance: ClientInstance
-    ) -> Union[Exception, requests.Response]:
-        """Perform a request to the beacon client. Either return an exception
-        or a response.
+    def get_content_type(self) -> str:
+        return SSZ_CONTENT_TYPE if self.ssz else "application/json"
+
+    def get_coalescing_key(self, instance: ClientInstance) -> Optional[tuple]:
+        return instance.name, "GET", self.payload, self.get_content_type()
+
+    def get_endpoint(self, instance: ClientInstance) -> str:
+        return f"{instance.get_consensus_beacon_api_path()}{self.payload}"
+
+    def _request_once(
+        self, instance: ClientInstance, timeout: float
+    ) -> requests.Response:
+        """Perform a request to the beacon client.
 
         @param instance: client instance to send the request to.
-        @return: response on success, exception otherwise.
+        @return: response on success, raises otherwise.
         """
-        beacon_api_endpoint = instance.get_consensus_beacon_api_path()
-        request_str = f"{beacon_api_endpoint}{self.payload}"
-        for attempt in range(self.max_retries):
-            try:
-                response = requests.get(request_str, timeout=self.timeout)
-                # raise an exception based on the response.
-                response.raise_for_status()
-
-                return response
-
-            except (
-                requests.exceptions.RequestException,
-                HTTPError,
-            ) as connection_exception:
-                if attempt < self.max_retries - 1:
-                    err = connection_exception.strerror
-                    logging.debug(
-                        f"{err} occurred during the API request {request_str}. Retrying..."
-                    )
-                else:
-                    logging.error(
-                        f"Maximum number of retries reached for {request_str}"
-                    )
-                    return connection_exception
-
-            except Exception as unexpected_exception:
-                if attempt < self.max_retries - 1:
-                    err = unexpected_exception
-                    logging.debug(
-                        f"{err} occurred during the API request {request_str}. Retrying..."
-                    )
-                else:
-                    logging.error(
-                        f"Maximum number of retries reached for {request_str}"
-                    )
-                    return unexpected_exception
-
-            time.sleep(1)  # don't spam the clients.
+        cache_key = (self.payload, self.get_content_type())
+        if self.immutable:
+            cached = immutable_object_cache.get(cache_key)
+            if cached is not None:
+                return build_cached_response(self.get_endpoint(instance), *cached)
+
+        headers = {"Accept": SSZ_CONTENT_TYPE} if self.ssz else None
+        response = client_session_pool.get_session(instance).get(
+            self.get_endpoint(instance),
+            headers=headers,
+            timeout=timeout,
+        )
+        # raise an exception based on the response.
+        response.raise_for_status()
+        # only cache what we asked for, clients may ignore the Accept header.
+        if self.immutable and self.is_ssz(response) == self.ssz:
+            # an SSZ body is the object alone, a JSON one is wrapped in the
+            # serving node's view of it.
+            body = response.content if self.ssz else get_immutable_body(response.json())
+            immutable_object_cache.put(cache_key, self.get_content_type(), body)
+        return response
+
+    @staticmethod
+    def is_ssz(response: requests.Response) -> bool:
+        """Clients may ignore the Accept header, check what we got back."""
+        return response.headers.get("Content-Type", "").startswith(SSZ_CONTENT_TYPE)
 
 
 def perform_batched_request(
     req: ClientInstanceRequest, clients: list[ClientInstance]
 ) -> dict[ClientInstance, Future]:
     """Performs a batched request on a list of clients asynchronously. It
-    returns a dictionary.
+    returns a dictionary of futures, keyed by the client instance.
 
-    of futures, keyed by the client instance name. @param req: @param
-    clients: @return: the future from
-    req.perform_request(client_instance)
+    The requests are scheduled on the shared RequestEngine, no threads
+    are created per call.
+    @param req: the request to perform.
+    @param clients: the clients to send the request to.
+    @return: the future from req.perform_request_async(client_instance)
     """
-    with ThreadPoolExecutor(max_workers=len(clients)) as executor:
-        results_dict: dict[ClientInstance, Future] = {}
-        for client in clients:
-            results_dict[client] = executor.submit(req.perform_request, client)
+    engine = get_request_engine()
+    results_dict: dict[ClientInstance, Future] = {}
+    for client in clients:
+        results_dict[client] = engine.submit(req.perform_request_async(client))
 
     return results_dict
 
@@ -196,7 +726,12 @@ class eth_getBlockByNumber(ExecutionJSONRPCRequest):
     """
 
     def __init__(
-        self, block="latest", _id: int = 1, max_retries: int = 3, timeout: int = 5
+        self,
+        block="latest",
+        _id: int = 1,
+        max_retries: int = 3,
+        timeout: int = 5,
+        use_circuit_breaker: bool = True,
     ):
         payload = {
             "method": "eth_getBlockByNumber",
@@ -208,6 +743,7 @@ class eth_getBlockByNumber(ExecutionJSONRPCRequest):
             payload=payload,
             max_retries=max_retries,
             timeout=timeout,
+            use_circuit_breaker=use_circuit_breaker,
         )
 
     def get_block(self, response):
@@ -228,7 +764,12 @@ class eth_sendRawTransaction(ExecutionJSONRPCRequest):
     """
 
     def __init__(
-        self, raw_tx="", _id: int = 1, max_retries: int = 3, timeout: int = 5
+        self,
+        raw_tx="",
+        _id: int = 1,
+        max_retries: int = 3,
+        timeout: int = 5,
+        use_circuit_breaker: bool = True,
     ):
         payload = {
             "method": "eth_sendRawTransaction",
@@ -240,6 +781,7 @@ class eth_sendRawTransaction(ExecutionJSONRPCRequest):
             payload=payload,
             max_retries=max_retries,
             timeout=timeout,
+            use_circuit_breaker=use_circuit_breaker,
         )
 
     def get_hash(self, response):
@@ -321,7 +863,13 @@ class admin_nodeInfo(ExecutionJSONRPCRequest):
     admin_nodeInfo jsonRPCRequest
     """
 
-    def __init__(self, _id: int = 1, max_retries: int = 3, timeout: int = 5):
+    def __init__(
+        self,
+        _id: int = 1,
+        max_retries: int = 3,
+        timeout: int = 5,
+        use_circuit_breaker: bool = True,
+    ):
         payload = {
             "method": "admin_nodeInfo",
             "params": [],
@@ -332,6 +880,7 @@ class admin_nodeInfo(ExecutionJSONRPCRequest):
             payload=payload,
             max_retries=max_retries,
             timeout=timeout,
+            use_circuit_breaker=use_circuit_breaker,
         )
 
     def get_enode(
@@ -354,7 +903,12 @@ class admin_addPeer(ExecutionJSONRPCRequest):
     """
 
     def __init__(
-        self, enode: str, _id: int = 1, max_retries: int = 3, timeout: int = 5
+        self,
+        enode: str,
+        _id: int = 1,
+        max_retries: int = 3,
+        timeout: int = 5,
+        use_circuit_breaker: bool = True,
     ):
         payload = {
             "method": "admin_addPeer",
@@ -366,8 +920,217 @@ class admin_addPeer(ExecutionJSONRPCRequest):
             payload=payload,
             max_retries=max_retries,
             timeout=timeout,
+            use_circuit_breaker=use_circuit_breaker,
+        )
+
+
+class BatchRejected(Exception):
+    """The client does not accept JSON-RPC batch requests."""
+
+
+# the JSON-RPC error code for a request object that is not valid.
+JSONRPC_INVALID_REQUEST = -32600
+
+
+class ExecutionJSONRPCBatchRequest(ClientInstanceRequest):
+    """A JSON-RPC batch request to an execution client.
+
+    Packs several ExecutionJSONRPCRequests into a single POST and splits
+    the results back out by id. Clients that refuse batches (a reply that
+    is not an array, or an invalid request error) are remembered in their
+    health for the rest of the run and served with sequential calls
+    instead. A batch that is too large (413) is split in two, a throttled
+    one (429) is retried after the backoff.
+
+    perform_request returns either an exception (the batch could not be
+    sent) or a list with one entry per call, in the order of the calls.
+    Each entry is the call's "result" or an ErrorResponse for calls that
+    failed individually.
+    """
+
+    def __init__(
+        self,
+        calls: list[ExecutionJSONRPCRequest],
+        max_batch_size: int = 1000,
+        max_retries: int = 3,
+        timeout: int = 5,
+        backoff: int = 1,
+        use_circuit_breaker: bool = True,
+    ):
+        """
+        @param calls: the requests to batch together.
+        @param max_batch_size: max number of calls per POST (geth limits
+        batches to 1000 items by default).
+        @param use_circuit_breaker: fail fast while the circuit is open.
+        """
+        self.calls: list[ExecutionJSONRPCRequest] = calls
+        self.max_batch_size: int = max_batch_size
+        payload = []
+        for ndx, call in enumerate(calls):
+            call_payload = dict(call.payload)
+            call_payload["id"] = ndx
+            payload.append(call_payload)
+        super().__init__(
+            payload=payload,
+            max_retries=max_retries,
+            timeout=timeout,
+            backoff=backoff,
+            use_circuit_breaker=use_circuit_breaker,
+        )
+
+    def get_endpoint(self, instance: ClientInstance) -> str:
+        return instance.get_execution_jsonrpc_path()
+
+    def _request_once(self, instance: ClientInstance, timeout: float) -> list[Any]:
+        health = client_health_tracker.get(instance)
+        if not health.batch_unsupported:
+            try:
+                results = []
+                for start in range(0, len(self.payload), self.max_batch_size):
+                    chunk = self.payload[start : start + self.max_batch_size]
+                    results += self._post_batch(instance, chunk, start, timeout)
+                return results
+            except BatchRejected as e:
+                logging.debug(
+                    f"{instance.name} rejected a JSON-RPC batch ({e}), using sequential calls."
+                )
+                health.batch_unsupported = True
+
+        return self._request_sequentially(instance, timeout)
+
+    def get_timeout(self, instance: ClientInstance) -> float:
+        """The latency of a batch depends on its size, don't adapt the
+        timeout to the latencies observed for other batches."""
+        return self.timeout
+
+    def _post_batch(
+        self, instance: ClientInstance, chunk: list[dict], start: int, timeout: float
+    ) -> list[Any]:
+        """Send one batch and split the results back out by id.
+
+        @param chunk: the payloads in this batch.
+        @param start: the id of the first payload in the batch.
+        @return: the results for the chunk in order.
+        """
+        response = client_session_pool.get_session(instance).post(
+            self.get_endpoint(instance),
+            json=chunk,
+            timeout=timeout,
+        )
+        if response.status_code == 413 and len(chunk) > 1:
+            # too large for the client, not a refusal of batches.
+            half = len(chunk) // 2
+            return self._post_batch(
+                instance, chunk[:half], start, timeout
+            ) + self._post_batch(instance, chunk[half:], start + half, timeout)
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+        if (response.ok and not isinstance(data, list)) or self._is_invalid_request(data):
+            # a single response object means the batch itself was refused.
+            raise BatchRejected(data.get("error", data) if isinstance(data, dict) else data)
+        # anything else (e.g. a 429) is retried after the backoff.
+        response.raise_for_status()
+
+        responses_by_id = {item.get("id"): item for item in data}
+        results = []
+        for _id in range(start, start + len(chunk)):
+            item = responses_by_id.get(_id)
+            if item is None:
+                results.append(ErrorResponse(f"no response for call with id {_id}"))
+            elif "error" in item:
+                results.append(ErrorResponse(item["error"]))
+            else:
+                results.append(item.get("result"))
+        return results
+
+    @staticmethod
+    def _is_invalid_request(data: Any) -> bool:
+        """Check for the invalid request error clients answer a batch with
+        when they don't support batches."""
+        if not isinstance(data, dict) or not isinstance(data.get("error"), dict):
+            return False
+        return data["error"].get("code") == JSONRPC_INVALID_REQUEST
+
+    def _request_sequentially(
+        self, instance: ClientInstance, timeout: float
+    ) -> list[Any]:
+        """Fallback for clients that don't support batches, one POST per
+        call. Connection errors abort the attempt, call errors are
+        reported per call."""
+        results = []
+        for call in self.calls:
+            try:
+                results.append(call._request_once(instance, timeout).json()["result"])
+            except ErrorResponse as e:
+                results.append(e)
+        return results
+
+    def get_results(
+        self, response: Union[Exception, list[Any]]
+    ) -> Union[Exception, list[Any]]:
+        """Get the per call results, if the batch is valid. Returns exception
+        otherwise.
+
+        @param response: the response from performing this query.
+        @return: list of results (or ErrorResponse) in the order of the calls.
+        """
+        if self.is_valid(response):
+            return response
+        return response  # the exception
+
+
+class eth_getBlockByNumberBatch(ExecutionJSONRPCBatchRequest):
+    """
+    eth_getBlockByNumber for many blocks in one JSON-RPC batch.
+    """
+
+    def __init__(self, blocks: list[str], max_retries: int = 3, timeout: int = 5):
+        super().__init__(
+            calls=[eth_getBlockByNumber(block) for block in blocks],
+            max_retries=max_retries,
+            timeout=timeout,
+        )
+
+    def get_blocks(
+        self, response: Union[Exception, list[Any]]
+    ) -> Union[Exception, list[Any]]:
+        """Get the blocks from the response, if it is valid. Returns exception
+        otherwise.
+
+        @param response: the response from performing this query.
+        @return: list of blocks (or ErrorResponse) in the order requested.
+        """
+        return self.get_results(response)
+
+
+class eth_getTransactionReceiptBatch(ExecutionJSONRPCBatchRequest):
+    """
+    eth_getTransactionReceipt for many transactions in one JSON-RPC batch.
+    """
+
+    def __init__(
+        self, tx_hashes: list[str], max_retries: int = 3, timeout: int = 5, backoff: int = 6
+    ):
+        super().__init__(
+            calls=[eth_getTransactionReceipt(tx_hash) for tx_hash in tx_hashes],
+            max_retries=max_retries,
+            timeout=timeout,
+            backoff=backoff,
         )
 
+    def get_receipts(
+        self, response: Union[Exception, list[Any]]
+    ) -> Union[Exception, list[Any]]:
+        """Get the receipts from the response, if it is valid. Returns
+        exception otherwise. Receipts of pending transactions are None.
+
+        @param response: the response from performing this query.
+        @return: list of receipts (or ErrorResponse) in the order requested.
+        """
+        return self.get_results(response)
+
 
 """
     Some useful predefined BeaconAPI requests for CL
@@ -380,9 +1143,17 @@ class BeaconAPIgetBlockV2(BeaconAPIRequest):
     https://ethereum.github.io/beacon-APIs/#/Beacon/getBlockV2
     """
 
-    def __init__(self, block="head", max_retries: int = 3, timeout: int = 5):
+    def __init__(
+        self, block="head", max_retries: int = 3, timeout: int = 5, ssz: bool = False
+    ):
         payload = f"/eth/v2/beacon/blocks/{block}"
-        super().__init__(payload=payload, max_retries=max_retries, timeout=timeout)
+        super().__init__(
+            payload=payload,
+            max_retries=max_retries,
+            timeout=timeout,
+            ssz=ssz,
+            immutable=is_block_root(block),
+        )
 
     def get_block(
         self, response: Union[Exception, requests.Response]
@@ -392,6 +1163,23 @@ class BeaconAPIgetBlockV2(BeaconAPIRequest):
 
         return response  # the exception
 
+    def get_block_view(
+        self, response: Union[Exception, requests.Response]
+    ) -> Union[Exception, BeaconBlockView, JSONBeaconBlockView]:
+        """Get a lazy view of the block (slot, proposer_index, parent_root,
+        state_root, graffiti) regardless of the encoding the client used.
+        Returns exception otherwise.
+
+        @param response: the response from performing this query.
+        @return: the block view.
+        """
+        if self.is_valid(response):
+            if self.is_ssz(response):
+                return BeaconBlockView(response.content)
+            return JSONBeaconBlockView(response.json()["data"]["message"])
+
+        return response  # the exception
+
 class BeaconAPIgetBlockV1(BeaconAPIRequest):
     """
     /eth/v1/beacon/blocks/{block} beaconAPI request.
@@ -400,7 +1188,12 @@ class BeaconAPIgetBlockV1(BeaconAPIRequest):
 
     def __init__(self, block="head", max_retries: int = 3, timeout: int = 5):
         payload = f"/eth/v1/beacon/blocks/{block}"
-        super().__init__(payload=payload, max_retries=max_retries, timeout=timeout)
+        super().__init__(
+            payload=payload,
+            max_retries=max_retries,
+            timeout=timeout,
+            immutable=is_block_root(block),
+        )
 
     def get_block(
         self, response: Union[Exception, requests.Response]
@@ -410,6 +1203,111 @@ class BeaconAPIgetBlockV1(BeaconAPIRequest):
 
         return response  # the exception
 
+
+@dataclass(frozen=True)
+class BlockHeader:
+    """The fields of a block header needed to place it in the chain."""
+
+    root: str
+    slot: int
+    parent_root: str
+    state_root: Optional[str] = None
+
+
+class BeaconAPIgetBlockHeader(BeaconAPIRequest):
+    """
+    /eth/v1/beacon/headers/{block_id} beaconAPI request.
+    https://ethereum.github.io/beacon-APIs/#/Beacon/getBlockHeader
+
+    Much smaller than the full block, use it when only the slot and the
+    parent are needed.
+    """
+
+    def __init__(self, block="head", max_retries: int = 3, timeout: int = 5):
+        payload = f"/eth/v1/beacon/headers/{block}"
+        super().__init__(
+            payload=payload,
+            max_retries=max_retries,
+            timeout=timeout,
+            immutable=is_block_root(block),
+        )
+
+    def get_block_header(
+        self, response: Union[Exception, requests.Response]
+    ) -> Union[Exception, BlockHeader]:
+        """Get the root, slot and parent root of the block from the response,
+        if it is valid. Returns exception otherwise.
+
+        @param response: the response from performing this query.
+        @return: BlockHeader
+        """
+        if self.is_valid(response):
+            data = response.json()["data"]
+            message = data["header"]["message"]
+            return BlockHeader(
+                root=data["root"],
+                slot=int(message["slot"]),
+                parent_root=message["parent_root"],
+                state_root=message["state_root"],
+            )
+
+        return response  # the exception
+
+
+class BeaconAPIgetBlockHeaders(BeaconAPIRequest):
+    """
+    /eth/v1/beacon/headers?slot={slot} beaconAPI request.
+    https://ethereum.github.io/beacon-APIs/#/Beacon/getBlockHeaders
+
+    Query the headers of the blocks at a slot (or the children of a parent
+    root). Clients answer a slot without blocks with an empty list or a 404,
+    either way get_block_headers returns [].
+    """
+
+    retry_not_found = False
+
+    def __init__(
+        self,
+        slot: Optional[int] = None,
+        parent_root: Optional[str] = None,
+        max_retries: int = 3,
+        timeout: int = 5,
+    ):
+        query = []
+        if slot is not None:
+            query.append(f"slot={slot}")
+        if parent_root is not None:
+            query.append(f"parent_root={parent_root}")
+        payload = "/eth/v1/beacon/headers"
+        if query:
+            payload += "?" + "&".join(query)
+        super().__init__(payload=payload, max_retries=max_retries, timeout=timeout)
+
+    def get_block_headers(
+        self, response: Union[Exception, requests.Response]
+    ) -> Union[Exception, list[BlockHeader]]:
+        """Get the root, slot and parent root of every block in the response,
+        if it is valid. Returns exception otherwise.
+
+        @param response: the response from performing this query.
+        @return: [BlockHeader]
+        """
+        if self.is_not_found(response):
+            return []
+        if self.is_valid(response):
+            return [
+                BlockHeader(
+                    root=data["root"],
+                    slot=int(data["header"]["message"]["slot"]),
+                    parent_root=data["header"]["message"]["parent_root"],
+                    state_root=data["header"]["message"]["state_root"],
+                )
+                for data in response.json()["data"]
+            ]
+
+        return response  # the exception
+
+
 class BeaconAPIgetValidators(BeaconAPIRequest):
     """
     /eth/v1/beacon/states/{state_id}/validators beaconAPI request.
@@ -429,6 +1327,40 @@ class BeaconAPIgetValidators(BeaconAPIRequest):
         return response  # the exception
 
 
+class BeaconAPIgetStateV2(BeaconAPIRequest):
+    """
+    /eth/v2/debug/beacon/states/{state_id} beaconAPI request.
+    https://ethereum.github.io/beacon-APIs/#/Debug/getStateV2
+
+    States are huge in JSON, this is fetched as SSZ by default.
+    """
+
+    def __init__(
+        self, state_id="head", max_retries: int = 3, timeout: int = 30, ssz: bool = True
+    ):
+        payload = f"/eth/v2/debug/beacon/states/{state_id}"
+        super().__init__(
+            payload=payload, max_retries=max_retries, timeout=timeout, ssz=ssz
+        )
+
+    def get_state_view(
+        self, response: Union[Exception, requests.Response]
+    ) -> Union[Exception, BeaconStateView]:
+        """Get a lazy view of the state (genesis_time, genesis_validators_root,
+        slot, fork), if the client answered with SSZ. Returns exception
+        otherwise.
+
+        @param response: the response from performing this query.
+        @return: the state view.
+        """
+        if self.is_valid(response):
+            if not self.is_ssz(response):
+                return Exception("client did not return an SSZ encoded state.")
+            return BeaconStateView(response.content)
+
+        return response  # the exception
+
+
 class BeaconAPIgetGenesis(BeaconAPIRequest):
     """
     /eth/v1/beacon/genesis beaconAPI request.
@@ -444,6 +1376,15 @@ class BeaconAPIgetGenesis(BeaconAPIRequest):
         )
 
 
+@dataclass(frozen=True)
+class FinalityCheckpoints:
+    """The checkpoints of a finality_checkpoints response, (epoch, root)."""
+
+    finalized: Tuple[int, str]
+    current_justified: Tuple[int, str]
+    previous_justified: Tuple[int, str]
+
+
 class BeaconAPIgetFinalityCheckpoints(BeaconAPIRequest):
     """
     /eth/v1/beacon/states/{state_id}/finality_checkpoints beaconAPI request.
@@ -458,6 +1399,32 @@ class BeaconAPIgetFinalityCheckpoints(BeaconAPIRequest):
             timeout=timeout,
         )
 
+    def get_checkpoints(
+        self, response: Union[Exception, requests.Response]
+    ) -> Union[Exception, "FinalityCheckpoints"]:
+        """Get all the checkpoints from the response, if it is valid.
+        Returns exception otherwise.
+
+        @param response: the response from performing this query.
+        @return: FinalityCheckpoints
+        """
+        if self.is_valid(response):
+            data = response.json()["data"]
+            # the beacon API encodes the epochs as strings.
+            return FinalityCheckpoints(
+                finalized=(int(data["finalized"]["epoch"]), data["finalized"]["root"]),
+                current_justified=(
+                    int(data["current_justified"]["epoch"]),
+                    data["current_justified"]["root"],
+                ),
+                previous_justified=(
+                    int(data["previous_justified"]["epoch"]),
+                    data["previous_justified"]["root"],
+                ),
+            )
+
+        return response  # the exception
+
     def get_finalized_checkpoint(
         self, response: Union[Exception, requests.Response]
     ) -> Union[Exception, Tuple[int, str]]:
@@ -469,10 +1436,7 @@ class BeaconAPIgetFinalityCheckpoints(BeaconAPIRequest):
         : (epoch: int, root:str)
         """
         if self.is_valid(response):
-            return (
-                response.json()["data"]["finalized"]["epoch"],
-                response.json()["data"]["finalized"]["root"],
-            )
+            return self.get_checkpoints(response).finalized
 
         return response  # the exception
 
@@ -487,10 +1451,7 @@ class BeaconAPIgetFinalityCheckpoints(BeaconAPIRequest):
         : (epoch: int, root:str)
         """
         if self.is_valid(response):
-            return (
-                response.json()["data"]["previous_justified"]["epoch"],
-                response.json()["data"]["previous_justified"]["root"],
-            )
+            return self.get_checkpoints(response).previous_justified
 
         return response  # the exception
 
@@ -505,10 +1466,7 @@ class BeaconAPIgetFinalityCheckpoints(BeaconAPIRequest):
         : (epoch: int, root:str)
         """
         if self.is_valid(response):
-            return (
-                response.json()["data"]["current_justified"]["epoch"],
-                response.json()["data"]["current_justified"]["root"],
-            )
+            return self.get_checkpoints(response).current_justified
 
         return response  # the exception
 
@@ -551,7 +1509,10 @@ class BeaconAPIgetIdentity(BeaconAPIRequest):
         @return
         : enr: dict
         """
-        return self.get_identity(response)["enr"]
+        identity = self.get_identity(response)
+        if isinstance(identity, Exception):
+            return identity
+        return identity["enr"]
 
     def get_peer_id(
         self, response: Union[Exception, requests.Response]
@@ -563,7 +1524,10 @@ class BeaconAPIgetIdentity(BeaconAPIRequest):
         @return
         : peer_id: str
         """
-        return self.get_identity(response)["peer_id"]
+        identity = self.get_identity(response)
+        if isinstance(identity, Exception):
+            return identity
+        return identity["peer_id"]
 
 
 class BeaconAPIgetPeers(BeaconAPIRequest):
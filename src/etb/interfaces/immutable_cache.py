@@ -0,0 +1,241 @@
+"""A content addressed cache for immutable beacon objects.
+
+Objects fetched by block root (e.g. /eth/v2/beacon/blocks/0x..) never
+change, so once one client has returned it we never need to fetch it
+again from any client. Only the object itself is cached: the fields of a
+JSON response that describe the serving node's view of it
+(execution_optimistic, finalized, canonical) are stripped, see
+get_immutable_body. Entries are kept in memory in LRU order, bounded by
+their total size, and can optionally be persisted to disk so repeated runs
+of the fork detectors only fetch blocks they have not seen before. The
+persisted entries are bounded too, the least recently used files are
+removed once they grow past max_disk_size_bytes.
+"""
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+BLOCK_ROOT_PATTERN = re.compile(r"^0x[0-9a-fA-F]{64}$")
+
+# the fields of a JSON response that belong to the object, the rest of the
+# envelope (execution_optimistic, finalized) depends on the serving node.
+IMMUTABLE_FIELDS = ("version", "data")
+# fields of the data that depend on the serving node's fork choice.
+MUTABLE_DATA_FIELDS = ("canonical",)
+
+# 1 GiB
+DEFAULT_MAX_DISK_SIZE_BYTES = 1024 * 1024 * 1024
+
+# temporary files older than this are left over from a crashed writer.
+STALE_TMP_AGE = 3600
+
+# (payload, content type)
+CacheKey = tuple[str, str]
+# (content type, body)
+CacheEntry = tuple[str, bytes]
+
+
+def is_block_root(block_id: str) -> bool:
+    """Check if a block id is a block root (as opposed to head, a slot, ..)
+    and so refers to an immutable object."""
+    return isinstance(block_id, str) and BLOCK_ROOT_PATTERN.match(block_id) is not None
+
+
+def get_immutable_body(body: dict[str, Any]) -> bytes:
+    """Get the part of a decoded JSON response that is the same whichever
+    client served it, encoded for the cache.
+
+    @param body: the decoded response.
+    @return: the version and data of the response, without canonical.
+    """
+    immutable = {field: body[field] for field in IMMUTABLE_FIELDS if field in body}
+    data = immutable.get("data")
+    if isinstance(data, dict):
+        immutable["data"] = {
+            field: value for field, value in data.items() if field not in MUTABLE_DATA_FIELDS
+        }
+    return json.dumps(immutable).encode()
+
+
+class ImmutableObjectCache:
+    """Size bounded LRU cache of response bodies keyed on (payload, encoding).
+
+    The payload contains the block root, the host is not part of the key as
+    the object is the same no matter which client served it.
+    """
+
+    def __init__(
+        self,
+        max_size_bytes: int = 256 * 1024 * 1024,
+        persist_dir: Optional[pathlib.Path] = None,
+        max_disk_size_bytes: int = DEFAULT_MAX_DISK_SIZE_BYTES,
+    ):
+        """
+        @param max_size_bytes: evict the least recently used entries past this size.
+        @param persist_dir: if set, entries are also written to and read from here.
+        @param max_disk_size_bytes: remove the least recently used persisted
+            entries past this size.
+        """
+        self.max_size_bytes: int = max_size_bytes
+        self.persist_dir: Optional[pathlib.Path] = persist_dir
+        self.max_disk_size_bytes: int = max_disk_size_bytes
+        # size of the persisted entries, None until the dir is scanned.
+        self.disk_size_bytes: Optional[int] = None
+        self.num_disk_evicted: int = 0
+        if self.persist_dir is not None:
+            self.persist_dir.mkdir(parents=True, exist_ok=True)
+
+        self.entries: OrderedDict[CacheKey, CacheEntry] = OrderedDict()
+        self.size_bytes: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.num_evicted: int = 0
+        self.lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+
+    def _get_path(self, key: CacheKey) -> pathlib.Path:
+        digest = hashlib.sha256("|".join(key).encode()).hexdigest()
+        return self.persist_dir / digest
+
+    def get(self, key: CacheKey) -> Optional[CacheEntry]:
+        """Get an entry from the cache.
+
+        @param key: (payload, content type)
+        @return: (content type, body) or None on a miss.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        if self.persist_dir is not None:
+            path = self._get_path(key)
+            if path.exists():
+                try:
+                    entry = (key[1], path.read_bytes())
+                    # the mtime of a persisted entry is its last use.
+                    os.utime(path)
+                except OSError as e:
+                    logging.debug(f"failed to read cached object {path}: {e}")
+                else:
+                    self._insert(key, entry)
+                    with self.lock:
+                        self.hits += 1
+                    return entry
+
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: CacheKey, content_type: str, body: bytes):
+        """Add an entry to the cache.
+
+        @param key: (payload, content type)
+        @param content_type: the content type of the body.
+        @param body: the raw response body.
+        """
+        entry = (content_type, body)
+        self._insert(key, entry)
+        if self.persist_dir is not None:
+            self._persist(key, body)
+
+    def _persist(self, key: CacheKey, body: bytes):
+        path = self._get_path(key)
+        tmp_path = None
+        try:
+            # write to a file of our own then rename, so readers never see
+            # a partial entry and concurrent writers don't share a file.
+            fd, tmp_path = tempfile.mkstemp(dir=self.persist_dir, prefix=".tmp-")
+            with os.fdopen(fd, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.debug(f"failed to persist cached object {path}: {e}")
+            if tmp_path is not None:
+                pathlib.Path(tmp_path).unlink(missing_ok=True)
+            return
+        with self.lock:
+            if self.disk_size_bytes is not None:
+                self.disk_size_bytes += len(body)
+            over_limit = (
+                self.disk_size_bytes is None
+                or self.disk_size_bytes > self.max_disk_size_bytes
+            )
+        if over_limit:
+            self.evict_disk()
+
+    def evict_disk(self) -> int:
+        """Remove the least recently used persisted entries until they are
+        under max_disk_size_bytes, and temporary files left over by crashed
+        writers.
+
+        @return: the number of entries removed.
+        """
+        if self.persist_dir is None:
+            return 0
+        with self._disk_lock:
+            entries = []
+            for path in self.persist_dir.iterdir():
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue  # removed under us.
+                if path.name.startswith("."):
+                    if time.time() - stat.st_mtime > STALE_TMP_AGE:
+                        path.unlink(missing_ok=True)
+                    continue
+                entries.append((path, stat.st_mtime, stat.st_size))
+            total = sum(size for _, _, size in entries)
+            num_evicted = 0
+            for path, _, size in sorted(entries, key=lambda e: e[1]):
+                if total <= self.max_disk_size_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                num_evicted += 1
+            with self.lock:
+                self.disk_size_bytes = total
+                self.num_disk_evicted += num_evicted
+            return num_evicted
+
+    def _insert(self, key: CacheKey, entry: CacheEntry):
+        size = len(entry[1])
+        if size > self.max_size_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.size_bytes -= len(self.entries.pop(key)[1])
+            self.entries[key] = entry
+            self.size_bytes += size
+            while self.size_bytes > self.max_size_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size_bytes -= len(evicted)
+                self.num_evicted += 1
+
+    def get_stats(self) -> dict[str, int]:
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self.entries),
+                "size_bytes": self.size_bytes,
+                "evicted": self.num_evicted,
+                "disk_size_bytes": self.disk_size_bytes or 0,
+                "disk_evicted": self.num_disk_evicted,
+            }
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size_bytes = 0
+            self.disk_size_bytes = None
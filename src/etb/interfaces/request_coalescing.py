@@ -0,0 +1,124 @@
+"""Single-flight coalescing of identical requests.
+
+Several monitors often query the same node for the same thing in the same
+slot (e.g. /eth/v2/beacon/blocks/head). Identical requests that are in
+flight at the same time share a single http call (and so a single parsed
+response), and a short memo serves identical follow-up requests without
+hitting the node again.
+"""
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+from typing import Any, Callable, Hashable, Optional
+
+import requests
+
+# expired memo entries are swept once the memo grows past this.
+MAX_MEMO_ENTRIES = 1024
+
+
+class RequestCoalescer:
+    """Deduplicates concurrent identical requests.
+
+    The first caller for a key (the leader) performs the request, callers
+    that arrive while it is in flight wait on its result. Successful results
+    are memoized for memo_ttl seconds.
+    """
+
+    def __init__(self, memo_ttl: float = 0.0):
+        """
+        @param memo_ttl: seconds to keep serving a successful result, 0 disables the memo.
+        """
+        self.memo_ttl: float = memo_ttl
+        self._in_flight: dict[Hashable, Future] = {}
+        self._memo: dict[Hashable, tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self.num_requests: int = 0
+        self.num_coalesced: int = 0
+        self.num_memo_hits: int = 0
+
+    def do(
+        self,
+        key: Hashable,
+        timeout: Optional[float],
+        fn: Callable,
+        *args,
+    ) -> Any:
+        """Run fn(*args) unless an identical request is in flight or memoized.
+
+        @param key: identifies identical requests.
+        @param timeout: max seconds to wait on a request already in flight.
+        @param fn: the blocking call that performs the request.
+        @param args: args to pass to fn.
+        @return: the result of fn (possibly shared with other callers).
+        """
+        with self._lock:
+            memo = self._get_memoized(key)
+            if memo is not None:
+                return memo
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+                self.num_requests += 1
+            else:
+                self.num_coalesced += 1
+
+        if not leader:
+            try:
+                return future.result(timeout=timeout)
+            except TimeoutError:
+                raise requests.exceptions.Timeout(
+                    "timed out waiting on an identical request in flight."
+                )
+
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if self.memo_ttl > 0:
+                now = time.monotonic()
+                if len(self._memo) >= MAX_MEMO_ENTRIES:
+                    self._memo = {k: v for k, v in self._memo.items() if v[0] > now}
+                self._memo[key] = (now + self.memo_ttl, result)
+        future.set_result(result)
+        return result
+
+    def _get_memoized(self, key: Hashable) -> Optional[Any]:
+        memo = self._memo.get(key)
+        if memo is None:
+            return None
+        if memo[0] <= time.monotonic():
+            del self._memo[key]
+            return None
+        self.num_memo_hits += 1
+        return memo[1]
+
+    def get_memoized(self, key: Hashable) -> Optional[Any]:
+        """Get a memoized result without performing a request.
+
+        @param key: identifies identical requests.
+        @return: the result, None if there is none (or it expired).
+        """
+        with self._lock:
+            return self._get_memoized(key)
+
+    def clear_memo(self):
+        with self._lock:
+            self._memo = {}
+
+    def get_stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.num_requests,
+                "coalesced": self.num_coalesced,
+                "memo_hits": self.num_memo_hits,
+                "in_flight": len(self._in_flight),
+            }
@@ -0,0 +1,165 @@
+"""A shared asyncio engine used to fan out requests to client instances.
+
+All requests are scheduled on a single event loop that runs in a
+background thread for the lifetime of the process. Concurrency is
+bounded globally and per host so fanning out to hundreds of nodes does
+not open hundreds of connections (or threads) at once.
+
+The blocking portion of a request (the http call itself) is run on a
+fixed size executor owned by the engine, so no threads are created per
+request or per slot.
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Coroutine, Optional
+
+
+class RequestEngine:
+    """Owns the shared event loop and the concurrency limits.
+
+    Sync callers use submit()/run() which are safe to call from any
+    thread other than the engine's own loop thread.
+    """
+
+    def __init__(self, max_concurrency: int = 64, max_concurrency_per_host: int = 4):
+        """
+        @param max_concurrency: max number of requests in flight at once.
+        @param max_concurrency_per_host: max number of requests in flight per host.
+        """
+        self.max_concurrency: int = max_concurrency
+        self.max_concurrency_per_host: int = max_concurrency_per_host
+
+        self.loop = asyncio.new_event_loop()
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="etb-request"
+        )
+        self.loop.set_default_executor(self.executor)
+
+        # semaphores are only ever touched from the loop thread.
+        self._global_semaphore: Optional[asyncio.Semaphore] = None
+        self._host_semaphores: dict[str, asyncio.Semaphore] = {}
+
+        self._thread = threading.Thread(
+            target=self._run_loop, name="etb-request-engine", daemon=True
+        )
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def _get_semaphores(self, host: str) -> tuple[asyncio.Semaphore, asyncio.Semaphore]:
+        if self._global_semaphore is None:
+            self._global_semaphore = asyncio.Semaphore(self.max_concurrency)
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(
+                self.max_concurrency_per_host
+            )
+        return self._global_semaphore, self._host_semaphores[host]
+
+    async def run_blocking(self, host: str, fn: Callable, *args) -> Any:
+        """Run a blocking call on the engine executor within the host and
+        global concurrency limits.
+
+        @param host: the host the call targets, used for the per host limit.
+        @param fn: the blocking callable.
+        @param args: args to pass to fn.
+        @return: the result of fn(*args)
+        """
+        global_semaphore, host_semaphore = self._get_semaphores(host)
+        await host_semaphore.acquire()
+        try:
+            await global_semaphore.acquire()
+        except BaseException:
+            host_semaphore.release()
+            raise
+
+        def release():
+            global_semaphore.release()
+            host_semaphore.release()
+
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            release()
+            raise
+        # the blocking call can't be interrupted, a caller that stops waiting
+        # on it (e.g. a cancelled hedge) leaves it running on the executor.
+        # The permits are held until it actually returns.
+        future.add_done_callback(lambda _: self._call_soon(release))
+        return await asyncio.wrap_future(future, loop=self.loop)
+
+    def _call_soon(self, fn: Callable):
+        """Run fn on the loop thread, from any thread."""
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(fn)
+
+    def submit(self, coro: Coroutine) -> Future:
+        """Schedule a coroutine on the engine loop.
+
+        @param coro: the coroutine to run.
+        @return: a concurrent.futures.Future with the result.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def submit_blocking(self, host: str, fn: Callable, *args) -> Future:
+        """Schedule a blocking call within the concurrency limits.
+
+        @param host: the host the call targets.
+        @param fn: the blocking callable.
+        @param args: args to pass to fn.
+        @return: a concurrent.futures.Future with the result.
+        """
+        return self.submit(self.run_blocking(host, fn, *args))
+
+    def run(self, coro: Coroutine) -> Any:
+        """Sync wrapper: run a coroutine on the engine loop and wait for it.
+
+        @param coro: the coroutine to run.
+        @return: the result of the coroutine.
+        """
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("RequestEngine.run called from the engine loop.")
+        return self.submit(coro).result()
+
+    def shutdown(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.executor.shutdown(wait=False)
+        self.loop.close()
+
+
+_request_engine: Optional[RequestEngine] = None
+_request_engine_lock = threading.Lock()
+
+
+def get_request_engine() -> RequestEngine:
+    """Get the process wide request engine, starting it if needed.
+
+    @return: the shared RequestEngine.
+    """
+    global _request_engine
+    with _request_engine_lock:
+        if _request_engine is None:
+            _request_engine = RequestEngine()
+        return _request_engine
+
+
+def configure_request_engine(max_concurrency: int, max_concurrency_per_host: int):
+    """Replace the shared request engine with one using the given limits.
+
+    This should be called once at startup before any requests are made.
+    @param max_concurrency: max number of requests in flight at once.
+    @param max_concurrency_per_host: max number of requests in flight per host.
+    """
+    global _request_engine
+    with _request_engine_lock:
+        if _request_engine is not None:
+            logging.debug("replacing running request engine.")
+            _request_engine.shutdown()
+        _request_engine = RequestEngine(
+            max_concurrency=max_concurrency,
+            max_concurrency_per_host=max_concurrency_per_host,
+        )
@@ -0,0 +1,332 @@
+"""An in-memory DAG of the blocks seen by every client.
+
+Instead of walking every client's chain from head back to genesis on every
+run, headers are ingested incrementally into a BlockDag: for a new head
+only the parents we have not seen before are fetched, so once the DAG is
+warm tracking a head costs a request or two per slot. The DAG is indexed
+by root and by slot, answers lowest common ancestor (fork point) queries
+between heads in O(log n) using binary lifting, and drops everything below
+the finalized checkpoint.
+"""
+import logging
+import threading
+from typing import Iterator, Optional, Union
+
+from ..config.etb_config import ClientInstance
+from ..interfaces.client_request import BlockHeader
+from .chain_walker import HeaderChainWalker, ZERO_ROOT
+
+
+class BlockDagNode:
+    """A block in the DAG.
+
+    ancestors[k] is the root of the 2^k-th ancestor of the block, as far
+    back as the DAG goes. depth is the distance to the oldest ancestor in
+    the DAG (the root of its tree).
+    """
+
+    __slots__ = ("root", "slot", "parent_root", "depth", "ancestors", "children")
+
+    def __init__(self, root: str, slot: int, parent_root: str):
+        self.root: str = root
+        self.slot: int = slot
+        self.parent_root: str = parent_root
+        self.depth: int = 0
+        self.ancestors: list[str] = []
+        self.children: set[str] = set()
+
+    def __repr__(self):
+        return f"BlockDagNode({self.root}, slot={self.slot}, parent={self.parent_root})"
+
+
+class BlockDag:
+    """The blocks seen by all clients, indexed by root and slot.
+
+    Blocks must be added parent first, a block whose parent is not in the
+    DAG starts a new tree. Blocks in different trees have no common
+    ancestor in the DAG. All methods are thread safe.
+    """
+
+    def __init__(self):
+        self.nodes: dict[str, BlockDagNode] = {}
+        self.slots: dict[int, set[str]] = {}
+        # blocks below this slot have been pruned.
+        self.finalized_slot: int = -1
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, root: str):
+        return root in self.nodes
+
+    def get(self, root: str) -> Optional[BlockDagNode]:
+        return self.nodes.get(root)
+
+    def get_blocks_at_slot(self, slot: int) -> list[BlockDagNode]:
+        with self._lock:
+            return [self.nodes[root] for root in self.slots.get(slot, ())]
+
+    def get_leaves(self) -> list[BlockDagNode]:
+        """Get the blocks without children (the tips of every fork)."""
+        with self._lock:
+            return [node for node in self.nodes.values() if not node.children]
+
+    def add_header(self, header: BlockHeader) -> bool:
+        """Add a block to the DAG.
+
+        @param header: the block to add.
+        @return: True if the block was new.
+        """
+        with self._lock:
+            if header.root in self.nodes or header.slot < self.finalized_slot:
+                return False
+            node = BlockDagNode(header.root, header.slot, header.parent_root)
+            self._link(node)
+            self.nodes[node.root] = node
+            self.slots.setdefault(node.slot, set()).add(node.root)
+            return True
+
+    def _link(self, node: BlockDagNode):
+        # build the jump pointers from the parent's: the 2^k-th ancestor is
+        # the 2^(k-1)-th ancestor of the 2^(k-1)-th ancestor.
+        parent = self.nodes.get(node.parent_root)
+        node.ancestors = []
+        if parent is None:
+            node.depth = 0
+            return
+        parent.children.add(node.root)
+        node.depth = parent.depth + 1
+        node.ancestors.append(parent.root)
+        k = 0
+        while k < len(self.nodes[node.ancestors[k]].ancestors):
+            node.ancestors.append(self.nodes[node.ancestors[k]].ancestors[k])
+            k += 1
+
+    def _get_ancestor_at_depth(self, node: BlockDagNode, depth: int) -> BlockDagNode:
+        distance = node.depth - depth
+        k = 0
+        while distance > 0:
+            if distance & 1:
+                node = self.nodes[node.ancestors[k]]
+            distance >>= 1
+            k += 1
+        return node
+
+    def get_ancestor(self, root: str, distance: int) -> Optional[BlockDagNode]:
+        """Get the ancestor distance blocks back from a block.
+
+        @param root: the block.
+        @param distance: number of blocks to go back.
+        @return: the ancestor, None if it is not in the DAG.
+        """
+        with self._lock:
+            node = self.nodes.get(root)
+            if node is None or distance > node.depth:
+                return None
+            return self._get_ancestor_at_depth(node, node.depth - distance)
+
+    def get_common_ancestor(self, root_a: str, root_b: str) -> Optional[BlockDagNode]:
+        """Get the lowest common ancestor of two blocks, where their chains
+        fork. If one block is an ancestor of the other it is returned.
+
+        @param root_a: the first block.
+        @param root_b: the second block.
+        @return: the common ancestor, None if the DAG has none.
+        """
+        with self._lock:
+            a = self.nodes.get(root_a)
+            b = self.nodes.get(root_b)
+            if a is None or b is None:
+                return None
+            if a.depth > b.depth:
+                a = self._get_ancestor_at_depth(a, b.depth)
+            elif b.depth > a.depth:
+                b = self._get_ancestor_at_depth(b, a.depth)
+            if a is b:
+                return a
+            for k in reversed(range(len(a.ancestors))):
+                if k < len(a.ancestors) and a.ancestors[k] != b.ancestors[k]:
+                    a = self.nodes[a.ancestors[k]]
+                    b = self.nodes[b.ancestors[k]]
+            if not a.ancestors or a.ancestors[0] != b.ancestors[0]:
+                return None  # different trees.
+            return self.nodes[a.ancestors[0]]
+
+    def is_ancestor(self, ancestor_root: str, root: str) -> bool:
+        """Check if a block is an ancestor of (or the same as) another."""
+        ancestor = self.get_common_ancestor(ancestor_root, root)
+        return ancestor is not None and ancestor.root == ancestor_root
+
+    def iter_chain(self, root: str) -> Iterator[BlockDagNode]:
+        """Iterate the chain from a block back to the oldest ancestor in
+        the DAG."""
+        node = self.nodes.get(root)
+        while node is not None:
+            yield node
+            node = self.nodes.get(node.parent_root)
+
+    def prune(self, finalized_slot: int) -> int:
+        """Drop every block below the finalized slot. Blocks at or above it
+        are kept even if they do not descend from the finalized block, those
+        are the forks we are looking for.
+
+        @param finalized_slot: the slot of the finalized checkpoint.
+        @return: the number of blocks dropped.
+        """
+        with self._lock:
+            if finalized_slot <= self.finalized_slot:
+                return 0
+            self.finalized_slot = finalized_slot
+            pruned = [slot for slot in self.slots if slot < finalized_slot]
+            num_pruned = 0
+            for slot in pruned:
+                for root in self.slots.pop(slot):
+                    del self.nodes[root]
+                    num_pruned += 1
+            if num_pruned == 0:
+                return 0
+            # depths and jump pointers refer to the pruned blocks, rebuild
+            # them parent first (a parent always has a lower slot).
+            for node in self.nodes.values():
+                node.children = set()
+            for slot in sorted(self.slots):
+                for root in self.slots[slot]:
+                    self._link(self.nodes[root])
+            return num_pruned
+
+    def get_stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "blocks": len(self.nodes),
+                "leaves": len([n for n in self.nodes.values() if not n.children]),
+                "finalized_slot": self.finalized_slot,
+            }
+
+
+class BlockDagIngester:
+    """Feeds client heads into a BlockDag, fetching only the headers of the
+    blocks the DAG has not seen yet.
+
+    Heads can come from polling (ingest(client)) or from head events on
+    the beacon event stream (ingest(client, event.data["block"])).
+    """
+
+    def __init__(
+        self,
+        block_dag: BlockDag,
+        max_retries: int = 3,
+        timeout: int = 5,
+        max_walk: int = 64,
+        pipeline_depth: int = 32,
+    ):
+        """
+        @param block_dag: the DAG to add the blocks to.
+        @param max_retries: max retries for each header request.
+        @param timeout: timeout for each header request.
+        @param max_walk: max number of unseen blocks to fetch per ingest.
+        @param pipeline_depth: number of slots queried concurrently.
+        """
+        self.block_dag: BlockDag = block_dag
+        self.max_walk: int = max_walk
+        # client name -> the headers of a walk that stopped at max_walk,
+        # from its head back.
+        self.partial_walks: dict[str, list[BlockHeader]] = {}
+        self.chain_walker: HeaderChainWalker = HeaderChainWalker(
+            max_retries=max_retries, timeout=timeout, pipeline_depth=pipeline_depth
+        )
+
+    def get_header(
+        self, client: ClientInstance, block_id: str
+    ) -> Union[Exception, BlockHeader]:
+        return self.chain_walker.get_header(client, block_id)
+
+    def _is_truncated(self, walked: list[BlockHeader], max_blocks: int) -> bool:
+        """Check if a walk stopped at max_blocks before reaching a block
+        the DAG knows (or genesis)."""
+        parent_root = walked[-1].parent_root
+        return (
+            len(walked) >= max_blocks
+            and parent_root != ZERO_ROOT
+            and parent_root not in self.block_dag
+        )
+
+    def _walk(
+        self, client: ClientInstance, head: BlockHeader, max_blocks: int
+    ) -> Union[Exception, list[BlockHeader]]:
+        return self.chain_walker.walk(
+            client,
+            head,
+            is_known=self.block_dag.__contains__,
+            stop_slot=max(self.block_dag.finalized_slot, 0),
+            max_blocks=max_blocks,
+        )
+
+    def _add_chain(self, headers: list[BlockHeader]):
+        for header in reversed(headers):
+            self.block_dag.add_header(header)
+
+    def _resume_partial_walk(self, client: ClientInstance) -> Optional[Exception]:
+        """Continue the walk the last ingest for the client could not
+        finish, the chain is added once it reaches a known block.
+
+        @return: exception if the walk could not be finished (yet).
+        """
+        partial = self.partial_walks.pop(client.name, None)
+        if partial is None:
+            return None
+        # the oldest header we have is the head of this walk.
+        resumed = self._walk(client, partial[-1], self.max_walk + 1)
+        if isinstance(resumed, Exception):
+            self.partial_walks[client.name] = partial
+            return resumed
+        partial += resumed[1:]
+        if self._is_truncated(resumed, self.max_walk + 1):
+            self.partial_walks[client.name] = partial
+            return Exception(
+                f"{client.name}: {len(partial)} unseen blocks down to slot "
+                f"{partial[-1].slot} and no known ancestor yet"
+            )
+        self._add_chain(partial)
+        return None
+
+    def ingest(
+        self, client: ClientInstance, block_id: str = "head"
+    ) -> Union[Exception, str]:
+        """Add a block and its unseen ancestors to the DAG.
+
+        @param client: the client to fetch the headers from.
+        @param block_id: the block to start from.
+        @return: the root of the block, exception if it could not be fetched.
+        """
+        if block_id in self.block_dag:
+            return block_id
+
+        head = self.get_header(client, block_id)
+        if isinstance(head, Exception):
+            return head
+        if head.root in self.block_dag:
+            return head.root
+
+        # a partial chain would leave a gap we never fill, so nothing is
+        # added unless the whole unseen part of the chain was fetched. A
+        # chain longer than max_walk is kept aside and walked max_walk
+        # blocks further on every ingest until it connects.
+        error = self._resume_partial_walk(client)
+        if error is not None:
+            logging.debug(f"{client.name}: failed to walk the chain: {error}")
+            return error
+
+        unseen = self._walk(client, head, self.max_walk)
+        if isinstance(unseen, Exception):
+            logging.debug(f"{client.name}: failed to walk the chain: {unseen}")
+            return unseen
+        if self._is_truncated(unseen, self.max_walk):
+            self.partial_walks[client.name] = unseen
+            return Exception(
+                f"{client.name}: more than {self.max_walk} unseen blocks below "
+                f"{head.root}, the rest is walked on the next ingest"
+            )
+
+        self._add_chain(unseen)
+        return head.root
@@ -0,0 +1,317 @@
+"""A persistent store of the heads observed by the monitors.
+
+The monitors only ever log what they see, so once a run is over the forks
+can only be pieced together from the logs. The ChainStore records every
+head a node reports (node, slot, block root, parent root, state root,
+observed at) in a SQLite database under /data. Blocks are stored once no
+matter how many nodes or observations reference them, observations are
+append only. After a run the fork tree and the divergence of every node
+can be reconstructed from the store without querying any node (see
+src/chain_forensics.py).
+"""
+import logging
+import pathlib
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Union
+
+from ..config.etb_config import ClientInstance
+from ..interfaces.client_request import (
+    BeaconAPIgetBlockHeader,
+    BlockHeader,
+    perform_batched_request,
+)
+from .chain_walker import HeaderChainWalker, ZERO_ROOT
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blocks (
+    root TEXT PRIMARY KEY,
+    slot INTEGER NOT NULL,
+    parent_root TEXT NOT NULL,
+    state_root TEXT
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS blocks_slot ON blocks (slot);
+CREATE INDEX IF NOT EXISTS blocks_parent_root ON blocks (parent_root);
+
+CREATE TABLE IF NOT EXISTS observations (
+    node TEXT NOT NULL,
+    slot INTEGER NOT NULL,
+    block_root TEXT NOT NULL,
+    observed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS observations_slot ON observations (slot);
+CREATE INDEX IF NOT EXISTS observations_block_root ON observations (block_root);
+CREATE INDEX IF NOT EXISTS observations_node ON observations (node, observed_at);
+"""
+
+
+@dataclass(frozen=True)
+class HeadObservation:
+    """A head reported by a node."""
+
+    node: str
+    slot: int
+    block_root: str
+    observed_at: float
+
+
+class ChainStore:
+    """SQLite backed, append only store of observed heads.
+
+    Safe to share between threads, writes are serialized.
+    """
+
+    def __init__(self, path: pathlib.Path, read_only: bool = False):
+        """
+        @param path: the database file, created if it does not exist.
+        @param read_only: open an existing store for analysis only.
+        """
+        self.path: pathlib.Path = path
+        if read_only:
+            self.connection = sqlite3.connect(
+                f"file:{path}?mode=ro", uri=True, check_same_thread=False
+            )
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.connection = sqlite3.connect(path, check_same_thread=False)
+            # readers (the forensics cli) don't block the monitors.
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
+
+    def record_heads(self, heads: list[tuple[str, BlockHeader]], observed_at: Optional[float] = None):
+        """Record the heads of a set of nodes, in a single transaction.
+
+        @param heads: [(node, header)]
+        @param observed_at: when the heads were observed (time.time()), defaults to now.
+        """
+        if observed_at is None:
+            observed_at = time.time()
+        blocks = [
+            (header.root, header.slot, header.parent_root, header.state_root)
+            for _, header in heads
+        ]
+        observations = [
+            (node, header.slot, header.root, observed_at) for node, header in heads
+        ]
+        try:
+            with self._lock, self.connection:
+                self.connection.executemany(
+                    "INSERT OR IGNORE INTO blocks VALUES (?, ?, ?, ?)", blocks
+                )
+                self.connection.executemany(
+                    "INSERT INTO observations VALUES (?, ?, ?, ?)", observations
+                )
+        except sqlite3.Error as e:
+            logging.error(f"failed to record heads to {self.path}: {e}")
+
+    def record_head(self, node: str, header: BlockHeader, observed_at: Optional[float] = None):
+        self.record_heads([(node, header)], observed_at)
+
+    def _query(self, sql: str, args: tuple = ()) -> list[tuple]:
+        with self._lock:
+            return self.connection.execute(sql, args).fetchall()
+
+    def record_blocks(self, headers: list[BlockHeader]):
+        """Record blocks that were not observed as a head (e.g. the blocks
+        between two observed heads)."""
+        try:
+            with self._lock, self.connection:
+                self.connection.executemany(
+                    "INSERT OR IGNORE INTO blocks VALUES (?, ?, ?, ?)",
+                    [(h.root, h.slot, h.parent_root, h.state_root) for h in headers],
+                )
+        except sqlite3.Error as e:
+            logging.error(f"failed to record blocks to {self.path}: {e}")
+
+    def has_block(self, root: str) -> bool:
+        return len(self._query("SELECT 1 FROM blocks WHERE root = ?", (root,))) > 0
+
+    def get_block(self, root: str) -> Optional[BlockHeader]:
+        rows = self._query("SELECT * FROM blocks WHERE root = ?", (root,))
+        if not rows:
+            return None
+        return BlockHeader(*rows[0])
+
+    def get_blocks_at_slot(self, slot: int) -> list[BlockHeader]:
+        return [
+            BlockHeader(*row)
+            for row in self._query("SELECT * FROM blocks WHERE slot = ?", (slot,))
+        ]
+
+    def get_chain(self, root: str, min_slot: int = 0) -> list[BlockHeader]:
+        """Get the chain from a block back through the stored parents.
+
+        @param root: the block to start from.
+        @param min_slot: don't go below this slot.
+        @return: the headers from root back to the oldest stored ancestor.
+        """
+        rows = self._query(
+            """
+            WITH RECURSIVE chain(root, slot, parent_root, state_root) AS (
+                SELECT * FROM blocks WHERE root = ?
+                UNION ALL
+                SELECT blocks.* FROM blocks JOIN chain ON blocks.root = chain.parent_root
+                WHERE blocks.slot >= ?
+            )
+            SELECT * FROM chain ORDER BY slot DESC
+            """,
+            (root, min_slot),
+        )
+        return [BlockHeader(*row) for row in rows]
+
+    def get_forks(self) -> list[tuple[BlockHeader, list[BlockHeader]]]:
+        """Get every block with more than one child.
+
+        @return: [(parent, [children])] ordered by slot.
+        """
+        rows = self._query(
+            """
+            SELECT * FROM blocks WHERE parent_root IN (
+                SELECT parent_root FROM blocks GROUP BY parent_root HAVING COUNT(*) > 1
+            ) ORDER BY slot
+            """
+        )
+        children: dict[str, list[BlockHeader]] = {}
+        for row in rows:
+            header = BlockHeader(*row)
+            children.setdefault(header.parent_root, []).append(header)
+        forks = []
+        for parent_root, headers in children.items():
+            parent = self.get_block(parent_root)
+            if parent is None:
+                # the parent is older than anything stored, we only know its root.
+                parent = BlockHeader(parent_root, headers[0].slot - 1, "")
+            forks.append((parent, headers))
+        return sorted(forks, key=lambda fork: fork[0].slot)
+
+    def get_nodes(self) -> list[str]:
+        return [row[0] for row in self._query("SELECT DISTINCT node FROM observations ORDER BY node")]
+
+    def get_latest_heads(self, before: Optional[float] = None) -> dict[str, HeadObservation]:
+        """Get the last head observed for every node.
+
+        @param before: only consider observations before this time (time.time()).
+        @return: {node: observation}
+        """
+        if before is None:
+            before = float("inf")
+        rows = self._query(
+            """
+            SELECT node, slot, block_root, MAX(observed_at) FROM observations
+            WHERE observed_at <= ? GROUP BY node
+            """,
+            (before,),
+        )
+        return {row[0]: HeadObservation(*row) for row in rows}
+
+    def get_observations(self, node: Optional[str] = None) -> list[HeadObservation]:
+        """Get the observations, of a single node or all of them, in order.
+
+        @param node: the node, None for all nodes.
+        @return: the observations ordered by time.
+        """
+        if node is None:
+            rows = self._query("SELECT * FROM observations ORDER BY observed_at")
+        else:
+            rows = self._query(
+                "SELECT * FROM observations WHERE node = ? ORDER BY observed_at",
+                (node,),
+            )
+        return [HeadObservation(*row) for row in rows]
+
+    def get_stats(self) -> dict:
+        (num_blocks, min_slot, max_slot), = self._query(
+            "SELECT COUNT(*), MIN(slot), MAX(slot) FROM blocks"
+        )
+        (num_observations, num_nodes), = self._query(
+            "SELECT COUNT(*), COUNT(DISTINCT node) FROM observations"
+        )
+        return {
+            "blocks": num_blocks,
+            "observations": num_observations,
+            "nodes": num_nodes,
+            "min_slot": min_slot,
+            "max_slot": max_slot,
+        }
+
+
+class ChainStoreRecorder:
+    """Records the heads of the nodes to a ChainStore.
+
+    When a node's head jumped more than one block since its last recorded
+    head the blocks in between are fetched too (headers only), so the stored
+    chains have no gaps.
+    """
+
+    def __init__(
+        self,
+        chain_store: ChainStore,
+        max_retries: int = 3,
+        timeout: int = 5,
+        max_walk: int = 64,
+    ):
+        """
+        @param chain_store: the store to record to.
+        @param max_retries: max retries for each header request.
+        @param timeout: timeout for each header request.
+        @param max_walk: max number of missing blocks to fetch for a head.
+        """
+        self.chain_store: ChainStore = chain_store
+        self.max_retries: int = max_retries
+        self.timeout: int = timeout
+        self.max_walk: int = max_walk
+        self.chain_walker: HeaderChainWalker = HeaderChainWalker(
+            max_retries=max_retries, timeout=timeout
+        )
+
+    def _fill_gap(self, client: ClientInstance, head: BlockHeader):
+        if head.parent_root == ZERO_ROOT or self.chain_store.has_block(head.parent_root):
+            return
+        headers = self.chain_walker.walk(
+            client,
+            head,
+            is_known=self.chain_store.has_block,
+            max_blocks=self.max_walk,
+        )
+        if isinstance(headers, Exception):
+            logging.debug(f"{client.name}: failed to fetch the blocks below the head: {headers}")
+            return
+        self.chain_store.record_blocks(headers[1:])
+
+    def record(self, heads: dict[ClientInstance, Union[Exception, BlockHeader]]):
+        """Record the heads of the nodes, unreachable nodes are skipped.
+
+        @param heads: {client: head header or exception}
+        """
+        observed_at = time.time()
+        observed = []
+        for client, head in heads.items():
+            if isinstance(head, Exception):
+                continue
+            self._fill_gap(client, head)
+            observed.append((client.name, head))
+        self.chain_store.record_heads(observed, observed_at)
+
+    def observe(self, clients: list[ClientInstance]):
+        """Fetch the heads of the nodes and record them.
+
+        @param clients: the nodes to observe.
+        """
+        request = BeaconAPIgetBlockHeader(
+            "head", max_retries=self.max_retries, timeout=self.timeout
+        )
+        futures = perform_batched_request(request, clients)
+        self.record(
+            {
+                client: request.get_block_header(future.result())
+                for client, future in futures.items()
+            }
+        )
@@ -0,0 +1,138 @@
+"""Walk a client's chain back from its head using block headers.
+
+Walking by parent root is inherently sequential: each request needs the
+answer of the previous one. Instead the HeaderChainWalker queries the
+headers by slot (/eth/v1/beacon/headers?slot=), keeping a window of slots
+below the current one in flight on the shared RequestEngine, and stitches
+the chain together by following the parent roots through the results.
+Slots without a block (or with a block on another fork) are simply passed
+over. The walk stops at the first ancestor the caller already knows, so
+only the unseen part of the chain is fetched.
+"""
+import logging
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Optional, Union
+
+from ..config.etb_config import ClientInstance
+from ..interfaces.client_request import (
+    BeaconAPIgetBlockHeader,
+    BeaconAPIgetBlockHeaders,
+    BlockHeader,
+)
+from ..interfaces.request_engine import get_request_engine
+
+ZERO_ROOT = "0x" + "00" * 32
+
+
+class HeaderChainWalker:
+    """Fetches the headers of a chain concurrently across slot ranges."""
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        timeout: int = 5,
+        pipeline_depth: int = 32,
+    ):
+        """
+        @param max_retries: max retries for each header request.
+        @param timeout: timeout for each header request.
+        @param pipeline_depth: number of slots queried ahead of the walk.
+        """
+        self.max_retries: int = max_retries
+        self.timeout: int = timeout
+        self.pipeline_depth: int = pipeline_depth
+        self.num_requests: int = 0
+        self.num_fallbacks: int = 0
+
+    def get_header(
+        self, client: ClientInstance, block_id: str
+    ) -> Union[Exception, BlockHeader]:
+        """Get a single header by block id (head, slot or root)."""
+        request = BeaconAPIgetBlockHeader(
+            block_id, max_retries=self.max_retries, timeout=self.timeout
+        )
+        self.num_requests += 1
+        return request.get_block_header(request.perform_request(client))
+
+    def _submit_slot(
+        self, client: ClientInstance, slot: int, deadline: Optional[float]
+    ) -> tuple[BeaconAPIgetBlockHeaders, Future]:
+        request = BeaconAPIgetBlockHeaders(
+            slot=slot, max_retries=self.max_retries, timeout=self.timeout
+        )
+        self.num_requests += 1
+        future = get_request_engine().submit(
+            request.perform_request_async(client, deadline)
+        )
+        return request, future
+
+    def walk(
+        self,
+        client: ClientInstance,
+        head: BlockHeader,
+        is_known: Callable[[str], bool] = lambda root: False,
+        stop_slot: int = 0,
+        max_blocks: Optional[int] = None,
+        deadline: Optional[float] = None,
+    ) -> Union[Exception, list[BlockHeader]]:
+        """Walk the chain back from head.
+
+        @param client: the client to walk the chain of.
+        @param head: the header to start from.
+        @param is_known: returns True for a root the caller already has, the
+            walk stops at the first known ancestor.
+        @param stop_slot: don't walk below this slot.
+        @param max_blocks: max number of headers to return.
+        @param deadline: optional absolute time (time.time()) to be done by.
+        @return: the headers from the head back (excluding the known
+            ancestor), exception if a header could not be fetched.
+        """
+        start = time.monotonic()
+        headers = [head]
+        expected = head.parent_root
+        next_slot = head.slot - 1
+        in_flight: deque[tuple[int, BeaconAPIgetBlockHeaders, Future]] = deque()
+        try:
+            while (
+                expected != ZERO_ROOT
+                and not is_known(expected)
+                and (max_blocks is None or len(headers) < max_blocks)
+            ):
+                while len(in_flight) < self.pipeline_depth and next_slot >= stop_slot:
+                    in_flight.append((next_slot, *self._submit_slot(client, next_slot, deadline)))
+                    next_slot -= 1
+                if not in_flight:
+                    break  # reached stop_slot.
+
+                slot, request, future = in_flight.popleft()
+                at_slot = request.get_block_headers(future.result())
+                if isinstance(at_slot, Exception):
+                    return at_slot
+                match = [header for header in at_slot if header.root == expected]
+                if match:
+                    headers.append(match[0])
+                    expected = match[0].parent_root
+                elif at_slot:
+                    # the client only told us about a block on another fork
+                    # at this slot (it reorged under us), fall back to
+                    # fetching the parent by root to find where it is.
+                    self.num_fallbacks += 1
+                    parent = self.get_header(client, expected)
+                    if isinstance(parent, Exception):
+                        return parent
+                    headers.append(parent)
+                    expected = parent.parent_root
+                    while in_flight and in_flight[0][0] >= parent.slot:
+                        in_flight.popleft()[2].cancel()
+                    next_slot = min(next_slot, parent.slot - 1)
+        finally:
+            for _, _, future in in_flight:
+                future.cancel()
+
+        logging.debug(
+            f"{client.name}: walked {len(headers)} headers down to slot "
+            f"{headers[-1].slot} in {time.monotonic() - start:.3f}s"
+        )
+        return headers
@@ -0,0 +1,232 @@
+"""Classify the chains of the clients into forks.
+
+Every client reports its chain as a list of (block root, slot) from its
+head back. The chains are merged into a single tree of blocks (shared
+history is shared between chains) and each client is classified as
+    - canonical: its head is the tip of the canonical chain.
+    - behind: its head is an ancestor of the canonical tip (still syncing).
+    - forked: its chain diverged from the canonical chain, at the lowest
+      common ancestor of the two (if the chains overlap at all).
+The canonical chain is the one with the most client heads on it, then the
+one with the highest tip slot. Classification is linear in the total
+number of blocks reported.
+"""
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Optional, Union
+
+# (block root, slot) from the head back.
+ClientChain = list[tuple[str, Union[int, str]]]
+
+
+class ClientForkStatus(str, Enum):
+    Canonical = "canonical"
+    Behind = "behind"
+    Forked = "forked"
+
+
+@dataclass(frozen=True)
+class ClientForkClassification:
+    """Where the head of a single client is wrt the canonical chain.
+
+    blocks_behind is the distance from the head to the tip of the chain it
+    is on. fork_root/fork_slot is the block a forked chain diverged from the
+    canonical chain, None if the chains do not overlap.
+    """
+
+    client: str
+    status: ClientForkStatus
+    head_root: str
+    head_slot: int
+    chain_tip_root: str
+    blocks_behind: int = 0
+    fork_root: Optional[str] = None
+    fork_slot: Optional[int] = None
+
+
+@dataclass
+class UniqueChain:
+    """A chain that is not a prefix of any other chain, with the clients at
+    its tip and the clients behind on it."""
+
+    tip_root: str
+    tip_slot: int
+    canonical: bool
+    clients: list[str] = field(default_factory=list)
+    syncing: list[ClientForkClassification] = field(default_factory=list)
+    fork_root: Optional[str] = None
+    fork_slot: Optional[int] = None
+
+
+@dataclass
+class ForkClassification:
+    """The result of classifying the chains of all the clients."""
+
+    clients: dict[str, ClientForkClassification]
+    chains: list[UniqueChain]
+
+    def is_single_chain(self) -> bool:
+        return len(self.chains) == 1
+
+    def get_canonical_chain(self) -> Optional[UniqueChain]:
+        for chain in self.chains:
+            if chain.canonical:
+                return chain
+        return None
+
+    def get_clients_with_status(self, status: ClientForkStatus) -> list[str]:
+        return [c.client for c in self.clients.values() if c.status == status]
+
+    def get_report_lines(
+        self, clients_to_skipped_slots: Optional[dict[str, list[int]]] = None
+    ) -> list[str]:
+        """The human (and log parser) readable report.
+
+        @param clients_to_skipped_slots: optional skipped slots per client, the
+            ones of the first client on each chain are reported.
+        @return: the lines of the report.
+        """
+        lines = []
+        if len(self.chains) == 1:
+            lines.append("SINGLE_CHAIN")
+        elif len(self.chains) > 1:
+            lines.append("MULTIPLE_UNIQUE_CHAINS")
+        for chain in self.chains:
+            tip = f"tip slot: {chain.tip_slot} tip root: {chain.tip_root}"
+            if chain.canonical:
+                lines.append(f"UNIQUE CHAIN {chain.clients} canonical {tip}")
+            elif chain.fork_root is None:
+                lines.append(f"UNIQUE CHAIN {chain.clients} forked (no common ancestor) {tip}")
+            else:
+                lines.append(
+                    f"UNIQUE CHAIN {chain.clients} forked at slot: {chain.fork_slot} "
+                    f"root: {chain.fork_root} {tip}"
+                )
+            if clients_to_skipped_slots is not None:
+                first_client = (chain.clients + [c.client for c in chain.syncing])[0]
+                lines.append(f"SKIPPED SLOTS {clients_to_skipped_slots.get(first_client, [])}")
+            for behind in sorted(chain.syncing, key=lambda c: c.blocks_behind):
+                lines.append(
+                    f"SYNCING {behind.blocks_behind} blocks behind, head slot: "
+                    f"{behind.head_slot} head root: {behind.head_root} [{behind.client!r}]"
+                )
+        return lines
+
+
+def classify_forks(client_chains: dict[str, ClientChain]) -> ForkClassification:
+    """Classify the clients by the chains they are on.
+
+    @param client_chains: client name -> [(root, slot), ...] from the head back.
+    @return: the ForkClassification.
+    """
+    parents: dict[str, Optional[str]] = {}
+    slots: dict[str, int] = {}
+    children: dict[str, list[str]] = {}
+    heads: dict[str, str] = {}
+    for client, chain in client_chains.items():
+        if not chain:
+            continue
+        heads[client] = chain[0][0]
+        for i, (root, slot) in enumerate(chain):
+            parent = chain[i + 1][0] if i + 1 < len(chain) else None
+            children.setdefault(root, [])
+            slots[root] = int(slot)
+            # roots are hashes of the block, so a known parent never changes.
+            if parents.get(root) is None:
+                parents[root] = parent
+                if parent is not None:
+                    children.setdefault(parent, []).append(root)
+
+    heads_at: dict[str, int] = {}
+    for root in heads.values():
+        heads_at[root] = heads_at.get(root, 0) + 1
+
+    # walk the trees from their roots, parents before children: the depth
+    # and the number of heads on the path from the root of each block.
+    depth: dict[str, int] = {}
+    heads_on_path: dict[str, int] = {}
+    order: list[str] = []
+    stack = [root for root, parent in parents.items() if parent is None]
+    for root in stack:
+        depth[root] = 0
+        heads_on_path[root] = heads_at.get(root, 0)
+    while stack:
+        root = stack.pop()
+        order.append(root)
+        for child in children[root]:
+            depth[child] = depth[root] + 1
+            heads_on_path[child] = heads_on_path[root] + heads_at.get(child, 0)
+            stack.append(child)
+
+    def rank(root: str):
+        return heads_on_path[root], slots[root], root
+
+    # the chain of every block is the best tip below it, children first.
+    best_tip: dict[str, str] = {}
+    for root in reversed(order):
+        tips = [best_tip[child] for child in children[root]]
+        best_tip[root] = max(tips, key=rank) if tips else root
+
+    leaves = [root for root in order if not children[root]]
+    if not leaves:
+        return ForkClassification(clients={}, chains=[])
+    canonical_tip = max(leaves, key=rank)
+
+    on_canonical: set[str] = set()
+    root = canonical_tip
+    while root is not None:
+        on_canonical.add(root)
+        best_tip[root] = canonical_tip
+        root = parents[root]
+
+    # the block each chain diverged from the canonical chain at.
+    fork_points: dict[str, Optional[str]] = {}
+
+    def get_fork_point(start: str) -> Optional[str]:
+        path = []
+        root = start
+        while root is not None and root not in on_canonical and root not in fork_points:
+            path.append(root)
+            root = parents[root]
+        fork_point = fork_points.get(root, root)
+        for r in path:
+            fork_points[r] = fork_point
+        return fork_point
+
+    chains: dict[str, UniqueChain] = {}
+    for tip in sorted(set(best_tip[root] for root in heads.values()), key=rank, reverse=True):
+        chain = UniqueChain(tip_root=tip, tip_slot=slots[tip], canonical=tip == canonical_tip)
+        if not chain.canonical:
+            chain.fork_root = get_fork_point(tip)
+            if chain.fork_root is not None:
+                chain.fork_slot = slots[chain.fork_root]
+        chains[tip] = chain
+
+    classifications: dict[str, ClientForkClassification] = {}
+    for client, head in heads.items():
+        tip = best_tip[head]
+        chain = chains[tip]
+        blocks_behind = depth[tip] - depth[head]
+        if head in on_canonical:
+            status = ClientForkStatus.Canonical if blocks_behind == 0 else ClientForkStatus.Behind
+            fork_root = None
+        else:
+            status = ClientForkStatus.Forked
+            fork_root = get_fork_point(head)
+        classification = ClientForkClassification(
+            client=client,
+            status=status,
+            head_root=head,
+            head_slot=slots[head],
+            chain_tip_root=tip,
+            blocks_behind=blocks_behind,
+            fork_root=fork_root,
+            fork_slot=slots[fork_root] if fork_root is not None else None,
+        )
+        classifications[client] = classification
+        if blocks_behind == 0:
+            chain.clients.append(client)
+        else:
+            chain.syncing.append(classification)
+
+    return ForkClassification(clients=classifications, chains=list(chains.values()))
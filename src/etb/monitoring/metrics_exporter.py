@@ -0,0 +1,264 @@
+"""A Prometheus /metrics endpoint for node_watch.
+
+The monitors only log their findings, so dashboards and alerts had to
+scrape the logs. The MetricsRegistry renders metrics in the Prometheus
+text exposition format and the MetricsExporter serves them over HTTP
+(stdlib http.server, no client library needed).
+
+Metrics come from two places:
+    - gauges set by the monitors as they run (e.g. num_forks).
+    - collectors called on every scrape, which read state that is already
+      kept: the latest value of every monitor time series, the request
+      latency histograms of the client health tracker and the scheduling
+      stats of the testnet monitor.
+"""
+import logging
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+from ..interfaces.client_request import client_health_tracker
+from .testnet_monitor import TestnetMonitor
+from .time_series import time_series_store
+
+PREFIX = "node_watch"
+
+Labels = dict[str, str]
+
+
+@dataclass
+class MetricFamily:
+    """A metric and its samples, [(name suffix, labels, value)]."""
+
+    name: str
+    type: str  # gauge, counter or histogram
+    help: str
+    samples: list[tuple[str, Labels, float]] = field(default_factory=list)
+
+    def add(self, labels: Labels, value: float, suffix: str = ""):
+        self.samples.append((suffix, labels, value))
+
+
+def _format_labels(labels: Labels) -> str:
+    if len(labels) == 0:
+        return ""
+    escaped = {
+        k: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        for k, v in labels.items()
+    }
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Gauge:
+    """A gauge set directly, one value per set of label values."""
+
+    def __init__(self, name: str, help: str):
+        self.name: str = name
+        self.help: str = help
+        self.values: dict[tuple[tuple[str, str], ...], float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels: str):
+        with self._lock:
+            self.values[tuple(sorted(labels.items()))] = value
+
+    def collect(self) -> MetricFamily:
+        family = MetricFamily(self.name, "gauge", self.help)
+        with self._lock:
+            for labels, value in self.values.items():
+                family.add(dict(labels), value)
+        return family
+
+
+class MetricsRegistry:
+    """The gauges and collectors rendered on every scrape."""
+
+    def __init__(self):
+        self.gauges: dict[str, Gauge] = {}
+        self.collectors: list[Callable[[], list[MetricFamily]]] = []
+        self._lock = threading.Lock()
+
+    def gauge(self, name: str, help: str) -> Gauge:
+        """Get a gauge, created on first use."""
+        with self._lock:
+            if name not in self.gauges:
+                self.gauges[name] = Gauge(name, help)
+            return self.gauges[name]
+
+    def register_collector(self, collector: Callable[[], list[MetricFamily]]):
+        with self._lock:
+            self.collectors.append(collector)
+
+    def collect(self) -> list[MetricFamily]:
+        with self._lock:
+            gauges = list(self.gauges.values())
+            collectors = list(self.collectors)
+        families = [gauge.collect() for gauge in gauges]
+        for collector in collectors:
+            try:
+                families.extend(collector())
+            except Exception as e:
+                logging.error(f"metrics collector {collector} failed: {e}")
+        return families
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        out = ""
+        for family in self.collect():
+            out += f"# HELP {family.name} {family.help}\n"
+            out += f"# TYPE {family.name} {family.type}\n"
+            for suffix, labels, value in family.samples:
+                out += f"{family.name}{suffix}{_format_labels(labels)} {_format_value(value)}\n"
+        return out
+
+
+def collect_time_series() -> list[MetricFamily]:
+    """The latest value of every monitor time series, one gauge per metric
+    labeled by monitor and node."""
+    families: dict[str, MetricFamily] = {}
+    for (monitor, node, metric), time_series in sorted(time_series_store.get_all().items()):
+        latest = time_series.latest()
+        if latest is None:
+            continue
+        name = f"{PREFIX}_{metric}"
+        if name not in families:
+            families[name] = MetricFamily(
+                name, "gauge", f"latest {metric} reported by the monitors"
+            )
+        families[name].add({"monitor": monitor, "node": node}, latest[1])
+    return list(families.values())
+
+
+def collect_client_health() -> list[MetricFamily]:
+    """Request latency histograms and circuit breaker state per node."""
+    latency = MetricFamily(
+        f"{PREFIX}_request_latency_seconds", "histogram", "latency of requests to the nodes"
+    )
+    circuit_open = MetricFamily(
+        f"{PREFIX}_circuit_open", "gauge", "1 if requests to the node fail fast"
+    )
+    for node, health in sorted(client_health_tracker.get_instances().items()):
+        buckets, total, count = health.get_latency_histogram()
+        for bound, bucket_count in buckets:
+            latency.add({"node": node, "le": _format_value(bound)}, bucket_count, "_bucket")
+        latency.add({"node": node}, total, "_sum")
+        latency.add({"node": node}, count, "_count")
+        circuit_open.add({"node": node}, int(health.is_circuit_open()))
+    return [latency, circuit_open]
+
+
+def collect_scheduler_stats(testnet_monitor: TestnetMonitor) -> list[MetricFamily]:
+    """Runs, overruns, skips, failures and durations of every monitor action."""
+    stats = testnet_monitor.get_scheduler_stats()
+    skipped_slots = MetricFamily(
+        f"{PREFIX}_scheduler_skipped_slots_total", "counter", "slots the scheduler woke up too late for"
+    )
+    skipped_slots.add({}, stats["skipped_slots"])
+    families = [skipped_slots]
+    counters = {
+        "runs": "runs of the action",
+        "overruns": "runs that finished after their deadline",
+        "skipped": "runs not started because the previous run was still going",
+        "failures": "runs that raised an exception",
+        "timeouts": "runs that failed because they ran out of time",
+    }
+    for stat, help in counters.items():
+        family = MetricFamily(f"{PREFIX}_action_{stat}_total", "counter", help)
+        for action, action_stats in stats["actions"].items():
+            family.add({"action": action}, action_stats[stat])
+        families.append(family)
+    errors = MetricFamily(
+        f"{PREFIX}_action_errors_total", "counter", "exceptions raised by the action by type"
+    )
+    durations = MetricFamily(
+        f"{PREFIX}_action_duration_seconds", "summary", "recent durations of the action"
+    )
+    for action, action_stats in stats["actions"].items():
+        for error, count in action_stats["errors"].items():
+            errors.add({"action": action, "error": error}, count)
+        for quantile, stat in (("0.5", "p50_duration"), ("0.99", "p99_duration")):
+            if action_stats[stat] is not None:
+                durations.add({"action": action, "quantile": quantile}, action_stats[stat])
+        durations.add({"action": action}, action_stats["total_duration"], "_sum")
+        durations.add({"action": action}, action_stats["runs"], "_count")
+    families += [errors, durations]
+    for stat in ("last_duration", "max_duration"):
+        family = MetricFamily(
+            f"{PREFIX}_action_{stat}_seconds", "gauge", f"{stat.replace('_', ' ')} of the action"
+        )
+        for action, action_stats in stats["actions"].items():
+            family.add({"action": action}, action_stats[stat])
+        families.append(family)
+    return families
+
+
+class MetricsExporter:
+    """Serves a MetricsRegistry on /metrics from a background thread."""
+
+    def __init__(self, registry: MetricsRegistry, port: int, host: str = "0.0.0.0"):
+        """
+        @param registry: the metrics to serve.
+        @param port: the port to listen on.
+        @param host: the address to bind to.
+        """
+        self.registry: MetricsRegistry = registry
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = exporter.registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logging.debug(f"metrics exporter: {format % args}")
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, name="etb-metrics-exporter", daemon=True
+        )
+
+    def start(self):
+        self.thread.start()
+        logging.info(f"serving metrics on port {self.server.server_address[1]}")
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# shared by the monitors.
+metrics_registry = MetricsRegistry()
+metrics_exporter: Optional[MetricsExporter] = None
+
+
+def configure_metrics_exporter(port: int, testnet_monitor: TestnetMonitor):
+    """Start serving the node_watch metrics.
+
+    @param port: the port to serve /metrics on.
+    @param testnet_monitor: the monitor whose scheduling stats are exported.
+    """
+    global metrics_exporter
+    metrics_registry.register_collector(collect_time_series)
+    metrics_registry.register_collector(collect_client_health)
+    metrics_registry.register_collector(
+        lambda: collect_scheduler_stats(testnet_monitor)
+    )
+    metrics_exporter = MetricsExporter(metrics_registry, port)
+    metrics_exporter.start()
@@ -7,14 +7,16 @@ The metric defines:
     - report_metric: Creates a report for the metric.
 """
 import asyncio
+import time
 from abc import abstractmethod
-from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import Future
 from typing import Union, Any, Callable, Optional
 import logging
 import json
 import requests
 from ...config.etb_config import ClientInstance
 from ...interfaces.client_request import (
+    DeadlineExceeded,
     ExecutionJSONRPCRequest,
     ClientInstanceRequest,
     perform_batched_request,
@@ -24,6 +26,11 @@ from ...interfaces.client_request import (
     BeaconAPIgetIdentity,
     BeaconAPIgetBlob,
 )
+from ...interfaces.client_health import CircuitOpenError
+from ...interfaces.request_engine import get_request_engine
+from ..slot_snapshot import SlotSnapshot, SnapshotData
+from ..metrics_exporter import PREFIX, metrics_registry
+from ..time_series import TimeSeries, time_series_store
 
 """
 Consensus Monitors are meant to be standalone actions that can be performed
@@ -50,6 +57,8 @@ class ClientMetricMonitor:
     A client query should:
         return an exception if we couldn't get a response from the client.
         return Any if got a response from the client.
+    The client query may be a coroutine function (e.g. perform_request_async)
+    in which case it is run natively on the shared RequestEngine loop.
     A response_parser should give the response of the query:
         return the parsed result.
         return None if the response is invalid.
@@ -57,9 +66,23 @@ class ClientMetricMonitor:
         - results: A dictionary of results grouped by result. {ClientInstance: Any [result]}
         - unreachable_clients_connection_error: A list of clients that were unreachable.
         - invalid_response_clients: A list of clients that returned an invalid response.
+        - circuit_open_clients: A list of clients known to be down that were not queried.
+        - deadline_exceeded_clients: A list of clients we ran out of time for.
+    If a deadline is passed to run() the client query is given the deadline
+    as its second argument, and the results are partial (is_partial) if we
+    ran out of time for some clients.
+    Monitors that set snapshot_data can also be run over a SlotSnapshot
+    (run_on_snapshot), the response_parser is then applied to the snapshot's
+    responses for that data type.
+    The results don't outlive a run, so after each run the monitor records
+    them to the shared time series store (record_time_series), which the
+    reports use for trends (e.g. how long a client has been unavailable).
     A report_metric routine is implemented by the user to report the metric.
     """
 
+    # the SlotSnapshot data the response_parser understands.
+    snapshot_data: Optional[SnapshotData] = None
+
     def __init__(
         self,
         client_query: Callable[[ClientInstance], Union[Exception, Any]],
@@ -74,6 +97,8 @@ class ClientMetricMonitor:
         self.unreachable_clients_connection_error: list[ClientInstance] = []
         self.unreachable_clients_unknown_reason: list[ClientInstance] = []
         self.invalid_response_clients: list[ClientInstance] = []
+        self.circuit_open_clients: list[ClientInstance] = []
+        self.deadline_exceeded_clients: list[ClientInstance] = []
 
     def _clear_results(self):
         """clear the results of the monitor"""
@@ -82,41 +107,120 @@ class ClientMetricMonitor:
         self.unreachable_clients_connection_error = []
         self.unreachable_clients_unknown_reason = []
         self.invalid_response_clients = []
+        self.circuit_open_clients = []
+        self.deadline_exceeded_clients = []
 
-    def query_clients_for_metric(self, clients_to_monitor: list[ClientInstance]):
+    def query_clients_for_metric(
+        self, clients_to_monitor: list[ClientInstance], deadline: Optional[float] = None
+    ):
         """Query the clients for the metric.
         This will run the client_query on each client we are monitoring.
         If we get unreachable clients/invalid responses we will retry them
            until we get a valid response or we reach max_retries.
+        @param deadline: optional absolute time (time.time()) passed on to
+        the client query.
         """
-        client_futures = {}
-        with ThreadPoolExecutor(max_workers=len(clients_to_monitor)) as executor:
-            for client in clients_to_monitor:
-                client_futures[client] = executor.submit(self.client_query, client)
+        engine = get_request_engine()
+        client_futures: dict[ClientInstance, Future] = {}
+        for client in clients_to_monitor:
+            query_args = (client,) if deadline is None else (client, deadline)
+            if asyncio.iscoroutinefunction(self.client_query):
+                client_futures[client] = engine.submit(self.client_query(*query_args))
+            else:
+                client_futures[client] = engine.submit_blocking(
+                    client.ip_address, self.client_query, *query_args
+                )
         # iterate through the futures and group them by result, unreachable, invalid_response
         for client, future in client_futures.items():
-            result = future.result()
-            # connection error
-            if isinstance(result, requests.exceptions.ReadTimeout):
-                self.timeout_clients.append(client)
-                logging.debug("Timeout!")
-                continue
-            if isinstance(result, requests.exceptions.ConnectionError):
-                logging.debug("Client most likely offline!")
-                self.unreachable_clients_connection_error.append(client)
-                continue
-            if isinstance(result, Exception):
-                logging.debug("Unknown error!")
-                logging.debug(type(result))
-                self.unreachable_clients_unknown_reason.append(client)
-                continue
-            parsed_result = self.response_parser(result)
-            # parsing error
-            if parsed_result is None:
-                self.invalid_response_clients.append(client)
-                continue
-            # good response
-            self.results[client] = parsed_result
+            self._record_result(client, future.result())
+
+    def _record_result(self, client: ClientInstance, result: Any):
+        """Group the result of a client query by result, unreachable, invalid_response."""
+        # known to be down, the request was not sent.
+        if isinstance(result, CircuitOpenError):
+            self.circuit_open_clients.append(client)
+            return
+        # ran out of time for this client.
+        if isinstance(result, DeadlineExceeded):
+            self.deadline_exceeded_clients.append(client)
+            return
+        # connection error
+        if isinstance(result, requests.exceptions.ReadTimeout):
+            self.timeout_clients.append(client)
+            logging.debug("Timeout!")
+            return
+        if isinstance(result, requests.exceptions.ConnectionError):
+            logging.debug("Client most likely offline!")
+            self.unreachable_clients_connection_error.append(client)
+            return
+        if isinstance(result, Exception):
+            logging.debug("Unknown error!")
+            logging.debug(type(result))
+            self.unreachable_clients_unknown_reason.append(client)
+            return
+        parsed_result = self.response_parser(result)
+        # parsing error
+        if parsed_result is None:
+            self.invalid_response_clients.append(client)
+            return
+        # good response
+        self.results[client] = parsed_result
+
+    def collect_from_snapshot(self, snapshot: SlotSnapshot):
+        """Collect the metrics from the responses in a slot snapshot instead
+        of querying the clients."""
+        self._clear_results()
+        for client, result in snapshot.get_results(self.snapshot_data).items():
+            self._record_result(client, result)
+
+    def run_on_snapshot(self, snapshot: SlotSnapshot) -> str:
+        """Run the monitor over a slot snapshot."""
+        self.collect_from_snapshot(snapshot)
+        self.record_time_series(snapshot.collected_at)
+        return self.report_metric()
+
+    def get_queried_clients(self) -> list[ClientInstance]:
+        """Every client of the last run, whatever the outcome."""
+        return (
+            list(self.results.keys())
+            + self.timeout_clients
+            + self.unreachable_clients_connection_error
+            + self.unreachable_clients_unknown_reason
+            + self.invalid_response_clients
+            + self.circuit_open_clients
+            + self.deadline_exceeded_clients
+        )
+
+    def get_time_series(self, client_name: str, metric: str) -> TimeSeries:
+        return time_series_store.get(type(self).__name__, client_name, metric)
+
+    def record_time_series(self, observed_at: Optional[float] = None):
+        """Record the results of the last run to the time series store.
+        Every client is recorded as available (1) or not (0), monitors with
+        numeric results extend this.
+        @param observed_at: when the results were measured, defaults to now.
+        """
+        if observed_at is None:
+            observed_at = time.time()
+        for client in self.get_queried_clients():
+            self.get_time_series(client.name, "available").append(
+                1 if client in self.results else 0, observed_at
+            )
+
+    def get_availability_trends(self) -> dict[str, dict[str, float]]:
+        """Get the uptime of each client over the time series window and
+        for how long the unavailable clients have been unavailable.
+        @return: {client name: {uptime, unavailable_for}}
+        """
+        window = time_series_store.window
+        trends = {}
+        for client in self.get_queried_clients():
+            available = self.get_time_series(client.name, "available")
+            trends[client.name] = {
+                "uptime": available.mean(window),
+                "unavailable_for": round(available.duration_while(lambda v: v == 0), 1),
+            }
+        return trends
 
     def report_metric(self) -> str:
         """Report the results obtained from the measurements."""
@@ -127,25 +231,49 @@ class ClientMetricMonitor:
             out += f"Unreachable Clients: {[client.name for client in self.unreachable_clients_connection_error]}\n"
         if len(self.invalid_response_clients) > 0:
             out += f"Invalid Response Clients: {[client.name for client in self.invalid_response_clients]}\n"
+        if len(self.circuit_open_clients) > 0:
+            out += f"Circuit Open Clients: {[client.name for client in self.circuit_open_clients]}\n"
+        if self.is_partial():
+            out += f"Partial Results, Deadline Exceeded Clients: {[client.name for client in self.deadline_exceeded_clients]}\n"
         return out
 
-    def collect_metrics(self, clients_to_monitor: list[ClientInstance]):
+    def is_partial(self) -> bool:
+        """Check if we ran out of time before hearing from every client."""
+        return len(self.deadline_exceeded_clients) > 0
+
+    @staticmethod
+    def _out_of_time(deadline: Optional[float]) -> bool:
+        return deadline is not None and time.time() >= deadline
+
+    def collect_metrics(
+        self, clients_to_monitor: list[ClientInstance], deadline: Optional[float] = None
+    ):
         """Collect the metrics from the clients.
         This will run the client_query on each client we are monitoring, we retry
         until we get a valid response or we reach max_retries.
+        @param deadline: optional absolute time (time.time()) to be done by,
+        we don't start another round of queries past it.
         """
-        for _ in range(self.max_retries):
+        for attempt in range(self.max_retries):
+            if attempt > 0 and self._out_of_time(deadline):
+                # keep the results of the last round, they are all we have.
+                return
             self._clear_results()
-            self.query_clients_for_metric(clients_to_monitor)
+            self.query_clients_for_metric(clients_to_monitor, deadline)
             if (
                 len(self.unreachable_clients_connection_error) == 0
                 and len(self.invalid_response_clients) == 0
             ):
                 return
 
-    def run(self, clients_to_monitor: list[ClientInstance]) -> str:
-        """Run the monitor."""
-        self.collect_metrics(clients_to_monitor)
+    def run(
+        self, clients_to_monitor: list[ClientInstance], deadline: Optional[float] = None
+    ) -> str:
+        """Run the monitor.
+        @param deadline: optional absolute time (time.time()) to be done by.
+        """
+        self.collect_metrics(clients_to_monitor, deadline)
+        self.record_time_series()
         return self.report_metric()
 
 
@@ -212,25 +340,37 @@ class ConsensusMetricMonitor(ClientMetricMonitor):
             out += f"Unreachable Clients: {[client.name for client in self.unreachable_clients_connection_error]}\n"
         if len(self.invalid_response_clients) > 0:
             out += f"Invalid Response Clients: {[client.name for client in self.invalid_response_clients]}\n"
+        if len(self.circuit_open_clients) > 0:
+            out += f"Circuit Open Clients: {[client.name for client in self.circuit_open_clients]}\n"
+        if self.is_partial():
+            out += f"Partial Results, Deadline Exceeded Clients: {[client.name for client in self.deadline_exceeded_clients]}\n"
         return out
 
-    def collect_metrics(self, clients_to_monitor: list[ClientInstance]):
+    def collect_from_snapshot(self, snapshot: SlotSnapshot):
+        """Collect the metrics from a slot snapshot, every client's response
+        is from the same instant so there is nothing to retry."""
+        super().collect_from_snapshot(snapshot)
+        self.consensus_results = self.order_results_by_consensus()
+
+    def collect_metrics(
+        self, clients_to_monitor: list[ClientInstance], deadline: Optional[float] = None
+    ):
         """Collect the metrics from the clients.
         This will run the client_query on each client we are monitoring, we retry
         until we get consensus or we reach max_retries_for_consensus.
+        @param deadline: optional absolute time (time.time()) to be done by,
+        we don't start another round of queries past it.
         """
-        for _ in range(self.max_retries_for_consensus):
+        for attempt in range(self.max_retries_for_consensus):
+            if attempt > 0 and self._out_of_time(deadline):
+                # keep the results of the last round, they are all we have.
+                return
             self._clear_results()
-            self.query_clients_for_metric(clients_to_monitor)
+            self.query_clients_for_metric(clients_to_monitor, deadline)
             self.consensus_results = self.order_results_by_consensus()
             if self._reached_consensus():
                 return
 
-    def run(self, clients_to_monitor: list[ClientInstance]) -> str:
-        """Run the monitor."""
-        self.collect_metrics(clients_to_monitor)
-        return self.report_metric()
-
 
 ClientHead = tuple[int, str, str]
 
@@ -241,6 +381,8 @@ class HeadsMonitorExecutionAvailabilityCheck(ClientMetricMonitor):
     It will retry the query up to max_retries_for_consensus times.
     """
 
+    snapshot_data = SnapshotData.ExecutionHead
+
     def __init__(
         self, max_retries: int = 3, timeout: int = 5, max_retries_for_consensus: int = 3
     ):
@@ -255,7 +397,7 @@ class HeadsMonitorExecutionAvailabilityCheck(ClientMetricMonitor):
             payload=payload, max_retries=max_retries, timeout=timeout
         )
         super().__init__(
-            client_query=self.query.perform_request,
+            client_query=self.query.perform_request_async,
             response_parser=self._get_client_head_from_block,
             max_retries=max_retries,
         )
@@ -283,6 +425,8 @@ class HeadsMonitorExecutionAvailabilityCheck(ClientMetricMonitor):
                 "invalid_response": [],
                 "unreachable_unknown_reason": [],
                 "timeout": [],
+                "circuit_open": [],
+                "deadline_exceeded": [],
             }
         }
         if len(self.results.items()) > 0:
@@ -330,6 +474,18 @@ class HeadsMonitorExecutionAvailabilityCheck(ClientMetricMonitor):
                 }
                 for client in self.timeout_clients
             ]
+        if len(self.circuit_open_clients) > 0:
+            out["execution_availability"]["circuit_open"] = [
+                {"container": client.name, "ip": client.ip_address}
+                for client in self.circuit_open_clients
+            ]
+        if self.is_partial():
+            out["execution_availability"]["deadline_exceeded"] = [
+                {"container": client.name, "ip": client.ip_address}
+                for client in self.deadline_exceeded_clients
+            ]
+        out["execution_availability"]["trends"] = self.get_availability_trends()
+        out["execution_availability"]["partial"] = self.is_partial()
         return json.dumps(out)
 
 
@@ -339,12 +495,25 @@ class HeadsMonitor(ConsensusMetricMonitor):
     It will retry the query up to max_retries_for_consensus times.
     """
 
+    snapshot_data = SnapshotData.HeadBlock
+    # the distinct heads are forks, so this monitor sets the num_forks gauge.
+    records_num_forks: bool = True
+
     def __init__(
-        self, max_retries: int = 3, timeout: int = 5, max_retries_for_consensus: int = 3
+        self,
+        max_retries: int = 3,
+        timeout: int = 5,
+        max_retries_for_consensus: int = 3,
+        use_ssz: bool = False,
     ):
-        self.query = BeaconAPIgetBlockV2(max_retries=max_retries, timeout=timeout)
+        """
+        @param use_ssz: fetch the head blocks SSZ encoded instead of JSON.
+        """
+        self.query = BeaconAPIgetBlockV2(
+            max_retries=max_retries, timeout=timeout, ssz=use_ssz
+        )
         super().__init__(
-            client_query=self.query.perform_request,
+            client_query=self.query.perform_request_async,
             response_parser=self._get_client_head_from_block,
             max_retries_for_consensus=max_retries_for_consensus,
         )
@@ -353,23 +522,64 @@ class HeadsMonitor(ConsensusMetricMonitor):
         self, response: requests.Response
     ) -> Optional[ClientHead]:
         try:
-            block = self.query.get_block(response)
-            slot = block["slot"]
-            state_root = f'0x{block["state_root"][-8:]}'
-            graffiti = (
-                bytes.fromhex(block["body"]["graffiti"][2:])
-                .decode("utf-8")
-                .replace("\x00", "")
-            )
-            return slot, state_root, graffiti
+            block = self.query.get_block_view(response)
+            # slots are reported as they are in the JSON api.
+            slot = str(block.slot)
+            state_root = f"0x{block.state_root[-8:]}"
+            return slot, state_root, block.graffiti
         except Exception as e:
             logging.debug(f"Exception parsing response: {e}")
             return None
 
+    @staticmethod
+    def _get_head_slot(result: Any) -> int:
+        # (slot, state_root, graffiti), or just the slot for the availability check.
+        return int(result[0] if isinstance(result, tuple) else result)
+
+    def record_time_series(self, observed_at: Optional[float] = None):
+        """Also record the head slot of each client and how many slots it
+        is behind the highest head."""
+        if observed_at is None:
+            observed_at = time.time()
+        super().record_time_series(observed_at)
+        if self.records_num_forks:
+            metrics_registry.gauge(
+                f"{PREFIX}_num_forks", "number of distinct heads minus one"
+            ).set(max(len(self.consensus_results) - 1, 0), monitor=type(self).__name__)
+        head_slots = {
+            client: self._get_head_slot(result) for client, result in self.results.items()
+        }
+        if len(head_slots) == 0:
+            return
+        highest = max(head_slots.values())
+        for client, slot in head_slots.items():
+            self.get_time_series(client.name, "head_slot").append(slot, observed_at)
+            self.get_time_series(client.name, "slots_behind").append(
+                highest - slot, observed_at
+            )
+
+    def report_lagging_clients(self) -> str:
+        """Report the clients behind the highest head, for how long and how
+        far behind they were over the time series window."""
+        window = time_series_store.window
+        out = ""
+        for client in self.results:
+            slots_behind = self.get_time_series(client.name, "slots_behind")
+            latest = slots_behind.latest()
+            if latest is None or latest[1] == 0:
+                continue
+            out += (
+                f"behind: {client.name}: {int(latest[1])} slots for "
+                f"{slots_behind.duration_while(lambda v: v > 0):.0f}s "
+                f"(max {int(slots_behind.max(window))} over the last {window:.0f}s)\n"
+            )
+        return out
+
     def report_metric(self) -> str:
         """Report the results obtained from the measurements."""
         out = f"num_forks: {len(self.consensus_results) - 1}\n"
         out += super().report_metric()
+        out += self.report_lagging_clients()
         return out
 
 
@@ -379,13 +589,16 @@ class HeadsMonitorConsensusAvailabilityCheck(HeadsMonitor):
     It will retry the query up to max_retries_for_consensus times.
     """
 
+    # the heads are only compared by slot, clients at different slots are
+    # not forks. num_forks is left to the HeadsMonitor.
+    records_num_forks = False
+
     def _get_client_head_from_block(
         self, response: requests.Response
     ) -> Optional[ClientHead]:
         try:
-            block = self.query.get_block(response)
-            slot = block["slot"]
-            return slot
+            block = self.query.get_block_view(response)
+            return str(block.slot)
         except Exception as e:
             logging.debug(f"Exception parsing response: {e}")
             return None
@@ -400,6 +613,8 @@ class HeadsMonitorConsensusAvailabilityCheck(HeadsMonitor):
                 "invalid_response": [],
                 "unreachable_unknown_reason": [],
                 "timeout": [],
+                "circuit_open": [],
+                "deadline_exceeded": [],
             }
         }
         if len(self.results.items()) > 0:
@@ -447,6 +662,18 @@ class HeadsMonitorConsensusAvailabilityCheck(HeadsMonitor):
                 }
                 for client in self.timeout_clients
             ]
+        if len(self.circuit_open_clients) > 0:
+            out["consensus_availability"]["circuit_open"] = [
+                {"container": client.name, "ip": client.ip_address}
+                for client in self.circuit_open_clients
+            ]
+        if self.is_partial():
+            out["consensus_availability"]["deadline_exceeded"] = [
+                {"container": client.name, "ip": client.ip_address}
+                for client in self.deadline_exceeded_clients
+            ]
+        out["consensus_availability"]["trends"] = self.get_availability_trends()
+        out["consensus_availability"]["partial"] = self.is_partial()
         return json.dumps(out)
 
 
@@ -457,6 +684,8 @@ Checkpoints = tuple[Checkpoint, Checkpoint, Checkpoint]
 
 
 class CheckpointsMonitor(ConsensusMetricMonitor):
+    snapshot_data = SnapshotData.FinalityCheckpoints
+
     def __init__(
         self, max_retries: int = 3, timeout: int = 5, max_retries_for_consensus: int = 3
     ):
@@ -464,36 +693,59 @@ class CheckpointsMonitor(ConsensusMetricMonitor):
             max_retries=max_retries, timeout=timeout
         )
         super().__init__(
-            client_query=self.query.perform_request,
+            client_query=self.query.perform_request_async,
             response_parser=self._get_checkpoints,
             max_retries_for_consensus=max_retries_for_consensus,
         )
 
-    def _get_checkpoints(self, response: requests.Response) -> Optional[str]:
+    def _get_checkpoints(self, response: requests.Response) -> Optional[Checkpoints]:
         try:
-            # checkpoints
-            finalized_cp: tuple[int, str]
-            current_justified_cp: tuple[int, str]
-            previous_justified_cp: tuple[int, str]
-            finalized_cp = self.query.get_finalized_checkpoint(response)
-            fc_epoch = finalized_cp[0]
-            fc_root = f"0x{finalized_cp[1][-8:]}"
-            fc = (fc_epoch, fc_root)
-            current_justified_cp = self.query.get_current_justified_checkpoint(response)
-            cj_epoch = current_justified_cp[0]
-            cj_root = f"0x{current_justified_cp[1][-8:]}"
-            cj = (cj_epoch, cj_root)
-            previous_justified_cp = self.query.get_previous_justified_checkpoint(
-                response
+            checkpoints = self.query.get_checkpoints(response)
+            fc_epoch, fc_root = checkpoints.finalized
+            cj_epoch, cj_root = checkpoints.current_justified
+            pj_epoch, pj_root = checkpoints.previous_justified
+            return (
+                (fc_epoch, f"0x{fc_root[-8:]}"),
+                (cj_epoch, f"0x{cj_root[-8:]}"),
+                (pj_epoch, f"0x{pj_root[-8:]}"),
             )
-            pj_epoch = previous_justified_cp[0]
-            pj_root = f"0x{previous_justified_cp[1][-8:]}"
-            pj = (pj_epoch, pj_root)
-            return json.dumps({"fc": fc, "cj": cj, "pj": pj})
         except Exception as e:
             logging.debug(f"Exception parsing response: {e}")
             return None
 
+    def record_time_series(self, observed_at: Optional[float] = None):
+        """Also record the finalized epoch of each client and its finality
+        lag (epochs between the current justified and finalized checkpoints,
+        1 on a healthy chain)."""
+        if observed_at is None:
+            observed_at = time.time()
+        super().record_time_series(observed_at)
+        for client, (finalized, current_justified, _) in self.results.items():
+            self.get_time_series(client.name, "finalized_epoch").append(
+                finalized[0], observed_at
+            )
+            self.get_time_series(client.name, "finality_lag").append(
+                current_justified[0] - finalized[0], observed_at
+            )
+
+    def get_finality_trends(self) -> dict[str, dict]:
+        """Get the finality lag of each client over the time series window
+        and for how long its finalized checkpoint has not moved.
+        @return: {client name: {finalized_epoch, finalized_unchanged_for, finality_lag: {min, max, mean, rate}}}
+        """
+        window = time_series_store.window
+        trends = {}
+        for client in self.results:
+            finalized_epoch = self.get_time_series(client.name, "finalized_epoch")
+            trends[client.name] = {
+                "finalized_epoch": int(finalized_epoch.latest()[1]),
+                "finalized_unchanged_for": round(finalized_epoch.duration_unchanged(), 1),
+                "finality_lag": self.get_time_series(
+                    client.name, "finality_lag"
+                ).get_summary(window),
+            }
+        return trends
+
     def report_metric(self) -> str:
         """Report the results obtained from the measurements."""
         out = {
@@ -503,20 +755,22 @@ class CheckpointsMonitor(ConsensusMetricMonitor):
                 "invalid_response": [],
                 "unreachable_unknown_reason": [],
                 "timeout": [],
+                "circuit_open": [],
+                "deadline_exceeded": [],
             }
         }
         items = self.consensus_results.items()
         if len(items):
-            for clients, result in items:
-                logging.debug(f"{result} {type(result)}")
+            # the epochs are ints internally, logged as the beacon API
+            # encodes them (strings).
             out["checkpoints"]["finalization_data"] = [
                 {
-                    "finalized": json.loads(result)["fc"],
-                    "current_justified": json.loads(result)["cj"],
-                    "previous_justified": json.loads(result)["pj"],
+                    "finalized": (str(finalized[0]), finalized[1]),
+                    "current_justified": (str(current_justified[0]), current_justified[1]),
+                    "previous_justified": (str(previous_justified[0]), previous_justified[1]),
                     "clients": [client.name for client in clients],
                 }
-                for result, clients in items
+                for (finalized, current_justified, previous_justified), clients in items
             ]
         if len(self.unreachable_clients_connection_error) > 0:
             out["checkpoints"]["unreachable_connection_error"] = [
@@ -546,6 +800,18 @@ class CheckpointsMonitor(ConsensusMetricMonitor):
                 }
                 for client in self.timeout_clients
             ]
+        if len(self.circuit_open_clients) > 0:
+            out["checkpoints"]["circuit_open"] = [
+                {"container": client.name, "ip": client.ip_address}
+                for client in self.circuit_open_clients
+            ]
+        if self.is_partial():
+            out["checkpoints"]["deadline_exceeded"] = [
+                {"container": client.name, "ip": client.ip_address}
+                for client in self.deadline_exceeded_clients
+            ]
+        out["checkpoints"]["trends"] = self.get_finality_trends()
+        out["checkpoints"]["partial"] = self.is_partial()
         return json.dumps(out)
 
 
@@ -578,16 +844,26 @@ class ConsensusLayerPeersMonitor(ClientMetricMonitor):
     It will retry the query up to max_retries_for_consensus times.
     """
 
+    snapshot_data = SnapshotData.Peers
+
     def __init__(self, max_retries: int = 3, timeout: int = 5):
         self.query = BeaconAPIgetPeers(
             max_retries=max_retries, timeout=timeout, states=["connected"]
         )
         super().__init__(
-            client_query=self.query.perform_request,
+            client_query=self.query.perform_request_async,
             response_parser=self._get_client_peers,
             max_retries=max_retries,
         )
 
+    def record_time_series(self, observed_at: Optional[float] = None):
+        """Also record the number of peers of each client."""
+        if observed_at is None:
+            observed_at = time.time()
+        super().record_time_series(observed_at)
+        for client, peers in self.results.items():
+            self.get_time_series(client.name, "num_peers").append(len(peers), observed_at)
+
     def _get_client_peers(self, response: requests.Response) -> Optional[dict]:
         peers_summary = {}
         try:
@@ -609,10 +885,12 @@ class ConsensusLayerIdentityMonitor(ClientMetricMonitor):
     A monitor that reports the identity of the clients.
     """
 
+    snapshot_data = SnapshotData.Identity
+
     def __init__(self, max_retries: int = 3, timeout: int = 5):
         self.query = BeaconAPIgetIdentity(max_retries=max_retries, timeout=timeout)
         super().__init__(
-            client_query=self.query.perform_request,
+            client_query=self.query.perform_request_async,
             response_parser=self._get_peer_id,
             max_retries=max_retries,
         )
@@ -650,10 +928,26 @@ class ConsensusLayerPeeringSummary:
             max_retries=max_retries, timeout=timeout
         )
 
-    def run(self, clients_to_monitor: list[ClientInstance]) -> str:
-        """Run the monitor."""
-        self.peers_monitor.collect_metrics(clients_to_monitor)
-        self.identity_monitor.collect_metrics(clients_to_monitor)
+    def run(
+        self, clients_to_monitor: list[ClientInstance], deadline: Optional[float] = None
+    ) -> str:
+        """Run the monitor.
+        @param deadline: optional absolute time (time.time()) to be done by.
+        """
+        self.peers_monitor.collect_metrics(clients_to_monitor, deadline)
+        self.identity_monitor.collect_metrics(clients_to_monitor, deadline)
+        self.peers_monitor.record_time_series()
+        return self.report_metric(clients_to_monitor)
+
+    def run_on_snapshot(self, snapshot: SlotSnapshot) -> str:
+        """Run the monitor over a slot snapshot."""
+        self.peers_monitor.collect_from_snapshot(snapshot)
+        self.identity_monitor.collect_from_snapshot(snapshot)
+        self.peers_monitor.record_time_series(snapshot.collected_at)
+        return self.report_metric(snapshot.clients)
+
+    def report_metric(self, clients_to_monitor: list[ClientInstance]) -> str:
+        """Report the peering summary from the last collection."""
         # better summary
         # mapping to go from peer_id to ClientInstance
         peer_id_client_map: dict[str, ClientInstance] = {}
@@ -684,6 +978,11 @@ class ConsensusLayerPeeringSummary:
                 out += f"{client.name}:\n"
                 out += f"\tinbound: {inbound_peer_map[client]}\n"
                 out += f"\toutbound: {outbound_peer_map[client]}\n"
+                num_peers = self.peers_monitor.get_time_series(client.name, "num_peers")
+                window = time_series_store.window
+                out += f"\tpeers: {len(inbound_peer_map[client]) + len(outbound_peer_map[client])} (min {num_peers.min(window):.0f}, mean {num_peers.mean(window):.1f} over the last {window:.0f}s)\n"
+        if self.peers_monitor.is_partial() or self.identity_monitor.is_partial():
+            out += "Partial Results, deadline exceeded.\n"
         return out
 
 
@@ -696,12 +995,14 @@ class BlobMonitor(ConsensusMetricMonitor):
     It will retry the query up to max_retries_for_consensus times.
     """
 
+    snapshot_data = SnapshotData.BlobSidecars
+
     def __init__(
         self, max_retries: int = 3, timeout: int = 5, max_retries_for_consensus: int = 3
     ):
         self.query = BeaconAPIgetBlob(max_retries=max_retries, timeout=timeout)
         super().__init__(
-            client_query=self.query.perform_request,
+            client_query=self.query.perform_request_async,
             response_parser=self._get_blob_metadata,
             max_retries_for_consensus=max_retries_for_consensus,
         )
@@ -0,0 +1,199 @@
+"""Skipped slot analysis on bitsets.
+
+The slots a node has a block for are kept as a bitset (a python int, bit i
+is slot start_slot + i). Finding the skipped slots of a node, the slots
+missed by every node (missed proposals) and the slots only some nodes
+missed are then a handful of bitwise operations over the whole range
+instead of a membership check per slot, and run lengths and per epoch
+counts are computed from the bits directly.
+"""
+from typing import Iterable, Iterator, Optional
+
+
+class SlotBitset:
+    """A set of slots in [start_slot, end_slot) stored as the bits of an int."""
+
+    __slots__ = ("start_slot", "end_slot", "bits")
+
+    def __init__(self, start_slot: int, end_slot: int, bits: int = 0):
+        self.start_slot: int = start_slot
+        self.end_slot: int = max(end_slot, start_slot)
+        self.bits: int = bits & self._mask()
+
+    @classmethod
+    def from_slots(cls, slots: Iterable[int], start_slot: int, end_slot: int) -> "SlotBitset":
+        bits = 0
+        for slot in slots:
+            if start_slot <= slot < end_slot:
+                bits |= 1 << (slot - start_slot)
+        return cls(start_slot, end_slot, bits)
+
+    def _mask(self) -> int:
+        return (1 << (self.end_slot - self.start_slot)) - 1
+
+    def _new(self, bits: int) -> "SlotBitset":
+        return SlotBitset(self.start_slot, self.end_slot, bits)
+
+    def complement(self) -> "SlotBitset":
+        """The slots in the range that are not in the set."""
+        return self._new(~self.bits & self._mask())
+
+    def __and__(self, other: "SlotBitset") -> "SlotBitset":
+        return self._new(self.bits & other.bits)
+
+    def __or__(self, other: "SlotBitset") -> "SlotBitset":
+        return self._new(self.bits | other.bits)
+
+    def __sub__(self, other: "SlotBitset") -> "SlotBitset":
+        return self._new(self.bits & ~other.bits)
+
+    def __contains__(self, slot: int) -> bool:
+        return self.start_slot <= slot < self.end_slot and bool(
+            self.bits >> (slot - self.start_slot) & 1
+        )
+
+    def __len__(self) -> int:
+        return self.bits.bit_count()
+
+    def __iter__(self) -> Iterator[int]:
+        bits = self.bits
+        while bits:
+            lowest = bits & -bits
+            yield self.start_slot + lowest.bit_length() - 1
+            bits ^= lowest
+
+    def get_runs(self) -> list[tuple[int, int]]:
+        """Get the runs of consecutive slots in the set.
+
+        @return: [(first slot, length)]
+        """
+        runs = []
+        bits = self.bits
+        offset = 0
+        while bits:
+            # skip to the next set bit, then count the trailing ones.
+            shift = (bits & -bits).bit_length() - 1
+            bits >>= shift
+            offset += shift
+            length = (~bits & (bits + 1)).bit_length() - 1
+            runs.append((self.start_slot + offset, length))
+            bits >>= length
+            offset += length
+        return runs
+
+    def get_epoch_counts(self, slots_per_epoch: int) -> dict[int, int]:
+        """Get the number of slots in the set per epoch.
+
+        @param slots_per_epoch: slots per epoch.
+        @return: {epoch: count} for every epoch the range covers.
+        """
+        counts = {}
+        first_epoch = self.start_slot // slots_per_epoch
+        last_epoch = (self.end_slot - 1) // slots_per_epoch
+        for epoch in range(first_epoch, last_epoch + 1):
+            start = max(epoch * slots_per_epoch, self.start_slot) - self.start_slot
+            end = min((epoch + 1) * slots_per_epoch, self.end_slot) - self.start_slot
+            counts[epoch] = (self.bits >> start & ((1 << (end - start)) - 1)).bit_count()
+        return counts
+
+
+class SkippedSlotAnalysis:
+    """The skipped slots of a set of nodes over a range of slots."""
+
+    def __init__(
+        self,
+        node_slots: dict[str, Iterable[int]],
+        start_slot: int,
+        end_slot: int,
+        node_start_slots: Optional[dict[str, int]] = None,
+    ):
+        """
+        @param node_slots: {node: the slots the node has a block for}
+        @param start_slot: first slot to analyze.
+        @param end_slot: slot to stop at (exclusive).
+        @param node_start_slots: {node: first slot the node's slots cover},
+            the slots before it are unknown for the node rather than skipped.
+            Nodes not in it cover the whole range.
+        """
+        node_start_slots = node_start_slots or {}
+        self.start_slot: int = start_slot
+        self.end_slot: int = end_slot
+        self.skipped: dict[str, SlotBitset] = {}
+        missed_by_all = SlotBitset(start_slot, end_slot, -1)
+        missed_by_any = SlotBitset(start_slot, end_slot)
+        known_by_any = SlotBitset(start_slot, end_slot)
+        for node, slots in node_slots.items():
+            node_start = node_start_slots.get(node, start_slot)
+            known = SlotBitset(start_slot, end_slot, -1 << max(node_start - start_slot, 0))
+            skipped = SlotBitset.from_slots(slots, start_slot, end_slot).complement() & known
+            self.skipped[node] = skipped
+            # a slot unknown to a node is missed by all if every node that
+            # covers it missed it.
+            missed_by_all &= skipped | known.complement()
+            missed_by_any |= skipped
+            known_by_any |= known
+        # no node has a block: a missed proposal.
+        self.missed_by_all: SlotBitset = missed_by_all & known_by_any
+        # some nodes have a block, others don't.
+        self.missed_by_some: SlotBitset = missed_by_any - self.missed_by_all
+
+    @classmethod
+    def from_chains(
+        cls, node_slots: dict[str, Iterable[int]], end_slot: int
+    ) -> "SkippedSlotAnalysis":
+        """Analyze chains that only go back a number of blocks from the head,
+        each node's slots cover the range from its oldest block.
+
+        @param node_slots: {node: the slots of the blocks in the node's chain}
+        @param end_slot: slot to stop at (exclusive).
+        @return: the analysis from the oldest block of any node.
+        """
+        node_slots = {node: list(slots) for node, slots in node_slots.items()}
+        node_start_slots = {
+            node: min(slots, default=end_slot) for node, slots in node_slots.items()
+        }
+        start_slot = min(node_start_slots.values(), default=end_slot)
+        return cls(node_slots, start_slot, end_slot, node_start_slots)
+
+    def get_skipped_slots(self, node: str) -> list[int]:
+        return list(self.skipped[node])
+
+    def get_longest_run(self, node: str) -> int:
+        return max((length for _, length in self.skipped[node].get_runs()), default=0)
+
+    def get_epoch_summary(self, slots_per_epoch: int) -> dict[int, dict]:
+        """Per epoch counts of the missed slots.
+
+        @param slots_per_epoch: slots per epoch.
+        @return: {epoch: {missed_by_all, missed_by_some, nodes: {node: skipped}}}
+        """
+        missed_by_all = self.missed_by_all.get_epoch_counts(slots_per_epoch)
+        missed_by_some = self.missed_by_some.get_epoch_counts(slots_per_epoch)
+        nodes = {
+            node: skipped.get_epoch_counts(slots_per_epoch)
+            for node, skipped in self.skipped.items()
+        }
+        return {
+            epoch: {
+                "missed_by_all": missed_by_all[epoch],
+                "missed_by_some": missed_by_some[epoch],
+                "nodes": {node: counts[epoch] for node, counts in nodes.items()},
+            }
+            for epoch in missed_by_all
+        }
+
+    def as_dict(self) -> dict:
+        return {
+            "start_slot": self.start_slot,
+            "end_slot": self.end_slot,
+            "missed_by_all": list(self.missed_by_all),
+            "missed_by_some": list(self.missed_by_some),
+            "nodes": {
+                node: {
+                    "skipped": len(skipped),
+                    "longest_run": self.get_longest_run(node),
+                    "runs": skipped.get_runs(),
+                }
+                for node, skipped in self.skipped.items()
+            },
+        }
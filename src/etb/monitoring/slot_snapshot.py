@@ -0,0 +1,174 @@
+"""A per slot snapshot of the state of every node.
+
+Instead of every monitor fanning out its own requests to every node, the
+SlotSnapshotCollector fetches each kind of data (head block, finality
+checkpoints, peers, ...) at most once per slot and offset from every node,
+and the monitors are run over the resulting SlotSnapshot. Only the data
+types asked for by the monitors due at that point of the slot are fetched,
+lazily on first use, so an epoch monitor's data is only fetched on the
+slots it runs in. Requests per slot scale with (data types due x nodes)
+instead of (monitors x nodes), and the monitors run at the same offset see
+the same instant.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from enum import Enum
+from typing import Callable, Optional, Union
+
+import requests
+
+from ..config.etb_config import ClientInstance
+from ..interfaces.client_request import (
+    BeaconAPIgetBlob,
+    BeaconAPIgetBlockHeader,
+    BeaconAPIgetBlockV2,
+    BeaconAPIgetFinalityCheckpoints,
+    BeaconAPIgetIdentity,
+    BeaconAPIgetPeers,
+    ClientInstanceRequest,
+    ExecutionJSONRPCRequest,
+)
+from ..interfaces.request_engine import get_request_engine
+
+
+class SnapshotData(str, Enum):
+    """The kinds of data collected for a snapshot."""
+
+    HeadBlock = "head_block"
+    HeadHeader = "head_header"
+    FinalityCheckpoints = "finality_checkpoints"
+    Peers = "peers"
+    Identity = "identity"
+    ExecutionHead = "execution_head"
+    BlobSidecars = "blob_sidecars"
+
+
+# the response (or exception) from every client.
+SnapshotResults = dict[ClientInstance, Union[Exception, requests.Response]]
+
+
+class SlotSnapshot:
+    """The responses of every client for every data type in a slot."""
+
+    def __init__(self, slot: int, clients: list[ClientInstance], slot_offset: float = 0.0):
+        self.slot: int = slot
+        self.slot_offset: float = slot_offset
+        self.clients: list[ClientInstance] = clients
+        self.data: dict[SnapshotData, SnapshotResults] = {}
+        self.collected_at: float = time.time()
+        self.collection_time: float = 0
+
+    def get_results(self, data_type: SnapshotData) -> SnapshotResults:
+        return self.data.get(data_type, {})
+
+
+class SlotSnapshotCollector:
+    """Collects one SlotSnapshot per slot and slot offset.
+
+    A data type is collected by the first call to get_snapshot asking for
+    it in a slot at an offset, later calls for the same slot and offset
+    get the same snapshot.
+    """
+
+    def __init__(
+        self,
+        clients: list[ClientInstance],
+        get_slot: Callable[[], int],
+        max_retries: int = 3,
+        timeout: int = 5,
+        use_ssz: bool = False,
+    ):
+        """
+        @param clients: the clients to collect data from.
+        @param get_slot: returns the current slot.
+        @param max_retries: max retries for each request.
+        @param timeout: timeout for each request.
+        @param use_ssz: fetch the head block SSZ encoded.
+        """
+        self.clients: list[ClientInstance] = clients
+        self.get_slot: Callable[[], int] = get_slot
+        self.requests: dict[SnapshotData, ClientInstanceRequest] = {
+            SnapshotData.HeadBlock: BeaconAPIgetBlockV2(
+                max_retries=max_retries, timeout=timeout, ssz=use_ssz
+            ),
+            SnapshotData.HeadHeader: BeaconAPIgetBlockHeader(
+                "head", max_retries=max_retries, timeout=timeout
+            ),
+            SnapshotData.FinalityCheckpoints: BeaconAPIgetFinalityCheckpoints(
+                max_retries=max_retries, timeout=timeout
+            ),
+            SnapshotData.Peers: BeaconAPIgetPeers(
+                max_retries=max_retries, timeout=timeout, states=["connected"]
+            ),
+            SnapshotData.Identity: BeaconAPIgetIdentity(
+                max_retries=max_retries, timeout=timeout
+            ),
+            SnapshotData.ExecutionHead: ExecutionJSONRPCRequest(
+                payload={
+                    "jsonrpc": "2.0",
+                    "method": "eth_getBlockByNumber",
+                    "params": ["latest", False],
+                    "id": 1,
+                },
+                max_retries=max_retries,
+                timeout=timeout,
+            ),
+            SnapshotData.BlobSidecars: BeaconAPIgetBlob(
+                max_retries=max_retries, timeout=timeout
+            ),
+        }
+        # slot offset -> the snapshot of the current slot at that offset.
+        self.snapshots: dict[float, SlotSnapshot] = {}
+        self._lock = threading.Lock()
+
+    def get_snapshot(
+        self,
+        data_types: list[SnapshotData],
+        slot_offset: float = 0.0,
+        deadline: Optional[float] = None,
+    ) -> SlotSnapshot:
+        """Get the snapshot for the current slot at an offset, collecting
+        the data types it does not have yet.
+
+        @param data_types: the data the caller needs.
+        @param slot_offset: the offset into the slot the caller runs at.
+        @param deadline: optional absolute time (time.time()) to be done by.
+        @return: the snapshot.
+        """
+        slot = self.get_slot()
+        with self._lock:
+            snapshot = self.snapshots.get(slot_offset)
+            if snapshot is None or snapshot.slot != slot:
+                snapshot = SlotSnapshot(slot, self.clients, slot_offset)
+                self.snapshots[slot_offset] = snapshot
+            missing = [data_type for data_type in data_types if data_type not in snapshot.data]
+            if len(missing) > 0:
+                self._collect(snapshot, missing, deadline)
+            return snapshot
+
+    def _collect(
+        self,
+        snapshot: SlotSnapshot,
+        data_types: list[SnapshotData],
+        deadline: Optional[float],
+    ):
+        start = time.monotonic()
+        engine = get_request_engine()
+        futures: dict[SnapshotData, dict[ClientInstance, Future]] = {}
+        for data_type in data_types:
+            request = self.requests[data_type]
+            futures[data_type] = {
+                client: engine.submit(request.perform_request_async(client, deadline))
+                for client in self.clients
+            }
+        for data_type, client_futures in futures.items():
+            snapshot.data[data_type] = {
+                client: future.result() for client, future in client_futures.items()
+            }
+        snapshot.collection_time += time.monotonic() - start
+        logging.debug(
+            f"collected {[data_type.value for data_type in data_types]} for slot "
+            f"{snapshot.slot} at offset {snapshot.slot_offset} in {time.monotonic() - start:.3f}s"
+        )
@@ -2,12 +2,19 @@
 
 Provides abstractions to monitor testnet progress.
 """
+import json
 import logging
+import threading
 import time
+import traceback
 from abc import abstractmethod
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from enum import Enum
+from typing import Optional
 
 from ..config.etb_config import ETBConfig
+from ..interfaces.client_request import DeadlineExceeded
 
 
 class TestnetMonitorActionInterval(Enum):
@@ -22,15 +29,111 @@ class TestnetMonitorAction:
     """An abstraction for an action to perform on a testnet at some
     interval."""
 
-    def __init__(self, name: str, interval: TestnetMonitorActionInterval):
+    def __init__(
+        self,
+        name: str,
+        interval: TestnetMonitorActionInterval,
+        slot_offset: float = 0.0,
+        max_duration: Optional[float] = None,
+    ):
+        """
+        @param slot_offset: when to run within the slot, as a fraction of
+        the slot (e.g. 0.33 runs a third of the way into the slot).
+        @param max_duration: optional max seconds the action may take,
+        otherwise it may run until the end of the slot.
+        """
         self.interval: TestnetMonitorActionInterval = interval
         self.name = name
+        self.slot_offset: float = slot_offset
+        self.max_duration: Optional[float] = max_duration
+        # absolute time (time.time()) by which perform_action should return,
+        # set by the TestnetMonitor before each run.
+        self.deadline: Optional[float] = None
+
+    def get_schedule_name(self) -> str:
+        """The name of the action and when it runs, unique per schedule
+        (the same monitor may run at several offsets into the slot)."""
+        return f"{self.name}:{self.interval.name.lower()}:{self.slot_offset:g}"
 
     @abstractmethod
     def perform_action(self):
         pass
 
 
+class TestnetMonitorActionStats:
+    """Scheduling and timing stats for an action."""
+
+    def __init__(self, num_samples: int = 256):
+        """
+        @param num_samples: number of recent durations kept for the percentiles.
+        """
+        self.runs: int = 0
+        # finished after its deadline.
+        self.overruns: int = 0
+        # not started because the previous run was still going.
+        self.skipped: int = 0
+        self.failures: int = 0
+        # failures because the action ran out of time.
+        self.timeouts: int = 0
+        self.last_duration: float = 0
+        self.max_duration: float = 0
+        self.total_duration: float = 0
+        self.durations: deque[float] = deque(maxlen=num_samples)
+        # failures by exception type.
+        self.errors: dict[str, int] = {}
+        self.last_error: Optional[str] = None
+
+    def record_run(self, duration: float, error: Optional[Exception], overran: bool):
+        """Record a finished run.
+
+        @param duration: seconds the run took.
+        @param error: the exception the action raised, None if it succeeded.
+        @param overran: True if it finished after its deadline.
+        """
+        self.runs += 1
+        self.overruns += int(overran)
+        self.last_duration = duration
+        self.max_duration = max(self.max_duration, duration)
+        self.total_duration += duration
+        self.durations.append(duration)
+        if error is not None:
+            self.failures += 1
+            if isinstance(error, (TimeoutError, DeadlineExceeded)):
+                self.timeouts += 1
+            error_type = type(error).__name__
+            self.errors[error_type] = self.errors.get(error_type, 0) + 1
+            self.last_error = f"{error_type}: {error}"
+
+    def get_duration_percentile(self, percentile: float) -> Optional[float]:
+        """Get a percentile of the recent durations.
+
+        @param percentile: 0-100
+        @return: the duration, None if the action never ran.
+        """
+        if len(self.durations) == 0:
+            return None
+        samples = sorted(self.durations)
+        return samples[min(int(len(samples) * percentile / 100), len(samples) - 1)]
+
+    def as_dict(self) -> dict:
+        p50 = self.get_duration_percentile(50)
+        p99 = self.get_duration_percentile(99)
+        return {
+            "runs": self.runs,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "last_duration": round(self.last_duration, 3),
+            "max_duration": round(self.max_duration, 3),
+            "total_duration": round(self.total_duration, 3),
+            "p50_duration": None if p50 is None else round(p50, 3),
+            "p99_duration": None if p99 is None else round(p99, 3),
+            "errors": dict(self.errors),
+            "last_error": self.last_error,
+        }
+
+
 class TestnetMonitor:
     """TestnetMonitor provides useful interfaces for monitoring the progress of
     the testnet.
@@ -41,9 +144,23 @@ class TestnetMonitor:
     - wait_for_epoch: wait until a target epoch
     - slot_to_epoch: convert slot to epoch
     - epoch_to_slot: convert epoch to slot
+    - get_slot_deadline: the time by which work for a slot should be done
+    - get_action_deadline: the time by which a run of an action should be done
+
+    run() schedules the actions: each slot (or epoch) action is started at
+    its slot_offset into the slot, on its own thread, with a deadline at the
+    end of the slot (or epoch). An action that is still running when it is due again is
+    skipped (and counted), as are slots we woke up too late for, rather than
+    letting everything drift. Every run is timed and its failures captured,
+    the per action stats (p50/p99 duration, overruns, timeouts, errors) are
+    logged every epoch (get_scheduler_stats).
     """
 
-    def __init__(self, etb_config: ETBConfig):
+    def __init__(self, etb_config: ETBConfig, deadline_margin: float = 0.5):
+        """
+        @param deadline_margin: seconds before the end of a slot that
+        actions must return by.
+        """
         self.etb_config: ETBConfig = etb_config
         self.consensus_genesis_time: int = self.etb_config.genesis_time
         self.seconds_per_slot: int = (
@@ -53,7 +170,15 @@ class TestnetMonitor:
             self.etb_config.testnet_config.consensus_layer.preset_base.SLOTS_PER_EPOCH.value
         )
 
+        self.deadline_margin: float = deadline_margin
+
         self.current_slot: int = 0
+        self.skipped_slots: int = 0
+        # keyed by the action, not its name: the same monitor may be
+        # scheduled more than once.
+        self.action_stats: dict[TestnetMonitorAction, TestnetMonitorActionStats] = {}
+        self._action_futures: dict[TestnetMonitorAction, Future] = {}
+        self._stats_lock = threading.Lock()
         self.current_epoch: int = 0
 
         self.every_slot_actions: list[TestnetMonitorAction] = []
@@ -79,7 +204,50 @@ class TestnetMonitor:
         if self.consensus_genesis_time is None:
             return 0
 
-        return (int(time.time()) - self.consensus_genesis_time) // self.seconds_per_slot
+        return int((time.time() - self.consensus_genesis_time) // self.seconds_per_slot)
+
+    def get_slot_start_time(self, slot_num: int) -> float:
+        """Get the time (time.time()) at which a slot starts."""
+        return self.consensus_genesis_time + slot_num * self.seconds_per_slot
+
+    def get_action_start_time(self, slot_num: int, action: TestnetMonitorAction) -> float:
+        """Get the time (time.time()) at which an action runs in a slot."""
+        return self.get_slot_start_time(slot_num) + action.slot_offset * self.seconds_per_slot
+
+    def get_slot_deadline(self, slot_num: Optional[int] = None) -> Optional[float]:
+        """Get the time (time.time()) by which work for a slot should be done,
+        deadline_margin seconds before the next slot starts.
+
+        @param slot_num: the slot, defaults to the current slot.
+        @return: the deadline, None if we don't know the genesis time.
+        """
+        if self.consensus_genesis_time is None:
+            return None
+        if slot_num is None:
+            slot_num = self.get_slot()
+        return self.get_slot_start_time(slot_num + 1) - self.deadline_margin
+
+    def get_action_deadline(
+        self, slot_num: int, action: TestnetMonitorAction
+    ) -> Optional[float]:
+        """Get the time (time.time()) by which a run of an action started in a
+        slot should be done: the end of the slot for slot actions, the end of
+        the epoch for epoch actions, sooner if the action has a max_duration.
+
+        @param slot_num: the slot the action is started in.
+        @param action: the action.
+        @return: the deadline, None if there is none.
+        """
+        deadline = None
+        if self.consensus_genesis_time is not None:
+            last_slot = slot_num
+            if action.interval == TestnetMonitorActionInterval.EVERY_EPOCH:
+                last_slot = self.epoch_to_slot(self.slot_to_epoch(slot_num) + 1) - 1
+            deadline = self.get_slot_deadline(last_slot)
+        if action.max_duration is not None:
+            max_deadline = time.time() + action.max_duration
+            deadline = max_deadline if deadline is None else min(deadline, max_deadline)
+        return deadline
 
     def get_epoch(self) -> int:
         """Get the current epoch wrt to genesis time @return:"""
@@ -89,15 +257,26 @@ class TestnetMonitor:
         """Wait until target slot.
         @param target_slot: slot to wait for @return:
         """
-        t_delta: int = (target_slot - self.get_slot()) * self.seconds_per_slot
-        while t_delta > 0:
-            logging.debug(f"Waiting for slot {target_slot}")
-            sleep_time = min(t_delta, 60)
-            logging.debug(
-                f"Current slot: {self.get_slot()}, waiting for target slot: {target_slot}, delta: {t_delta}, sleeping for {sleep_time} seconds"
-            )
-            time.sleep(sleep_time)
-            t_delta = (target_slot - self.get_slot()) * self.seconds_per_slot
+        if self.consensus_genesis_time is None:
+            return
+        logging.debug(
+            f"Current slot: {self.get_slot()}, waiting for target slot: {target_slot}"
+        )
+        self.wait_until(self.get_slot_start_time(target_slot))
+
+    @staticmethod
+    def wait_until(target_time: float):
+        """Sleep until a wall clock time (time.time()).
+
+        The remaining time is converted to the monotonic clock once, so
+        adjustments to the wall clock while we sleep don't cause drift.
+        @param target_time: the time to wake up at.
+        """
+        wake_at = time.monotonic() + (target_time - time.time())
+        remaining = wake_at - time.monotonic()
+        while remaining > 0:
+            time.sleep(min(remaining, 60))
+            remaining = wake_at - time.monotonic()
 
     def wait_for_next_slot(self):
         self.wait_for_slot(self.get_slot() + 1)
@@ -119,22 +298,110 @@ class TestnetMonitor:
         else:
             raise Exception("Invalid action interval")
 
+    def get_scheduler_stats(self) -> dict:
+        """Scheduling stats, per action (by schedule name) and overall."""
+        with self._stats_lock:
+            return {
+                "skipped_slots": self.skipped_slots,
+                "actions": {
+                    action.get_schedule_name(): stats.as_dict()
+                    for action, stats in self.action_stats.items()
+                },
+            }
+
+    def _run_action(self, action: TestnetMonitorAction, propagate: bool = False):
+        """Run an action, recording how long it took, whether it failed and
+        whether it overran its deadline.
+
+        @param action: the action to run.
+        @param propagate: re-raise the exception the action raised (after
+        recording it) instead of logging it.
+        """
+        start = time.monotonic()
+        error = None
+        try:
+            action.perform_action()
+        except Exception as e:
+            error = e
+            if propagate:
+                raise
+            logging.error(
+                f"action {action.get_schedule_name()} failed: {type(e).__name__}: {e}"
+            )
+            logging.debug(traceback.format_exc())
+        finally:
+            self._record_run(action, time.monotonic() - start, error)
+
+    def _record_run(
+        self, action: TestnetMonitorAction, duration: float, error: Optional[Exception]
+    ):
+        """Record a finished run of an action in its stats."""
+        overran = action.deadline is not None and time.time() > action.deadline
+        with self._stats_lock:
+            self.action_stats[action].record_run(duration, error, overran)
+        if overran:
+            logging.warning(
+                f"action {action.get_schedule_name()} overran its deadline by "
+                f"{time.time() - action.deadline:.3f}s"
+            )
+
+    def _start_action(
+        self, executor: ThreadPoolExecutor, action: TestnetMonitorAction, slot: int
+    ):
+        """Start an action for a slot unless its previous run is still going."""
+        previous = self._action_futures.get(action)
+        if previous is not None and not previous.done():
+            with self._stats_lock:
+                self.action_stats[action].skipped += 1
+            logging.warning(
+                f"action {action.get_schedule_name()} is still running, skipping it for slot {slot}"
+            )
+            return
+        action.deadline = self.get_action_deadline(slot, action)
+        self._action_futures[action] = executor.submit(self._run_action, action)
+
     def run(self):
         """Optionally run the testnet monitor with actions."""
         if len(self.once_actions) > 0:
             logging.info("Performing one time actions.")
             for action in self.once_actions:
-                action.perform_action()
+                self.action_stats[action] = TestnetMonitorActionStats()
+                # a failing one time action stops the monitor.
+                self._run_action(action, propagate=True)
 
         if len(self.every_slot_actions) == 0 and len(self.every_epoch_actions) == 0:
             return
 
+        if self.consensus_genesis_time is None:
+            logging.error("No genesis time, can't schedule slot/epoch actions.")
+            return
+
+        scheduled_actions = self.every_slot_actions + self.every_epoch_actions
+        for action in scheduled_actions:
+            self.action_stats[action] = TestnetMonitorActionStats()
+
+        executor = ThreadPoolExecutor(
+            max_workers=len(scheduled_actions), thread_name_prefix="etb-action"
+        )
+        goal_slot = self.get_slot() + 1
         while True:
-            goal_slot = self.get_slot() + 1
             self.wait_for_slot(goal_slot)
+            current_slot = self.get_slot()
+            if current_slot > goal_slot:
+                with self._stats_lock:
+                    self.skipped_slots += current_slot - goal_slot
+                logging.warning(
+                    f"woke up in slot {current_slot}, skipped slots {goal_slot}-{current_slot - 1}"
+                )
+                goal_slot = current_slot
+            self.current_slot = goal_slot
             logging.info(f"Expected slot: {goal_slot}")
-            for action in self.every_slot_actions:
-                action.perform_action()
+
+            due_actions = list(self.every_slot_actions)
             if goal_slot % self.slots_per_epoch == 0:
-                for action in self.every_epoch_actions:
-                    action.perform_action()
+                due_actions += self.every_epoch_actions
+                logging.info(json.dumps({"scheduler": self.get_scheduler_stats()}))
+            for action in sorted(due_actions, key=lambda a: a.slot_offset):
+                self.wait_until(self.get_action_start_time(goal_slot, action))
+                self._start_action(executor, action, goal_slot)
+            goal_slot += 1
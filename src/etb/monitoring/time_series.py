@@ -0,0 +1,195 @@
+"""Bounded time series of monitor results.
+
+Every monitor run only reports the current instant. A TimeSeries keeps the
+last `capacity` samples of a single metric of a single node in a ring
+buffer backed by two arrays (timestamps and values), so appending is O(1)
+and memory stays constant no matter how long the testnet runs. Windowed
+queries (min/max/mean/rate over the last N seconds) and durations (how
+long has a condition held) let the monitors report trends such as how
+long a node has been behind or how finality progressed over the last
+epochs.
+
+Series are kept in a TimeSeriesStore keyed by (monitor, node, metric).
+"""
+import threading
+import time
+from array import array
+from typing import Callable, Iterator, Optional
+
+# (monitor, node, metric)
+TimeSeriesKey = tuple[str, str, str]
+
+
+class TimeSeries:
+    """A fixed capacity ring buffer of (timestamp, value) samples."""
+
+    def __init__(self, capacity: int = 1024):
+        """
+        @param capacity: max number of samples kept, the oldest are overwritten.
+        """
+        self.capacity: int = capacity
+        self.timestamps: array = array("d", bytes(8 * capacity))
+        self.values: array = array("d", bytes(8 * capacity))
+        self.size: int = 0
+        # index the next sample is written to.
+        self.head: int = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.size
+
+    def append(self, value: float, timestamp: Optional[float] = None):
+        """Add a sample.
+
+        @param value: the value of the metric.
+        @param timestamp: when it was measured (time.time()), defaults to now.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        with self._lock:
+            self.timestamps[self.head] = timestamp
+            self.values[self.head] = value
+            self.head = (self.head + 1) % self.capacity
+            self.size = min(self.size + 1, self.capacity)
+
+    def latest(self) -> Optional[tuple[float, float]]:
+        """The newest (timestamp, value), None if there are no samples."""
+        with self._lock:
+            if self.size == 0:
+                return None
+            i = (self.head - 1) % self.capacity
+            return self.timestamps[i], self.values[i]
+
+    def iter_newest_first(self, window: Optional[float] = None, now: Optional[float] = None) -> Iterator[tuple[float, float]]:
+        """Iterate the samples from newest to oldest.
+
+        @param window: only samples from the last window seconds, None for all.
+        @param now: the end of the window, defaults to now.
+        """
+        with self._lock:
+            indexes = [(self.head - 1 - i) % self.capacity for i in range(self.size)]
+            samples = [(self.timestamps[i], self.values[i]) for i in indexes]
+        if window is None:
+            yield from samples
+            return
+        start = (time.time() if now is None else now) - window
+        for timestamp, value in samples:
+            if timestamp < start:
+                return
+            yield timestamp, value
+
+    def _window_values(self, window: Optional[float], now: Optional[float]) -> list[float]:
+        return [value for _, value in self.iter_newest_first(window, now)]
+
+    def min(self, window: Optional[float] = None, now: Optional[float] = None) -> Optional[float]:
+        return min(self._window_values(window, now), default=None)
+
+    def max(self, window: Optional[float] = None, now: Optional[float] = None) -> Optional[float]:
+        return max(self._window_values(window, now), default=None)
+
+    def mean(self, window: Optional[float] = None, now: Optional[float] = None) -> Optional[float]:
+        values = self._window_values(window, now)
+        if len(values) == 0:
+            return None
+        return sum(values) / len(values)
+
+    def rate(self, window: Optional[float] = None, now: Optional[float] = None) -> Optional[float]:
+        """The change of the value per second over the window.
+
+        @return: the rate, None with fewer than two samples in the window.
+        """
+        samples = list(self.iter_newest_first(window, now))
+        if len(samples) < 2:
+            return None
+        (last_t, last_v), (first_t, first_v) = samples[0], samples[-1]
+        if last_t == first_t:
+            return None
+        return (last_v - first_v) / (last_t - first_t)
+
+    def duration_while(self, predicate: Callable[[float], bool], now: Optional[float] = None) -> float:
+        """How long the predicate has held for the newest samples.
+
+        @param predicate: the condition on the value.
+        @param now: the current time, defaults to now.
+        @return: seconds since the first sample of the current streak, 0 if
+            the newest sample does not satisfy the predicate.
+        """
+        streak_start = None
+        for timestamp, value in self.iter_newest_first():
+            if not predicate(value):
+                break
+            streak_start = timestamp
+        if streak_start is None:
+            return 0.0
+        return (time.time() if now is None else now) - streak_start
+
+    def duration_unchanged(self, now: Optional[float] = None) -> float:
+        """How long the value has stayed at its newest value."""
+        latest = self.latest()
+        if latest is None:
+            return 0.0
+        return self.duration_while(lambda value: value == latest[1], now)
+
+    def get_summary(self, window: Optional[float] = None, now: Optional[float] = None) -> dict[str, Optional[float]]:
+        return {
+            "min": self.min(window, now),
+            "max": self.max(window, now),
+            "mean": self.mean(window, now),
+            "rate": self.rate(window, now),
+        }
+
+
+class TimeSeriesStore:
+    """One TimeSeries per (monitor, node, metric), created on first use."""
+
+    def __init__(self, capacity: int = 1024, window: float = 3840):
+        """
+        @param capacity: samples kept per series.
+        @param window: default window in seconds for the trends the monitors report.
+        """
+        self.capacity: int = capacity
+        self.window: float = window
+        self.series: dict[TimeSeriesKey, TimeSeries] = {}
+        self._lock = threading.Lock()
+
+    def get(self, monitor: str, node: str, metric: str) -> TimeSeries:
+        key = (monitor, node, metric)
+        with self._lock:
+            if key not in self.series:
+                self.series[key] = TimeSeries(self.capacity)
+            return self.series[key]
+
+    def record(self, monitor: str, node: str, metric: str, value: float, timestamp: Optional[float] = None):
+        self.get(monitor, node, metric).append(value, timestamp)
+
+    def get_all(self) -> dict[TimeSeriesKey, TimeSeries]:
+        with self._lock:
+            return dict(self.series)
+
+    def get_nodes(self, monitor: str, metric: str) -> dict[str, TimeSeries]:
+        """Get the series of a metric of a monitor for every node."""
+        with self._lock:
+            return {
+                node: series
+                for (m, node, name), series in self.series.items()
+                if m == monitor and name == metric
+            }
+
+    def clear(self):
+        with self._lock:
+            self.series = {}
+
+
+# shared by every monitor.
+time_series_store = TimeSeriesStore()
+
+
+def configure_time_series_store(capacity: int, window: float):
+    """Reconfigure the shared time series store, existing series are dropped.
+
+    @param capacity: samples kept per series.
+    @param window: default window in seconds for the reported trends.
+    """
+    time_series_store.clear()
+    time_series_store.capacity = capacity
+    time_series_store.window = window
@@ -1,52 +1,90 @@
+import itertools
 import logging
+from concurrent.futures import ThreadPoolExecutor
 import requests
 from etb.interfaces.client_request import (
     perform_batched_request,
+    configure_immutable_object_cache,
+    immutable_object_cache,
     BeaconAPIgetBlockV2,
+    BeaconAPIgetFinalityCheckpoints,
     BeaconAPIgetValidators,
 )
+from etb.monitoring.block_dag import BlockDag, BlockDagIngester, ZERO_ROOT
+from etb.monitoring.fork_classification import classify_forks
+from etb.monitoring.skipped_slots import SkippedSlotAnalysis
 
-from etb.config.etb_config import ETBConfig, ClientInstance
+from etb.config.etb_config import ETBConfig, ClientInstance, FilesConfig
 from pathlib import Path
+from typing import Optional
 
-from multiprocessing import Pool
+
+
+# blocks seen by every client, kept between passes so each pass only
+# fetches the headers of blocks that are new since the last one.
+block_dag = BlockDag()
+block_dag_ingester = BlockDagIngester(block_dag, max_retries=2, timeout=15)
+
+# number of blocks back from the head that are compared between clients.
+CHAIN_WINDOW = 10
 
 
 def get_all_slots_per_client(client):
-    p = "head"
-    parents_and_slots = []
-    # We are not checking for forks in teku
-    # This is a temporary if statement to avoid querying for teku, their api is super slow and will extend the rollout unnecessarily
-    if "teku" in client.collection_name :
-        return []
-    try:
-        i = 10
-        while (i != 0):
-            b = BeaconAPIgetBlockV2(p, max_retries= 2, timeout=15)
-            response = b.perform_request(client)
-            data = b.get_block(response)
-            print(data)
-            p = data['parent_root']
-            s = data['slot']
-            print(f"{client.collection_name}: {[p, s]}")
-            parents_and_slots.append([p, s])
-            if (p == '0x0000000000000000000000000000000000000000000000000000000000000000' or s == 0):
-                # print("End of block has been reached")
-                break
-            i -= 1
-    except Exception as e:
-        print(e)
+    roots_and_slots = []
+    # only the headers of unseen blocks are fetched, so this is cheap
+    # enough to include teku again.
+    head = block_dag_ingester.ingest(client)
+    if isinstance(head, Exception):
+        print(head)
         # It could be possible that we retrieve a response for one slot but not the next slot because of connection issues, this might produce an incomplete chain, therefore we just return the empty chain. No point requering after 15 seconds
         return []
-    return [client.collection_name, parents_and_slots]
+    for block in itertools.islice(block_dag.iter_chain(head), CHAIN_WINDOW):
+        # slots are compared as strings further down.
+        roots_and_slots.append([block.root, str(block.slot)])
+    print(f"{client.collection_name}: {roots_and_slots}")
+    return [client.collection_name, head, roots_and_slots]
+
+def prune_block_dag(clients):
+    """Drop the blocks below the oldest finalized checkpoint of the clients."""
+    finalized_slots = []
+    for client in clients:
+        request = BeaconAPIgetFinalityCheckpoints(max_retries=2, timeout=15)
+        checkpoint = request.get_finalized_checkpoint(request.perform_request(client))
+        if isinstance(checkpoint, Exception):
+            # a client we can't reach must not have its chain pruned.
+            return
+        _epoch, root = checkpoint
+        if root == ZERO_ROOT:
+            return
+        header = block_dag_ingester.get_header(client, root)
+        if isinstance(header, Exception):
+            return
+        finalized_slots.append(header.slot)
+    if finalized_slots:
+        pruned = block_dag.prune(min(finalized_slots))
+        print(f"BLOCK_DAG: pruned {pruned} blocks below slot {min(finalized_slots)}")
+
+def print_fork_points(clients_and_heads):
+    """Print where the chains of clients with different heads fork."""
+    heads_to_clients = {}
+    for client, head in clients_and_heads:
+        heads_to_clients.setdefault(head, []).append(client)
+    heads = list(heads_to_clients.keys())
+    for i, head_a in enumerate(heads):
+        for head_b in heads[i + 1:]:
+            fork = block_dag.get_common_ancestor(head_a, head_b)
+            if fork is None:
+                print(f"FORK_POINT: unknown {heads_to_clients[head_a]} {heads_to_clients[head_b]}")
+            elif fork.root not in (head_a, head_b):
+                print(f"FORK_POINT: {fork.slot} {fork.root} {heads_to_clients[head_a]} {heads_to_clients[head_b]}")
 
 def calculate_slots_skipped_by_all_clients(clients_and_data, highest_slot):
-    clients_to_skipped_slots = {}
-    for [client, data] in clients_and_data:
-        slots = [slot for [_parent, slot] in data]
-        skipped_slots = [num for num in range(1, int(highest_slot)) if str(num) not in slots]
-        clients_to_skipped_slots[client] =  skipped_slots
-    return clients_to_skipped_slots
+    clients_to_slots = {
+        client: [int(slot) for [_root, slot] in data] for [client, data] in clients_and_data
+    }
+    # the chains only go back CHAIN_WINDOW blocks, the slots before the
+    # oldest block of a client are unknown for it rather than skipped.
+    return SkippedSlotAnalysis.from_chains(clients_to_slots, int(highest_slot))
 
 def group_together_clients_with_similar_slots_or_chains(clients_and_data_str, mode="chain"):
     def seen_before(key, seen):
@@ -63,7 +101,7 @@ def group_together_clients_with_similar_slots_or_chains(clients_and_data_str, mo
             seen_before(slots_str, seen)
     return seen
 
-def rehash_parent_hash(clients_and_data): # returns the clients_and_data with rehashed parents and the hash map for rehashing
+def rehash_parent_hash(clients_and_data): # returns the clients_and_data with rehashed roots and the hash map for rehashing
     count = 1
     new_hash = {}
     clients_and_data_rehashed = []
@@ -99,83 +137,46 @@ def calculate_highest_slot_across_all_chains(clients_and_data):
                 highest = slot
     return highest
 
+# the walks are threads (not a process pool) so they all share the
+# immutable object cache. They block on requests scheduled on the shared
+# request engine, so they must not run on its executor. Created with the
+# first pass and kept for the following ones.
+walk_executor: Optional[ThreadPoolExecutor] = None
+
+def get_walk_executor(clients) -> ThreadPoolExecutor:
+    global walk_executor
+    if walk_executor is None:
+        walk_executor = ThreadPoolExecutor(
+            max_workers=max(len(clients), 1), thread_name_prefix="etb-fork-detector"
+        )
+    return walk_executor
+
 def get_all_slots(clients):
-    clients_and_data = []
-    with Pool(5) as p:
-        clients_and_data = p.map(get_all_slots_per_client, clients)
-    return list(filter(lambda client_and_data: client_and_data != [], clients_and_data))
-
-def calculate_real_forks_and_unsynced_children(str_parents_to_clients):
-    parents_chains = list(str_parents_to_clients.keys())
-    parents_chains_sorted = sorted(parents_chains, key=lambda x: len(x))
-    real_forks = {}
-    parents = []
-    # print(f"parent_chains_sorted: {parents_chains_sorted}")
-    for c1 in parents_chains_sorted:
-        c1_is_parent = True
-        for c2 in parents_chains_sorted:
-            start = c1.find(" ")
-            end = c1.find(" ", start + 1) + 1
-            # We can't use this to separate the skipped slots because we can't assume one chain of skipped slots is the child of another based on one skipped slot.
-            if c1 != c2 and c1 != "" and c2 != "" and c1[start:end] in c2: # if we add `and c1[start:end] != ""` then we will consider chains with nothing in them a definite fork
-                c1_is_parent = False
-                if c1 in real_forks:
-                    real_forks[c2] = {c1: real_forks[c1]}
-                    print(f"{real_forks}")
-                else:
-                    real_forks[c2] = c1
-        if c1_is_parent:
-            parents.append(c1)
-    
-    # print(parents)
-    # print()
-    unsynced_chains_tree = {}
-    for p in parents:
-        if p in real_forks:
-            unsynced_chains_tree[p] = real_forks[p]
-        else:
-            unsynced_chains_tree[p] = ""
-    # print(f"unsynced_chains_tree: {unsynced_chains_tree}")
-    return unsynced_chains_tree
-
-
-def print_real_chains_and_unsynced_children(str_parents_to_clients, unsynced_chains_tree, clients_to_skipped_slots):
-    def recursive_print(chain_tree, level):
-        if chain_tree == "":
-            return 0
-        if isinstance(chain_tree, str):
-            start = chain_tree.find(" ")
-            end = chain_tree.find(" ", start + 1) + 1
-            print(f"SYNCING {level} latest parent hash: {chain_tree[start:end]} {str_parents_to_clients[chain_tree]}")
-            return 0
-        for chain in chain_tree.keys():
-            start = chain.find(" ")
-            end = chain.find(" ", start + 1) + 1
-            print(f"SYNCING {level} latest parent hash: {chain[start:end]} {str_parents_to_clients[chain]}")
-            return recursive_print(chain_tree[chain], level + "--")
-    if (len(unsynced_chains_tree.keys()) == 1):
-        print(f"SINGLE_CHAIN")
-    if (len(unsynced_chains_tree.keys()) > 1):
-        print(f"MULTIPLE_UNIQUE_CHAINS")
-    for chain in unsynced_chains_tree.keys():
-        print(f"UNIQUE CHAIN {str_parents_to_clients[chain]} {chain}")
-        print(f"SKIPPED SLOTS {clients_to_skipped_slots[str_parents_to_clients[chain][0]]}")
-        recursive_print(unsynced_chains_tree[chain], "--------")
+    clients_and_data = list(get_walk_executor(clients).map(get_all_slots_per_client, clients))
+    print(f"BLOCK_CACHE: {immutable_object_cache.get_stats()}")
+    print(f"BLOCK_DAG: {block_dag.get_stats()}")
+    clients_and_data = list(filter(lambda client_and_data: client_and_data != [], clients_and_data))
+    print_fork_points([[client, head] for [client, head, _data] in clients_and_data])
+    return [[client, data] for [client, _head, data] in clients_and_data]
 
 def print_all_data_for_every_client():
     logger = logging.getLogger()
     etb = ETBConfig(Path("/data/etb-config.yaml"))
     clients = etb.get_client_instances()
 
+    prune_block_dag(clients)
     clients_and_data = get_all_slots(clients)
     if clients_and_data == []:
         print("FAIL: No data retrieved")
     highest_slot = calculate_highest_slot_across_all_chains(clients_and_data)
-    clients_to_skipped_slots = calculate_slots_skipped_by_all_clients(clients_and_data, highest_slot)
+    skipped_slots = calculate_slots_skipped_by_all_clients(clients_and_data, highest_slot)
+    clients_to_skipped_slots = {client: skipped_slots.get_skipped_slots(client) for client in skipped_slots.skipped}
 
     print("Clients and their skipped slots")
     for client in clients_to_skipped_slots:
-        print(f'SKIPPED_SLOTS: {client} {clients_to_skipped_slots[client]}')
+        print(f'SKIPPED_SLOTS: {client} {clients_to_skipped_slots[client]} longest run: {skipped_slots.get_longest_run(client)}')
+    print(f'MISSED_BY_ALL: {list(skipped_slots.missed_by_all)}')
+    print(f'MISSED_BY_SOME: {list(skipped_slots.missed_by_some)}')
     # str_slots_to_clients = group_together_similar_slots(clients_to_slots)
 
     print("Mapping from old hash to new hash")
@@ -186,12 +187,13 @@ def print_all_data_for_every_client():
     
     clients_and_data_rehashed_str = stringify_data(clients_and_data_rehashed)
     str_parents_to_clients = group_together_clients_with_similar_slots_or_chains(clients_and_data_rehashed_str, "chain")
-    print("Clients with matching chains, chains are in order and the right most hash is the root hash")
+    print("Clients with matching chains, chains are in order and the right most hash is the oldest block")
     for str_parents_to_client in str_parents_to_clients.items():
         print(f'POTENTIAL_FORKS: {str_parents_to_client}')
     print("====================================================================================\n")
-    unsynced_chains_tree = calculate_real_forks_and_unsynced_children(str_parents_to_clients)
-    print_real_chains_and_unsynced_children(str_parents_to_clients, unsynced_chains_tree, clients_to_skipped_slots)
+    classification = classify_forks(dict(clients_and_data))
+    for line in classification.get_report_lines(clients_to_skipped_slots):
+        print(line)
 
 
 
@@ -204,6 +206,12 @@ arg_parser.add_argument("-i", "--interval", help="How often do you want fork det
 arg = arg_parser.parse_args()
 wait_time = int(arg.interval)
 
+# blocks by root never change, keep them around between passes (and runs).
+configure_immutable_object_cache(
+    max_size_bytes=256 * 1024 * 1024,
+    persist_dir=FilesConfig().beacon_object_cache_dir,
+)
+
 start = time.time()
 while (True):
     if (time.time() - start > wait_time):
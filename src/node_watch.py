@@ -11,17 +11,19 @@ import json
 import pathlib
 import random
 import re
+import threading
 import time
 from abc import abstractmethod
 from typing import Union, Any, Type, Optional
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
-from concurrent.futures import ThreadPoolExecutor
 
 from etb.common.consensus import ConsensusFork, Epoch
 from etb.common.utils import create_logger
-from etb.config.etb_config import ETBConfig, ClientInstance, get_etb_config
+from etb.config.defaults import DEFAULT_NODE_WATCH_METRICS_PORT
+from etb.config.etb_config import ETBConfig, ClientInstance, FilesConfig, get_etb_config
 from etb.monitoring.monitors.consensus_monitors import (
     HeadsMonitor,
     CheckpointsMonitor,
@@ -30,16 +32,71 @@ from etb.monitoring.monitors.consensus_monitors import (
     HeadsMonitorExecutionAvailabilityCheck,
     HeadsMonitorConsensusAvailabilityCheck
 )
+from etb.monitoring.chain_store import ChainStore, ChainStoreRecorder
+from etb.monitoring.chain_walker import HeaderChainWalker
+from etb.monitoring.skipped_slots import SkippedSlotAnalysis
+from etb.monitoring.slot_snapshot import SlotSnapshot, SlotSnapshotCollector, SnapshotData
+from etb.monitoring.metrics_exporter import configure_metrics_exporter
+from etb.monitoring.time_series import configure_time_series_store
 from etb.monitoring.testnet_monitor import (
     TestnetMonitor,
     TestnetMonitorAction,
     TestnetMonitorActionInterval,
 )
 
+from etb.interfaces.client_request import (
+    BeaconAPIgetBlockHeader,
+    BlockHeader,
+    client_health_tracker,
+    client_session_pool,
+    configure_client_health_tracker,
+    configure_client_session_pool,
+    configure_request_coalescing,
+    perform_batched_request,
+    request_coalescer,
+)
+from etb.interfaces.request_engine import (
+    configure_request_engine,
+    get_request_engine,
+)
+from etb.interfaces.beacon_event_stream import (
+    BeaconEvent,
+    BeaconEventStream,
+    BeaconEventTopic,
+)
 from etb.interfaces.external.ethdo import Ethdo
 
 
-class HeadsMonitorAction(TestnetMonitorAction):
+class SnapshotMonitorAction(TestnetMonitorAction):
+    """An action that runs a monitor either by querying the clients itself
+    or, when given a SlotSnapshotCollector, over the shared slot snapshot."""
+
+    def __init__(
+        self,
+        name: str,
+        interval: TestnetMonitorActionInterval,
+        client_instances: list[ClientInstance],
+        slot_snapshot_collector: Optional[SlotSnapshotCollector],
+        snapshot_data: list[SnapshotData],
+    ):
+        super().__init__(name=name, interval=interval)
+        self.instances_to_monitor = client_instances
+        self.slot_snapshot_collector = slot_snapshot_collector
+        # only fetched in the slots this action runs in.
+        self.snapshot_data: list[SnapshotData] = snapshot_data
+
+    def get_snapshot(self) -> SlotSnapshot:
+        return self.slot_snapshot_collector.get_snapshot(
+            self.snapshot_data, slot_offset=self.slot_offset, deadline=self.deadline
+        )
+
+    def run_monitor(self, monitor) -> str:
+        if self.slot_snapshot_collector is None:
+            return monitor.run(self.instances_to_monitor, deadline=self.deadline)
+        return monitor.run_on_snapshot(self.get_snapshot())
+
+
+class HeadsMonitorAction(SnapshotMonitorAction):
     def __init__(
         self,
         client_instances: list[ClientInstance],
@@ -47,21 +104,29 @@ class HeadsMonitorAction(TestnetMonitorAction):
         timeout: int,
         max_retries_for_consensus: int,
         interval: TestnetMonitorActionInterval,
+        use_ssz: bool = False,
+        slot_snapshot_collector: Optional[SlotSnapshotCollector] = None,
     ):
-        super().__init__(name="head_slots", interval=interval)
+        super().__init__(
+            name="head_slots",
+            interval=interval,
+            client_instances=client_instances,
+            slot_snapshot_collector=slot_snapshot_collector,
+            snapshot_data=[SnapshotData.HeadBlock],
+        )
         self.get_heads_monitor = HeadsMonitor(
             max_retries=max_retries,
             timeout=timeout,
             max_retries_for_consensus=max_retries_for_consensus,
+            use_ssz=use_ssz,
         )
-        self.instances_to_monitor = client_instances
 
     def perform_action(self):
         logging.info("heads:")
-        logging.info(f"{self.get_heads_monitor.run(self.instances_to_monitor)}\n")
+        logging.info(f"{self.run_monitor(self.get_heads_monitor)}\n")
 
 
-class CheckpointsMonitorAction(TestnetMonitorAction):
+class CheckpointsMonitorAction(SnapshotMonitorAction):
     def __init__(
         self,
         client_instances: list[ClientInstance],
@@ -69,21 +134,27 @@ class CheckpointsMonitorAction(TestnetMonitorAction):
         timeout: int,
         max_retries_for_consensus: int,
         interval: TestnetMonitorActionInterval,
+        slot_snapshot_collector: Optional[SlotSnapshotCollector] = None,
     ):
-        super().__init__(name="checkpoints", interval=interval)
+        super().__init__(
+            name="checkpoints",
+            interval=interval,
+            client_instances=client_instances,
+            slot_snapshot_collector=slot_snapshot_collector,
+            snapshot_data=[SnapshotData.FinalityCheckpoints],
+        )
         self.get_checkpoints_monitor = CheckpointsMonitor(
             max_retries=max_retries,
             timeout=timeout,
             max_retries_for_consensus=max_retries_for_consensus,
         )
-        self.instances_to_monitor = client_instances
 
     def perform_action(self):
         logging.info("checkpoints:")
-        logging.info(f"{self.get_checkpoints_monitor.run(self.instances_to_monitor)}\n")
+        logging.info(f"{self.run_monitor(self.get_checkpoints_monitor)}\n")
 
 
-class PeersMonitorAction(TestnetMonitorAction):
+class PeersMonitorAction(SnapshotMonitorAction):
     def __init__(
         self,
         client_instances: list[ClientInstance],
@@ -91,21 +162,27 @@ class PeersMonitorAction(TestnetMonitorAction):
         timeout: int,
         max_retries_for_consensus: int,  # not used.
         interval: TestnetMonitorActionInterval,
+        slot_snapshot_collector: Optional[SlotSnapshotCollector] = None,
     ):
-        super().__init__(name="peer-monitor", interval=interval)
+        super().__init__(
+            name="peer-monitor",
+            interval=interval,
+            client_instances=client_instances,
+            slot_snapshot_collector=slot_snapshot_collector,
+            snapshot_data=[SnapshotData.Peers, SnapshotData.Identity],
+        )
         self.get_peering_summary_monitor = ConsensusLayerPeeringSummary(
             max_retries=max_retries,
             timeout=timeout,
         )
-        self.instances_to_monitor = client_instances
 
     def perform_action(self):
         logging.info("peering-info:")
         logging.info(
-            f"{self.get_peering_summary_monitor.run(self.instances_to_monitor)}\n"
+            f"{self.run_monitor(self.get_peering_summary_monitor)}\n"
         )
 
-class HeadsMonitorExecutionAvailabilityCheckAction(TestnetMonitorAction):
+class HeadsMonitorExecutionAvailabilityCheckAction(SnapshotMonitorAction):
     def __init__(
         self,
         client_instances: list[ClientInstance],
@@ -113,20 +190,26 @@ class HeadsMonitorExecutionAvailabilityCheckAction(TestnetMonitorAction):
         timeout: int,
         max_retries_for_consensus: int,  # not used.
         interval: TestnetMonitorActionInterval,
+        slot_snapshot_collector: Optional[SlotSnapshotCollector] = None,
     ):
-        super().__init__(name="head-hash-execution", interval=interval)
+        super().__init__(
+            name="head-hash-execution",
+            interval=interval,
+            client_instances=client_instances,
+            slot_snapshot_collector=slot_snapshot_collector,
+            snapshot_data=[SnapshotData.ExecutionHead],
+        )
         self.get_heads_monitor_execution_availability_check = HeadsMonitorExecutionAvailabilityCheck(
             max_retries=max_retries,
             timeout=timeout,
             max_retries_for_consensus=max_retries_for_consensus,
         )
-        self.instances_to_monitor = client_instances
 
     def perform_action(self):
         # logging.info("heads:")
-        logging.info(f"{self.get_heads_monitor_execution_availability_check.run(self.instances_to_monitor)}\n")
+        logging.info(f"{self.run_monitor(self.get_heads_monitor_execution_availability_check)}\n")
 
-class HeadsMonitorConsensusAvailabilityCheckAction(TestnetMonitorAction):
+class HeadsMonitorConsensusAvailabilityCheckAction(SnapshotMonitorAction):
     def __init__(
         self,
         client_instances: list[ClientInstance],
@@ -134,20 +217,28 @@ class HeadsMonitorConsensusAvailabilityCheckAction(TestnetMonitorAction):
         timeout: int,
         max_retries_for_consensus: int,  # not used.
         interval: TestnetMonitorActionInterval,
+        use_ssz: bool = False,
+        slot_snapshot_collector: Optional[SlotSnapshotCollector] = None,
     ):
-        super().__init__(name="head-slot-consensus", interval=interval)
+        super().__init__(
+            name="head-slot-consensus",
+            interval=interval,
+            client_instances=client_instances,
+            slot_snapshot_collector=slot_snapshot_collector,
+            snapshot_data=[SnapshotData.HeadBlock],
+        )
         self.get_heads_monitor_consensus_availability_check = HeadsMonitorConsensusAvailabilityCheck(
             max_retries=max_retries,
             timeout=timeout,
             max_retries_for_consensus=max_retries_for_consensus,
+            use_ssz=use_ssz,
         )
-        self.instances_to_monitor = client_instances
 
     def perform_action(self):
         # logging.info("heads:")
-        logging.info(f"{self.get_heads_monitor_consensus_availability_check.run(self.instances_to_monitor)}\n")
+        logging.info(f"{self.run_monitor(self.get_heads_monitor_consensus_availability_check)}\n")
 
-class BlobMonitorAction(TestnetMonitorAction):
+class BlobMonitorAction(SnapshotMonitorAction):
     def __init__(
         self,
         client_instances: list[ClientInstance],
@@ -155,18 +246,24 @@ class BlobMonitorAction(TestnetMonitorAction):
         timeout: int,
         max_retries_for_consensus: int,  # not used.
         interval: TestnetMonitorActionInterval,
+        slot_snapshot_collector: Optional[SlotSnapshotCollector] = None,
     ):
-        super().__init__(name="blob-monitor", interval=interval)
+        super().__init__(
+            name="blob-monitor",
+            interval=interval,
+            client_instances=client_instances,
+            slot_snapshot_collector=slot_snapshot_collector,
+            snapshot_data=[SnapshotData.BlobSidecars],
+        )
         self.get_blob_monitor = BlobMonitor(
             max_retries=max_retries,
             timeout=timeout,
         )
-        self.instances_to_monitor = client_instances
 
     def perform_action(self):
         logging.info("blob-info:")
         logging.info(
-            f"{self.get_blob_monitor.run(self.instances_to_monitor)}\n"
+            f"{self.run_monitor(self.get_blob_monitor)}\n"
         )
 
 class EpochPerformanceAction(TestnetMonitorAction):
@@ -208,6 +305,198 @@ class EpochPerformanceAction(TestnetMonitorAction):
             except Exception as e:
                 logging.error(f"error getting epoch summary from: {random_instance.name} {random_instance.ip_address}\nerr: {e}")
 
+class SkippedSlotsAction(TestnetMonitorAction):
+    """Reports the slots of the last complete epoch that nodes have no
+    block for: missed by every node (missed proposals) or only by some."""
+
+    def __init__(
+        self,
+        client_instances: list[ClientInstance],
+        max_retries: int,
+        timeout: int,
+        max_retries_for_consensus: int,  # not used.
+        interval: TestnetMonitorActionInterval,
+        slots_per_epoch: int,
+    ):
+        super().__init__(name="skipped_slots", interval=interval)
+        self.instances_to_monitor = client_instances
+        self.slots_per_epoch = slots_per_epoch
+        self.chain_walker = HeaderChainWalker(max_retries=max_retries, timeout=timeout)
+        self.last_epoch: Optional[int] = None
+        # the walks block on requests scheduled on the request engine, so
+        # they can't run on its executor. Kept for the life of the action.
+        self.walk_executor = ThreadPoolExecutor(
+            max_workers=max(len(client_instances), 1), thread_name_prefix="etb-skipped-slots"
+        )
+
+    def get_slots(
+        self, instance: ClientInstance, head: BlockHeader, start_slot: int
+    ) -> Union[Exception, list[int]]:
+        headers = self.chain_walker.walk(
+            instance, head, stop_slot=start_slot, deadline=self.deadline
+        )
+        if isinstance(headers, Exception):
+            return headers
+        return [header.slot for header in headers]
+
+    def perform_action(self):
+        request = BeaconAPIgetBlockHeader(
+            "head",
+            max_retries=self.chain_walker.max_retries,
+            timeout=self.chain_walker.timeout,
+        )
+        heads = {
+            instance: request.get_block_header(future.result())
+            for instance, future in perform_batched_request(request, self.instances_to_monitor).items()
+        }
+        heads = {i: h for i, h in heads.items() if not isinstance(h, Exception)}
+        if len(heads) == 0:
+            logging.error("skipped_slots: no node returned its head")
+            return
+        epoch = max(h.slot for h in heads.values()) // self.slots_per_epoch - 1
+        if epoch < 0 or epoch == self.last_epoch:
+            return
+        self.last_epoch = epoch
+        start_slot = epoch * self.slots_per_epoch
+        end_slot = start_slot + self.slots_per_epoch
+
+        futures = {
+            instance: self.walk_executor.submit(self.get_slots, instance, head, start_slot)
+            for instance, head in heads.items()
+        }
+        node_slots = {}
+        for instance, future in futures.items():
+            slots = future.result()
+            if isinstance(slots, Exception):
+                logging.debug(f"skipped_slots: failed to walk {instance.name}: {slots}")
+                continue
+            node_slots[instance.name] = slots
+
+        analysis = SkippedSlotAnalysis(node_slots, start_slot, end_slot)
+        out = {
+            "epoch": epoch,
+            "missed_by_all": list(analysis.missed_by_all),
+            "missed_by_some": list(analysis.missed_by_some),
+            "nodes": {
+                node: {
+                    "skipped": len(skipped),
+                    "longest_run": analysis.get_longest_run(node),
+                }
+                for node, skipped in analysis.skipped.items()
+            },
+            "unreachable": [i.name for i in self.instances_to_monitor if i.name not in node_slots],
+        }
+        logging.info(f"skipped_slots: {json.dumps(out)}")
+
+
+class ChainStoreAction(SnapshotMonitorAction):
+    """Records the head of every node to the chain store for post-mortem
+    fork analysis (see chain_forensics.py)."""
+
+    def __init__(
+        self,
+        client_instances: list[ClientInstance],
+        max_retries: int,
+        timeout: int,
+        max_retries_for_consensus: int,  # not used.
+        interval: TestnetMonitorActionInterval,
+        chain_store_file: pathlib.Path,
+        slot_snapshot_collector: Optional[SlotSnapshotCollector] = None,
+    ):
+        super().__init__(
+            name="chain_store",
+            interval=interval,
+            client_instances=client_instances,
+            slot_snapshot_collector=slot_snapshot_collector,
+            snapshot_data=[SnapshotData.HeadHeader],
+        )
+        self.chain_store_recorder = ChainStoreRecorder(
+            ChainStore(chain_store_file), max_retries=max_retries, timeout=timeout
+        )
+
+    def perform_action(self):
+        if self.slot_snapshot_collector is None:
+            self.chain_store_recorder.observe(self.instances_to_monitor)
+            return
+        snapshot = self.get_snapshot()
+        request = self.slot_snapshot_collector.requests[SnapshotData.HeadHeader]
+        self.chain_store_recorder.record(
+            {
+                client: request.get_block_header(response)
+                for client, response in snapshot.get_results(SnapshotData.HeadHeader).items()
+            }
+        )
+
+
+class ChainReorgAction(TestnetMonitorAction):
+    """Streams chain_reorg events from every node and reports the reorgs
+    seen since the last time the action ran."""
+
+    def __init__(
+        self,
+        client_instances: list[ClientInstance],
+        max_retries: int,  # not used.
+        timeout: int,  # not used.
+        max_retries_for_consensus: int,  # not used.
+        interval: TestnetMonitorActionInterval,
+    ):
+        super().__init__(name="chain_reorgs", interval=interval)
+        self.event_stream = BeaconEventStream(
+            client_instances, topics=[BeaconEventTopic.ChainReorg]
+        )
+        self.event_stream.subscribe(self._on_reorg)
+        self.reorgs: list[BeaconEvent] = []
+        self.reorgs_lock = threading.Lock()
+        self.started = False
+
+    def _on_reorg(self, event: BeaconEvent):
+        with self.reorgs_lock:
+            self.reorgs.append(event)
+
+    def perform_action(self):
+        if not self.started:
+            self.event_stream.start()
+            self.started = True
+        with self.reorgs_lock:
+            reorgs, self.reorgs = self.reorgs, []
+        out = {
+            "chain_reorgs": [
+                {
+                    "container": event.instance.name,
+                    "slot": event.data.get("slot"),
+                    "depth": event.data.get("depth"),
+                    "old_head_block": event.data.get("old_head_block"),
+                    "new_head_block": event.data.get("new_head_block"),
+                }
+                for event in reorgs
+            ]
+        }
+        logging.info(json.dumps(out))
+
+
+class ConnectionStatsAction(TestnetMonitorAction):
+    def __init__(
+        self,
+        client_instances: list[ClientInstance],
+        max_retries: int,  # not used.
+        timeout: int,  # not used.
+        max_retries_for_consensus: int,  # not used.
+        interval: TestnetMonitorActionInterval,
+    ):
+        super().__init__(name="connection_stats", interval=interval)
+
+    def perform_action(self):
+        logging.info(
+            f"connection_stats: {json.dumps(client_session_pool.get_stats())}"
+        )
+        logging.info(
+            f"client_health: {json.dumps(client_health_tracker.get_stats())}"
+        )
+        logging.info(
+            f"request_coalescing: {json.dumps(request_coalescer.get_stats())}"
+        )
+
+
 class PrometheusAction(TestnetMonitorAction):
     def __init__(
         self,
@@ -284,8 +573,12 @@ class PrometheusAction(TestnetMonitorAction):
                     logging.debug(f"prometheus query {query} raised exception, skipping")
                     return (human_query, cleaned_data)
 
-            with ThreadPoolExecutor(max_workers=len(flattened_queries)) as exc:
-                results_all = exc.map(lambda item: _one_request(*item), flattened_queries)
+            engine = get_request_engine()
+            futures = [
+                engine.submit_blocking("prometheus-0", _one_request, *item)
+                for item in flattened_queries
+            ]
+            results_all = [future.result() for future in futures]
 
             results_grouped = defaultdict(list)
             for r in results_all:
@@ -389,6 +682,23 @@ class NodeWatch:
             "epoch_prometheus": EpochPrometheusAction,
             "slot_prometheus": SlotPrometheseusAction,
             "epoch_performance": EpochPerformanceAction,
+            "connection_stats": ConnectionStatsAction,
+            "reorgs": ChainReorgAction,
+            "chain_store": ChainStoreAction,
+            "skipped_slots": SkippedSlotsAction,
+        }
+
+        # metrics that can fetch blocks SSZ encoded.
+        ssz_metrics = {"heads", "consensus_availability"}
+        # metrics that can be run over the shared per slot snapshot.
+        snapshot_metrics = {
+            "heads",
+            "checkpoints",
+            "peers",
+            "blob",
+            "execution_availability",
+            "consensus_availability",
+            "chain_store",
         }
 
         intervals = {
@@ -397,9 +707,21 @@ class NodeWatch:
             "once": TestnetMonitorActionInterval.ONCE,
         }
 
-        testnet_monitor = TestnetMonitor(self.etb_config)
+        testnet_monitor = TestnetMonitor(
+            self.etb_config, deadline_margin=cli_args.slot_deadline_margin
+        )
+        slot_snapshot_collector = None
+        if cli_args.slot_snapshot:
+            slot_snapshot_collector = SlotSnapshotCollector(
+                self.instances_to_monitor,
+                get_slot=testnet_monitor.get_slot,
+                max_retries=self.max_retries,
+                timeout=self.timeout,
+                use_ssz=cli_args.use_ssz,
+            )
         for monitor in cli_args.monitor:
-            metric, interval = monitor.split(":")
+            # metric:interval[:slot_offset]
+            metric, interval, *slot_offset = monitor.split(":")
             if metric not in metrics:
                 raise Exception(f"Unknown metric: {metric}")
             if interval not in intervals:
@@ -407,15 +729,28 @@ class NodeWatch:
 
 
             _interval = intervals[interval]
-            testnet_monitor.add_action(
-                metrics[metric](
-                    client_instances=self.instances_to_monitor,
-                    max_retries=self.max_retries,
-                    timeout=self.timeout,
-                    max_retries_for_consensus=self.max_retries_for_consensus,
-                    interval=_interval,
-                )
+            action_kwargs = {}
+            if metric in ssz_metrics:
+                action_kwargs["use_ssz"] = cli_args.use_ssz
+            if metric in snapshot_metrics:
+                action_kwargs["slot_snapshot_collector"] = slot_snapshot_collector
+            if metric == "chain_store":
+                action_kwargs["chain_store_file"] = cli_args.chain_store
+            if metric == "skipped_slots":
+                action_kwargs["slots_per_epoch"] = testnet_monitor.slots_per_epoch
+            action = metrics[metric](
+                client_instances=self.instances_to_monitor,
+                max_retries=self.max_retries,
+                timeout=self.timeout,
+                max_retries_for_consensus=self.max_retries_for_consensus,
+                interval=_interval,
+                **action_kwargs,
             )
+            if len(slot_offset) > 0:
+                action.slot_offset = float(slot_offset[0])
+                if not 0 <= action.slot_offset < 1:
+                    raise Exception(f"Invalid slot offset: {slot_offset[0]}")
+            testnet_monitor.add_action(action)
 
         return testnet_monitor
 
@@ -477,6 +812,151 @@ if __name__ == "__main__":
         "node we may wait timeout*max_retries seconds.",
     )
 
+    parser.add_argument(
+        "--connection-pool-size",
+        dest="connection_pool_size",
+        type=int,
+        default=4,
+        help="Max number of keep-alive connections to keep open per node.",
+    )
+
+    parser.add_argument(
+        "--connection-idle-timeout",
+        dest="connection_idle_timeout",
+        type=int,
+        default=60,
+        help="Seconds a node's connections may sit idle before they are closed.",
+    )
+
+    parser.add_argument(
+        "--max-concurrent-requests",
+        dest="max_concurrent_requests",
+        type=int,
+        default=64,
+        help="Max number of requests in flight across all nodes.",
+    )
+
+    parser.add_argument(
+        "--max-concurrent-requests-per-node",
+        dest="max_concurrent_requests_per_node",
+        type=int,
+        default=4,
+        help="Max number of requests in flight to a single node.",
+    )
+
+    parser.add_argument(
+        "--circuit-failure-threshold",
+        dest="circuit_failure_threshold",
+        type=int,
+        default=3,
+        help="Consecutive connection failures/timeouts before a node is "
+        "considered down and requests to it fail fast.",
+    )
+
+    parser.add_argument(
+        "--circuit-probe-interval",
+        dest="circuit_probe_interval",
+        type=float,
+        default=2.0,
+        help="Initial seconds before a node that is down is probed again, "
+        "doubles (with jitter) on every failed probe.",
+    )
+
+    parser.add_argument(
+        "--max-circuit-probe-interval",
+        dest="max_circuit_probe_interval",
+        type=float,
+        default=60.0,
+        help="Max seconds between probes of a node that is down.",
+    )
+
+    parser.add_argument(
+        "--no-adaptive-timeouts",
+        dest="adaptive_timeouts",
+        action="store_false",
+        default=True,
+        help="Always use --request-timeout instead of deriving timeouts "
+        "from the observed latency of each node.",
+    )
+
+    parser.add_argument(
+        "--no-hedged-requests",
+        dest="hedge_requests",
+        action="store_false",
+        default=True,
+        help="Don't send a second request to a node that is slower than its "
+        "p95 latency.",
+    )
+
+    parser.add_argument(
+        "--slot-deadline-margin",
+        dest="slot_deadline_margin",
+        type=float,
+        default=0.5,
+        help="Monitors must return this many seconds before the end of the "
+        "slot, results that are not in by then are reported as partial.",
+    )
+
+    parser.add_argument(
+        "--request-memo-ttl",
+        dest="request_memo_ttl",
+        type=float,
+        default=1.0,
+        help="Seconds an identical beacon API request to the same node is "
+        "answered from memory instead of being sent again, 0 to disable. "
+        "Concurrent identical requests are always shared.",
+    )
+
+    parser.add_argument(
+        "--chain-store",
+        dest="chain_store",
+        type=pathlib.Path,
+        default=FilesConfig().chain_store_file,
+        help="Where the chain_store monitor records the heads of the nodes.",
+    )
+
+    parser.add_argument(
+        "--metrics-port",
+        dest="metrics_port",
+        type=int,
+        default=DEFAULT_NODE_WATCH_METRICS_PORT,
+        help="Port to serve the monitor results on for prometheus (/metrics), 0 to disable.",
+    )
+
+    parser.add_argument(
+        "--time-series-epochs",
+        dest="time_series_epochs",
+        type=int,
+        default=10,
+        help="Number of epochs the monitors report trends over (e.g. the "
+        "finality lag over the last 10 epochs).",
+    )
+
+    parser.add_argument(
+        "--time-series-capacity",
+        dest="time_series_capacity",
+        type=int,
+        default=1024,
+        help="Max number of samples kept per node and metric for the trends.",
+    )
+
+    parser.add_argument(
+        "--no-slot-snapshot",
+        dest="slot_snapshot",
+        action="store_false",
+        default=True,
+        help="Let every monitor query the nodes itself instead of sharing "
+        "one snapshot of every node per slot.",
+    )
+
+    parser.add_argument(
+        "--use-ssz",
+        dest="use_ssz",
+        action="store_true",
+        default=False,
+        help="Fetch blocks SSZ encoded instead of JSON where supported.",
+    )
+
     parser.add_argument(
         "--delay",
         dest="delay",
@@ -498,8 +978,9 @@ if __name__ == "__main__":
         dest="monitor",
         action="append",
         required=True,
-        help='The metrics to monitor. The format is "metric:frequency". Possible metrics: heads/checkpoints. '
-        "Possible frequencies: once/slot/epoch. For example: --monitor heads:slot --monitor checkpoints:slot",
+        help='The metrics to monitor. The format is "metric:frequency[:slot_offset]". Possible metrics: heads/checkpoints. '
+        "Possible frequencies: once/slot/epoch. slot_offset is when to run within the slot as a fraction "
+        "of the slot (default 0). For example: --monitor heads:slot:0.33 --monitor checkpoints:slot:0.66",
     )
 
     parser.add_argument(
@@ -533,6 +1014,23 @@ if __name__ == "__main__":
         format_str="%(message)s",
     )
 
+    configure_client_session_pool(
+        pool_size=args.connection_pool_size,
+        idle_timeout=args.connection_idle_timeout,
+    )
+    configure_client_health_tracker(
+        failure_threshold=args.circuit_failure_threshold,
+        probe_interval=args.circuit_probe_interval,
+        max_probe_interval=args.max_circuit_probe_interval,
+        adaptive_timeouts=args.adaptive_timeouts,
+        hedge_requests=args.hedge_requests,
+    )
+    configure_request_coalescing(memo_ttl=args.request_memo_ttl)
+    configure_request_engine(
+        max_concurrency=args.max_concurrent_requests,
+        max_concurrency_per_host=args.max_concurrent_requests_per_node,
+    )
+
     logging.info("Getting view of the testnet from etb-config.")
     if args.config is None:
         etb_config: ETBConfig = get_etb_config()
@@ -540,6 +1038,14 @@ if __name__ == "__main__":
         logging.warning("Using config from args.")
         etb_config: ETBConfig = ETBConfig(pathlib.Path(args.config))
 
+    consensus_preset = etb_config.testnet_config.consensus_layer.preset_base
+    configure_time_series_store(
+        capacity=args.time_series_capacity,
+        window=args.time_series_epochs
+        * consensus_preset.SLOTS_PER_EPOCH.value
+        * consensus_preset.SECONDS_PER_SLOT.value,
+    )
+
     node_watcher = NodeWatch(
         etb_config=etb_config,
         max_retries=args.max_retries,
@@ -547,5 +1053,8 @@ if __name__ == "__main__":
         args=args,
     )
 
+    if args.metrics_port > 0:
+        configure_metrics_exporter(args.metrics_port, node_watcher.testnet_monitor)
+
     logging.info("Starting node watch.")
     node_watcher.run()
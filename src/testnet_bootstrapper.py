@@ -10,7 +10,7 @@ import re
 import shutil
 import time
 from pathlib import Path
-from typing import Union, Any
+from typing import Optional, Union, Any
 from collections import defaultdict
 
 import requests
@@ -28,13 +28,18 @@ yaml.Representer = RoundTripRepresenter
 
 # yaml.explicit_start = True
 
-from etb.common.utils import create_logger, PremineKey
+from etb.common.premine_keys import get_premine_accounts, write_premine_keys
+from etb.common.utils import create_logger
 from etb.config.etb_config import (
     ETBConfig,
     FilesConfig,
     ClientInstance,
     ClientInstanceCollectionConfig,
 )
+from etb.config.defaults import (
+    DEFAULT_NODE_WATCH_INSTANCE_NAME,
+    DEFAULT_NODE_WATCH_METRICS_PORT,
+)
 from etb.config.assertor import (
     AssertorConfig,
     ClientConfig,
@@ -48,13 +53,14 @@ from etb.config.assertor import (
 )
 from etb.genesis.consensus_genesis import ConsensusGenesisWriter
 from etb.genesis.execution_genesis import ExecutionGenesisWriter
+from etb.genesis.keys.keystore import DEFAULT_KDF, FAST_KDF, KdfParams
+from etb.genesis.validator_keystores import write_validator_keystores
 from etb.interfaces.client_request import (
     eth_getBlockByNumber,
     admin_nodeInfo,
     perform_batched_request,
     admin_addPeer,
 )
-from etb.interfaces.external.eth2_val_tools import Eth2ValTools
 from etb.common.consensus import Epoch
 
 def move_trusted_setup_files(etb_config: ETBConfig):
@@ -111,6 +117,26 @@ def make_prometheus_config(etb_config: ETBConfig) -> dict[str, Any]:
         for k, v in targets.items()
     ]
 
+    # node_watch exports the monitor results (forks, finality, availability).
+    node_watch_instances = etb_config.generic_instances.get(
+        DEFAULT_NODE_WATCH_INSTANCE_NAME, []
+    )
+    if len(node_watch_instances) > 0:
+        jobs.append(
+            {
+                "job_name": DEFAULT_NODE_WATCH_INSTANCE_NAME,
+                "static_configs": [
+                    {
+                        "targets": [
+                            f"{instance.name}:{DEFAULT_NODE_WATCH_METRICS_PORT}"
+                            for instance in node_watch_instances
+                        ]
+                    }
+                ],
+                "metrics_path": "/metrics",
+            }
+        )
+
     jobs.append(
         {
             "job_name": "prometheus",
@@ -169,7 +195,12 @@ class EthereumTestnetBootstrapper:
         if docker_compose_file.exists():
             docker_compose_file.unlink()
 
-    def init_testnet(self, config_path: Path):
+    def init_testnet(
+        self,
+        config_path: Path,
+        use_keystore_cache: bool = True,
+        keystore_kdf: Optional[KdfParams] = DEFAULT_KDF,
+    ):
         """Initializes the testnet directory, 4 phases.
 
         1. populate client-specific static files:
@@ -180,6 +211,9 @@ class EthereumTestnetBootstrapper:
         3. Write the docker-compose file to use for bootstrapping later.
         4. Write the prometheus.yaml file to the config directory.
         @param config_path: path to the etb-config file.
+        @param use_keystore_cache: reuse keystores generated by previous runs.
+        @param keystore_kdf: the KDF of the validator keystores, None to
+            generate them with eth2-val-tools.
         @return:
         """
         etb_config: ETBConfig = ETBConfig(config_path)
@@ -199,6 +233,10 @@ class EthereumTestnetBootstrapper:
         local_logs_dir: Path = etb_config.files.local_logs_dir
         local_logs_dir.mkdir(parents=True, exist_ok=True)
 
+        # derive the premine accounts once, every container reads them.
+        logging.info("writing premine keys")
+        write_premine_keys(etb_config)
+
         logging.info("Writing assertor config")
         self.generate_assertor_config(etb_config)
 
@@ -221,7 +259,7 @@ class EthereumTestnetBootstrapper:
 
         # write all validator keystores.
         logging.info("populating validator keystores")
-        self._write_validator_keystores(etb_config)
+        self._write_validator_keystores(etb_config, use_keystore_cache, keystore_kdf)
 
         # write the etb-config file into the testnet-dir.
         logging.info("writing etb-config file..")
@@ -267,7 +305,9 @@ class EthereumTestnetBootstrapper:
             # yaml.dump(prometheus_config, f, indent=2)
 
 
-    def bootstrap_testnet(self, config_path: Path, global_timeout: int = 60):
+    def bootstrap_testnet(
+        self, config_path: Path, global_timeout: int = 60, use_genesis_cache: bool = True
+    ):
         """Bootstraps the testnet. This happens in several phases, each
         seperated by checkpoints.
 
@@ -277,6 +317,8 @@ class EthereumTestnetBootstrapper:
 
         @param global_timeout: the max amount of time to wait for any RPC request.
         @param config_path: path to the etb-config file.
+        @param use_genesis_cache: re-stamp the genesis state generated by a
+            previous run of the same experiment.
         @return:
         """
 
@@ -362,12 +404,14 @@ class EthereumTestnetBootstrapper:
             etb_config.files.consensus_config_file, "w", encoding="utf-8"
         ) as consensus_config:
             consensus_config.write(cgw.create_consensus_config_yaml())
+        genesis_ssz = cgw.create_consensus_genesis_ssz(
+            eth1_block_hash=block_hash, use_cache=use_genesis_cache
+        )
+        # got an exception, raise it. if not then we have bytes to write.
+        if isinstance(genesis_ssz, Exception):
+            raise genesis_ssz
         with open(etb_config.files.consensus_genesis_file, "wb") as consensus_genesis:
-            genesis_ssz = cgw.create_consensus_genesis_ssz()
-            # got an exception, raise it. if not then we have bytes to write.
-            if isinstance(genesis_ssz, Exception):
-                raise genesis_ssz
-            consensus_genesis.write(cgw.create_consensus_genesis_ssz())
+            consensus_genesis.write(genesis_ssz)
         # now copy the files into their respective dirs.
         # note the nodes are using the top level dir instead of the node dir.
         config: ClientInstanceCollectionConfig
@@ -441,8 +485,11 @@ class EthereumTestnetBootstrapper:
 
         enodes: dict[ClientInstance, str] = {}
         el_client: ClientInstance
-        # it may take a while for the clients to come up; so retry a lot.
-        rpc_request = admin_nodeInfo(max_retries=40, timeout=global_timeout)
+        # it may take a while for the clients to come up; so retry a lot,
+        # also through the circuit breaker.
+        rpc_request = admin_nodeInfo(
+            max_retries=40, timeout=global_timeout, use_circuit_breaker=False
+        )
         for el_client, rpc_future in perform_batched_request(
             rpc_request, el_clients_to_pair
         ).items():
@@ -462,7 +509,9 @@ class EthereumTestnetBootstrapper:
 
         # now peer the clients with everyone but themselves.
         for el_peer, enode in enodes.items():
-            add_enode_rpc_request = admin_addPeer(enode=enode, timeout=global_timeout)
+            add_enode_rpc_request = admin_addPeer(
+                enode=enode, timeout=global_timeout, use_circuit_breaker=False
+            )
             for el_client in el_clients_to_pair:
                 # don't pair clients with themselves.
                 if el_client != el_peer:
@@ -473,96 +522,25 @@ class EthereumTestnetBootstrapper:
                         # bail early
                         raise resp
 
-    def _write_validator_keystores(self, etb_config: ETBConfig):
+    def _write_validator_keystores(
+        self,
+        etb_config: ETBConfig,
+        use_cache: bool = True,
+        kdf: Optional[KdfParams] = DEFAULT_KDF,
+    ):
         """
         Populates the validator keystores for all the clients.
-        keys are generated using eth2-val-tools and dropped in the node_dir:
+        keys are derived in-process (eth2-val-tools for prysm) in the node_dir:
             /testnet_root/local_testnet/collection_name/node_<node_num>/keystores/
-        they are then moved up one dir and the keystore dir is removed.
+        the layout the client uses is then moved up one dir and the keystore
+        dir is removed. Keystores are generated in parallel, keystores
+        generated by previous runs are linked from the keystore cache.
         @param etb_config: ETBConfig
+        @param use_cache: use the keystore cache.
+        @param kdf: the KDF of the keystores, None to use eth2-val-tools.
         @return:
         """
-
-        eth2_val_tools = Eth2ValTools()
-        mnemonic = etb_config.testnet_config.consensus_layer.validator_mnemonic
-        logging.debug(f"using mnemonic:\n\t{mnemonic}")
-        client_instance: ClientInstance
-        for client_instance in etb_config.get_client_instances():
-            cl_client = client_instance.consensus_config.client
-            if cl_client not in ["prysm", "lighthouse", "teku", "nimbus", "lodestar", "grandine"]:
-                raise Exception(f"client: {cl_client} not supported for keystores")
-            consensus_node_dir: Path = client_instance.node_dir
-            keystore_dir: Path = consensus_node_dir / Path("keystores/")
-            vpn = client_instance.consensus_config.num_validators  # validators per node
-            offset = client_instance.ndx * vpn
-            min_ndx = client_instance.collection_config.validator_offset_start + offset
-            max_ndx = min_ndx + vpn
-            logging.debug(f"populating keystores for client: {client_instance.name}")
-            logging.debug(f"min_ndx: {min_ndx}, max_ndx: {max_ndx}")
-            if cl_client == "prysm":
-                eth2_val_tools.generate_keystores(
-                    out_path=keystore_dir,
-                    min_ndx=min_ndx,
-                    max_ndx=max_ndx,
-                    mnemonic=mnemonic,
-                    prysm=True,
-                    prysm_password=client_instance.validator_password,
-                )
-
-                for item in Path(keystore_dir).glob("prysm/*"):
-                    if item.is_dir():
-                        shutil.copytree(item, consensus_node_dir / item.name)
-                    else:
-                        shutil.copy(item, consensus_node_dir / item.name)
-                # prysm requires a wallet-password.txt to launch.
-                wallet_password_path: Path = (
-                    consensus_node_dir / "wallet-password.txt"
-                )
-                with open(wallet_password_path, "w") as wallet_password_file:
-                    wallet_password_file.write(client_instance.validator_password)
-
-            else:
-                eth2_val_tools.generate_keystores(
-                    out_path=keystore_dir,
-                    min_ndx=min_ndx,
-                    max_ndx=max_ndx,
-                    mnemonic=mnemonic,
-                )
-                # these are the defaults shared by most of the clients
-                keystore_src: Path = (
-                    keystore_dir / "keys"
-                )  # where the generated keystores are
-                keystore_dst: Path = (
-                    consensus_node_dir / "keys"
-                )  # where the keystores will be moved to
-                secret_src: Path = (
-                    keystore_dir / "secrets"
-                )  # where the generated secrets are
-                secret_dst: Path = (
-                    consensus_node_dir / "secrets"
-                )  # where the secrets will be moved to
-                if cl_client == "teku":
-                    keystore_src = keystore_dir / "teku-keys"
-                    secret_src = keystore_dir / "teku-secrets"
-                elif cl_client == "nimbus":
-                    keystore_src = keystore_dir / "nimbus-keys"
-                elif cl_client == "lodestar":
-                    secret_src = keystore_dir / "lodestar-secrets"
-                    # go ahead and create the validatordb dir for lodestar
-                    Path(consensus_node_dir / "validatordb").mkdir()
-                if cl_client == "grandine":
-                        os.makedirs(keystore_dst)
-                        for key in os.listdir(keystore_src):
-                            shutil.move(Path(f"{keystore_src}/{key}/voting-keystore.json"), Path(f"{keystore_dst}/{key}.json"))
-                        os.makedirs(secret_dst)
-                        for secret in os.listdir(secret_src):
-                            shutil.move(Path(f"{secret_src}/{secret}"), Path(f"{secret_dst}/{secret}.txt"))
-                else:
-                # copy everything over
-                    shutil.copytree(keystore_src, keystore_dst)
-                    shutil.copytree(secret_src, secret_dst)
-            # finished, remove the generated keystores.
-            shutil.rmtree(keystore_dir)
+        write_validator_keystores(etb_config, use_cache=use_cache, kdf=kdf)
 
     def get_deposit_contract_deployment_block(
         self, etb_config: ETBConfig, global_timeout: int
@@ -586,7 +564,9 @@ class EthereumTestnetBootstrapper:
             f"Using instance: {target_instance.name} to get the contract deployment block."
         )
         # contract deployed at genesis
-        get_block_rpc_request = eth_getBlockByNumber("0x0", timeout=global_timeout)
+        get_block_rpc_request = eth_getBlockByNumber(
+            "0x0", timeout=global_timeout, use_circuit_breaker=False
+        )
         resp = get_block_rpc_request.perform_request(target_instance)
         if not get_block_rpc_request.is_valid(resp):
             resp: Exception  # resp is an exception
@@ -662,17 +642,7 @@ class EthereumTestnetBootstrapper:
             )
             tests.append(test)
 
-        mnemonic = etb_config.testnet_config.execution_layer.account_mnemonic
-        account_pass = etb_config.testnet_config.execution_layer.keystore_passphrase
-        premine_accts = etb_config.testnet_config.execution_layer.premines
-
-        private_keys = []
-        for acc in premine_accts:
-            private_keys.append(
-                PremineKey(
-                    mnemonic=mnemonic, account=acc, passphrase=account_pass
-                ).private_key
-            )
+        private_keys = [acct.private_key for acct in get_premine_accounts(etb_config)]
         private_key = random.choice(private_keys)
         private_key = private_key.replace("0x", "")
 
@@ -727,6 +697,34 @@ def main():
         help="Logging level to use.",
     )
 
+    parser.add_argument(
+        "--no-keystore-cache",
+        dest="keystore_cache",
+        action="store_false",
+        default=True,
+        help="Always generate the validator keystores instead of reusing "
+        "the ones cached by previous runs.",
+    )
+
+    parser.add_argument(
+        "--no-genesis-cache",
+        dest="genesis_cache",
+        action="store_false",
+        default=True,
+        help="Always generate the consensus genesis state instead of "
+        "re-stamping the one cached by previous runs.",
+    )
+
+    parser.add_argument(
+        "--keystore-kdf",
+        dest="keystore_kdf",
+        choices=["default", "fast", "eth2-val-tools"],
+        default="default",
+        help="How to write the validator keystores: pbkdf2 with 262144 "
+        "rounds (default), pbkdf2 with 2048 rounds for throwaway testnets "
+        "(fast), or with eth2-val-tools.",
+    )
+
     parser.add_argument(
         "--clean",
         dest="clean",
@@ -751,13 +749,18 @@ def main():
 
     if args.init_testnet:
         path_to_config = Path(args.config)
-        etb.init_testnet(path_to_config)
+        keystore_kdf = {"default": DEFAULT_KDF, "fast": FAST_KDF, "eth2-val-tools": None}
+        etb.init_testnet(
+            path_to_config,
+            use_keystore_cache=args.keystore_cache,
+            keystore_kdf=keystore_kdf[args.keystore_kdf],
+        )
         logging.debug("testnet_bootstrapper has finished init-ing the testnet.")
 
     if args.bootstrap_testnet:
         # the config path lies in /source/data/etb-config.yaml
         path_to_config = Path("/source/data/etb-config.yaml")
-        etb.bootstrap_testnet(path_to_config)
+        etb.bootstrap_testnet(path_to_config, use_genesis_cache=args.genesis_cache)
         logging.debug("testnet_bootstrapper has finished bootstrapping the testnet.")
 
 
@@ -0,0 +1,25 @@
+"""Fixtures shared by the tests."""
+from dataclasses import dataclass
+from typing import Callable
+
+import pytest
+
+
+@dataclass(frozen=True)
+class FakeClient:
+    """Stands in for a ClientInstance: hashable, named and addressable."""
+
+    name: str
+    ip_address: str = "10.0.0.1"
+
+    def get_execution_jsonrpc_path(self) -> str:
+        return f"http://{self.ip_address}:8645"
+
+    def get_consensus_beacon_api_path(self) -> str:
+        return f"http://{self.ip_address}:5052"
+
+
+@pytest.fixture
+def make_client() -> Callable[..., FakeClient]:
+    """Build a client instance by name."""
+    return FakeClient
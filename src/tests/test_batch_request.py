@@ -0,0 +1,104 @@
+"""ExecutionJSONRPCBatchRequest only falls back to sequential calls for
+clients that refuse batches."""
+import requests
+
+from etb.interfaces import client_request
+from etb.interfaces.client_request import (
+    ExecutionJSONRPCBatchRequest,
+    client_health_tracker,
+    eth_getCode,
+)
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, body, headers: dict = None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def json(self):
+        if self.body is None:
+            raise ValueError("no JSON body")
+        return self.body
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.exceptions.HTTPError(str(self.status_code), response=self)
+
+
+class FakeSession:
+    """Answers each POST with the next reply, replies are functions of the
+    posted payload."""
+
+    def __init__(self, replies: list):
+        self.replies = replies
+        self.posted = []
+
+    def post(self, url, json, timeout):
+        self.posted.append(json)
+        return self.replies.pop(0)(json)
+
+
+def batch_reply(chunk):
+    return FakeResponse(200, [{"id": call["id"], "result": "0x"} for call in chunk])
+
+
+def single_reply(call):
+    return FakeResponse(200, {"jsonrpc": "2.0", "id": call["id"], "result": "0x"})
+
+
+def use_session(monkeypatch, session: FakeSession):
+    monkeypatch.setattr(
+        client_request.client_session_pool, "get_session", lambda instance: session
+    )
+
+
+def make_batch(num_calls: int) -> ExecutionJSONRPCBatchRequest:
+    return ExecutionJSONRPCBatchRequest(
+        [eth_getCode(f"0x{ndx:040x}", "latest") for ndx in range(num_calls)], backoff=0
+    )
+
+
+def test_throttled_batch_is_retried(monkeypatch, make_client):
+    client_health_tracker.reset()
+    client = make_client("geth-0")
+    session = FakeSession([lambda chunk: FakeResponse(429, None), batch_reply])
+    use_session(monkeypatch, session)
+
+    assert make_batch(2).perform_request(client) == ["0x", "0x"]
+    assert not client_health_tracker.get(client).batch_unsupported
+    assert len(session.posted) == 2
+
+
+def test_too_large_batch_is_split(monkeypatch, make_client):
+    client_health_tracker.reset()
+    client = make_client("geth-0")
+    session = FakeSession(
+        [lambda chunk: FakeResponse(413, None), batch_reply, batch_reply]
+    )
+    use_session(monkeypatch, session)
+
+    assert make_batch(4).perform_request(client) == ["0x"] * 4
+    assert not client_health_tracker.get(client).batch_unsupported
+    assert [len(chunk) for chunk in session.posted] == [4, 2, 2]
+
+
+def test_refused_batch_falls_back_to_sequential_calls(monkeypatch, make_client):
+    client_health_tracker.reset()
+    client = make_client("besu-0")
+    invalid_request = {"jsonrpc": "2.0", "id": None, "error": {"code": -32600}}
+    session = FakeSession(
+        [lambda chunk: FakeResponse(400, invalid_request), single_reply, single_reply]
+    )
+    use_session(monkeypatch, session)
+
+    assert make_batch(2).perform_request(client) == ["0x", "0x"]
+    assert client_health_tracker.get(client).batch_unsupported
+
+    # the next run starts over.
+    client_health_tracker.reset()
+    assert not client_health_tracker.get(client).batch_unsupported
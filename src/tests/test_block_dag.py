@@ -0,0 +1,69 @@
+"""BlockDagIngester over a gap in the DAG longer than max_walk."""
+from concurrent.futures import Future
+
+from etb.interfaces.client_request import BlockHeader
+from etb.monitoring.block_dag import BlockDag, BlockDagIngester
+from etb.monitoring.chain_walker import HeaderChainWalker, ZERO_ROOT
+
+
+def make_chain(length: int) -> list[BlockHeader]:
+    """A chain with a block at every slot from 0 to length - 1."""
+    chain = []
+    parent_root = ZERO_ROOT
+    for slot in range(length):
+        root = f"0x{slot + 1:064x}"
+        chain.append(BlockHeader(root=root, slot=slot, parent_root=parent_root))
+        parent_root = root
+    return chain
+
+
+class FakeHeadersRequest:
+    def __init__(self, headers: list[BlockHeader]):
+        self.headers = headers
+
+    def get_block_headers(self, response):
+        return self.headers
+
+
+class FakeChainWalker(HeaderChainWalker):
+    """Serves the headers of a chain instead of querying a client."""
+
+    def __init__(self, chain: list[BlockHeader]):
+        super().__init__()
+        self.chain = chain
+
+    def get_header(self, client, block_id):
+        self.num_requests += 1
+        if block_id == "head":
+            return self.chain[-1]
+        return next(header for header in self.chain if header.root == block_id)
+
+    def _submit_slot(self, client, slot, deadline):
+        self.num_requests += 1
+        future = Future()
+        future.set_result(None)
+        return FakeHeadersRequest([self.chain[slot]]), future
+
+
+def test_gap_longer_than_max_walk_is_not_added_partially(make_client):
+    chain = make_chain(200)
+    block_dag = BlockDag()
+    ingester = BlockDagIngester(block_dag, max_walk=64)
+    ingester.chain_walker = FakeChainWalker(chain[:10])
+    client = make_client("prysm-geth-0")
+    assert ingester.ingest(client) == chain[9].root
+
+    # the client moved 190 blocks on, more than max_walk.
+    ingester.chain_walker.chain = chain
+    assert isinstance(ingester.ingest(client), Exception)
+    assert len(block_dag) == 10
+    assert isinstance(ingester.ingest(client), Exception)
+    assert len(block_dag) == 10
+
+    # the third ingest connects the walk to the known blocks.
+    assert ingester.ingest(client) == chain[-1].root
+    assert len(block_dag) == 200
+    assert ingester.partial_walks == {}
+    # a single tree, so the fork point between old and new heads is found.
+    assert block_dag.get_common_ancestor(chain[9].root, chain[-1].root).root == chain[9].root
+    assert block_dag.get(chain[-1].root).depth == 199
@@ -0,0 +1,58 @@
+"""CheckpointsMonitor over finality checkpoints shaped like the beacon API's."""
+import json
+
+from etb.monitoring.monitors.consensus_monitors import CheckpointsMonitor
+from etb.monitoring.time_series import time_series_store
+
+# /eth/v1/beacon/states/head/finality_checkpoints, epochs are strings.
+FINALITY_CHECKPOINTS = {
+    "execution_optimistic": False,
+    "finalized": False,
+    "data": {
+        "previous_justified": {"epoch": "9", "root": "0x" + "aa" * 32},
+        "current_justified": {"epoch": "10", "root": "0x" + "bb" * 32},
+        "finalized": {"epoch": "8", "root": "0x" + "cc" * 32},
+    },
+}
+
+
+class FakeResponse:
+    def __init__(self, body: dict):
+        self.body = body
+
+    def json(self) -> dict:
+        return self.body
+
+
+def test_record_time_series_with_api_shaped_checkpoints(make_client):
+    time_series_store.clear()
+    monitor = CheckpointsMonitor()
+    client = make_client("prysm-geth-0")
+    checkpoints = monitor._get_checkpoints(FakeResponse(FINALITY_CHECKPOINTS))
+    assert checkpoints == ((8, "0xcccccccc"), (10, "0xbbbbbbbb"), (9, "0xaaaaaaaa"))
+    monitor.results = {client: checkpoints}
+
+    monitor.record_time_series(observed_at=100.0)
+
+    assert monitor.get_time_series(client.name, "finalized_epoch").latest() == (100.0, 8)
+    assert monitor.get_time_series(client.name, "finality_lag").latest() == (100.0, 2)
+    trends = monitor.get_finality_trends()
+    assert trends[client.name]["finalized_epoch"] == 8
+
+
+def test_reported_epochs_are_strings(make_client):
+    monitor = CheckpointsMonitor()
+    client = make_client("prysm-geth-0")
+    checkpoints = monitor._get_checkpoints(FakeResponse(FINALITY_CHECKPOINTS))
+    monitor.consensus_results = {checkpoints: [client]}
+
+    report = json.loads(monitor.report_metric())
+
+    assert report["checkpoints"]["finalization_data"] == [
+        {
+            "finalized": ["8", "0xcccccccc"],
+            "current_justified": ["10", "0xbbbbbbbb"],
+            "previous_justified": ["9", "0xaaaaaaaa"],
+            "clients": ["prysm-geth-0"],
+        }
+    ]
@@ -0,0 +1,76 @@
+"""Adaptive timeouts are derived per request class, and a coalesced call is
+recorded once."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from etb.interfaces.client_health import ClientInstanceHealth
+from etb.interfaces.client_request import (
+    BeaconAPIgetIdentity,
+    client_health_tracker,
+    request_coalescer,
+)
+
+
+def test_adaptive_timeout_is_per_request_class():
+    health = ClientInstanceHealth(min_samples=20)
+    for _ in range(20):
+        health.record_success(0.01, "BeaconAPIgetIdentity")
+
+    # cheap requests adapt to their own latencies.
+    assert health.get_adaptive_timeout(5, "BeaconAPIgetIdentity") == 0.5
+    # a heavy request without samples of its own keeps its full timeout.
+    assert health.get_adaptive_timeout(30, "BeaconAPIgetStateV2") == 30
+
+    for _ in range(20):
+        health.record_success(4.0, "BeaconAPIgetStateV2")
+    assert health.get_adaptive_timeout(30, "BeaconAPIgetStateV2") == 12.0
+    assert health.get_adaptive_timeout(5, "BeaconAPIgetIdentity") == 0.5
+    # the instance wide percentiles still see every sample.
+    assert health.get_latency_percentile(99) == 4.0
+
+
+class SlowIdentity(BeaconAPIgetIdentity):
+    """Identity request that blocks until released, then fails to connect."""
+
+    def __init__(self, release: threading.Event):
+        super().__init__(max_retries=0)
+        self.release = release
+        self.num_calls = 0
+
+    def get_coalescing_key(self, instance):
+        return ("identity", instance.name)
+
+    def _request_once(self, instance, timeout):
+        self.num_calls += 1
+        self.release.wait(5)
+        raise requests.exceptions.ConnectionError("connection refused")
+
+
+def test_coalesced_call_is_recorded_once(make_client):
+    client_health_tracker.reset()
+    client = make_client("lighthouse-geth-0")
+    request = SlowIdentity(threading.Event())
+    num_coalesced = request_coalescer.get_stats()["coalesced"]
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        leader = executor.submit(request._attempt, client, 5)
+        while request.num_calls == 0:
+            time.sleep(0.01)
+        follower = executor.submit(request._attempt, client, 5)
+        # gives up waiting on the call in flight.
+        impatient = executor.submit(request._attempt, client, 0.05)
+        with pytest.raises(requests.exceptions.Timeout):
+            impatient.result()
+        while request_coalescer.get_stats()["coalesced"] < num_coalesced + 2:
+            time.sleep(0.01)
+        request.release.set()
+        for future in (leader, follower):
+            with pytest.raises(requests.exceptions.ConnectionError):
+                future.result()
+
+    assert request.num_calls == 1
+    assert client_health_tracker.get(client).consecutive_failures == 1
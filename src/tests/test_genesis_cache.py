@@ -0,0 +1,46 @@
+"""Re-stamping cached genesis states for a new execution genesis block."""
+from etb.common.ssz import read_uint64
+from etb.genesis.genesis_cache import GenesisCache, GenesisStamp, restamp_genesis_ssz
+
+OLD = GenesisStamp(genesis_time=1000, eth1_block_hash=b"\x11" * 32, eth1_timestamp=900)
+NEW = GenesisStamp(genesis_time=5000, eth1_block_hash=b"\x22" * 32, eth1_timestamp=4900)
+
+# where the time dependent fields are in make_state().
+ETH1_DATA_BLOCK_HASH = 100
+RANDAO_MIX = 160
+PAYLOAD_TIMESTAMP = 300
+PAYLOAD_BLOCK_HASH = PAYLOAD_TIMESTAMP + 44
+
+
+def make_state(stamp: GenesisStamp) -> bytes:
+    """A state with the fields of a genesis state that depend on the time."""
+    state = bytearray(b"\x07" * 512)
+    state[0:8] = stamp.genesis_time.to_bytes(8, "little")
+    state[ETH1_DATA_BLOCK_HASH : ETH1_DATA_BLOCK_HASH + 32] = stamp.eth1_block_hash
+    state[RANDAO_MIX : RANDAO_MIX + 32] = stamp.eth1_block_hash
+    state[PAYLOAD_TIMESTAMP : PAYLOAD_TIMESTAMP + 8] = stamp.eth1_timestamp.to_bytes(8, "little")
+    state[PAYLOAD_BLOCK_HASH : PAYLOAD_BLOCK_HASH + 32] = stamp.eth1_block_hash
+    return bytes(state)
+
+
+def test_restamp_patches_every_time_dependent_field():
+    assert restamp_genesis_ssz(make_state(OLD), OLD, NEW) == make_state(NEW)
+
+
+def test_restamp_without_payload_header_fails():
+    state = bytearray(make_state(OLD))
+    # the payload timestamp no longer matches, the header can't be found.
+    state[PAYLOAD_TIMESTAMP : PAYLOAD_TIMESTAMP + 8] = (1).to_bytes(8, "little")
+    assert restamp_genesis_ssz(bytes(state), OLD, NEW) is None
+
+
+def test_cached_state_is_restamped_for_a_new_genesis(tmp_path):
+    cache = GenesisCache(tmp_path)
+    cache.put("key", make_state(OLD), OLD.eth1_block_hash, OLD.eth1_timestamp)
+
+    state = cache.get("key", NEW.eth1_block_hash, NEW.eth1_timestamp)
+
+    # the genesis delay is kept.
+    assert read_uint64(state, 0) == NEW.genesis_time
+    assert state == make_state(NEW)
+    assert cache.get("other-key", NEW.eth1_block_hash, NEW.eth1_timestamp) is None
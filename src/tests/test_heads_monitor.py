@@ -0,0 +1,22 @@
+"""The num_forks gauge is only set by the HeadsMonitor."""
+from etb.monitoring.metrics_exporter import PREFIX, metrics_registry
+from etb.monitoring.monitors.consensus_monitors import (
+    HeadsMonitor,
+    HeadsMonitorConsensusAvailabilityCheck,
+)
+
+
+def test_num_forks_is_not_overwritten_by_the_availability_check(make_client):
+    a, b = make_client("prysm-geth-0"), make_client("teku-besu-0")
+    heads = HeadsMonitor()
+    heads.results = {a: ("10", "0xaaaaaaaa", ""), b: ("10", "0xbbbbbbbb", "")}
+    heads.consensus_results = {heads.results[a]: [a], heads.results[b]: [b]}
+    availability = HeadsMonitorConsensusAvailabilityCheck()
+    availability.results = {a: "10", b: "11"}
+    availability.consensus_results = {"10": [a], "11": [b]}
+
+    heads.record_time_series(observed_at=100.0)
+    availability.record_time_series(observed_at=100.0)
+
+    gauge = metrics_registry.gauge(f"{PREFIX}_num_forks", "")
+    assert gauge.values == {(("monitor", "HeadsMonitor"),): 1}
@@ -0,0 +1,52 @@
+"""ImmutableObjectCache envelope stripping and persisted entry eviction."""
+import json
+import os
+
+from etb.interfaces.immutable_cache import ImmutableObjectCache, get_immutable_body
+
+ROOT = "0x" + "ab" * 32
+
+# /eth/v1/beacon/headers/{root}
+HEADER_RESPONSE = {
+    "execution_optimistic": False,
+    "finalized": True,
+    "data": {
+        "root": ROOT,
+        "canonical": True,
+        "header": {"message": {"slot": "1", "parent_root": "0x" + "00" * 32}},
+    },
+}
+
+
+def test_envelope_fields_are_not_cached():
+    body = json.loads(get_immutable_body(HEADER_RESPONSE))
+    assert body == {
+        "data": {
+            "root": ROOT,
+            "header": {"message": {"slot": "1", "parent_root": "0x" + "00" * 32}},
+        }
+    }
+    block = {"version": "deneb", "finalized": False, "data": {"message": {}}}
+    assert json.loads(get_immutable_body(block)) == {"version": "deneb", "data": {"message": {}}}
+
+
+def test_persisted_entries_are_evicted_least_recently_used(tmp_path):
+    cache = ImmutableObjectCache(persist_dir=tmp_path, max_disk_size_bytes=250)
+    keys = [(f"/eth/v1/beacon/headers/0x{i:064x}", "application/json") for i in range(3)]
+    for ndx, key in enumerate(keys[:2]):
+        cache.put(key, key[1], b"x" * 100)
+        os.utime(cache._get_path(key), (ndx, ndx))
+    # reading the oldest entry from disk makes it the most recently used.
+    cache.clear()
+    assert cache.get(keys[0]) is not None
+
+    cache.put(keys[2], keys[2][1], b"x" * 100)
+
+    assert cache._get_path(keys[0]).exists()
+    assert not cache._get_path(keys[1]).exists()
+    assert cache._get_path(keys[2]).exists()
+    assert cache.get_stats()["disk_size_bytes"] == 200
+    # no temporary files are left behind.
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(
+        cache._get_path(key).name for key in (keys[0], keys[2])
+    )
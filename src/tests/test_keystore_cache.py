@@ -0,0 +1,53 @@
+"""KeystoreCache entries are linked into node dirs and evicted LRU."""
+import os
+
+from etb.genesis.keystore_cache import KeystoreCache
+
+
+def make_keystores(node_dir, name: str, size: int):
+    (node_dir / name / "0xaa").mkdir(parents=True)
+    (node_dir / name / "0xaa" / "voting-keystore.json").write_bytes(b"k" * size)
+    (node_dir / "secrets").mkdir(exist_ok=True)
+    (node_dir / "secrets" / "0xaa").write_text("password")
+
+
+def test_put_then_get_lays_out_the_same_files(tmp_path):
+    cache = KeystoreCache(tmp_path / "cache")
+    src = tmp_path / "node_0"
+    make_keystores(src, "keys", 100)
+    key = KeystoreCache.get_key("mnemonic", 0, 1, "lighthouse", None)
+
+    assert not cache.get(key, tmp_path / "missing")
+    cache.put(key, src, ["keys", "secrets"])
+    dst = tmp_path / "node_1"
+    dst.mkdir()
+
+    assert cache.get(key, dst)
+    assert (dst / "keys" / "0xaa" / "voting-keystore.json").read_bytes() == b"k" * 100
+    assert (dst / "secrets" / "0xaa").read_text() == "password"
+
+
+def test_keys_depend_on_every_input():
+    key = KeystoreCache.get_key("mnemonic", 0, 1, "lighthouse", None)
+    assert key == KeystoreCache.get_key("mnemonic", 0, 1, "lighthouse", None)
+    assert key != KeystoreCache.get_key("mnemonic", 0, 2, "lighthouse", None)
+    assert key != KeystoreCache.get_key("mnemonic", 0, 1, "teku", None)
+    assert key != KeystoreCache.get_key("mnemonic", 0, 1, "lighthouse", "password")
+    assert key != KeystoreCache.get_key("mnemonic", 0, 1, "lighthouse", None, kdf="pbkdf2")
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = KeystoreCache(tmp_path / "cache", max_size=250)
+    for ndx in range(3):
+        src = tmp_path / f"node_{ndx}"
+        make_keystores(src, "keys", 100)
+        cache.put(f"entry-{ndx}", src, ["keys"])
+        os.utime(tmp_path / "cache" / f"entry-{ndx}", (ndx, ndx))
+    # using the oldest entry makes it the most recently used.
+    dst = tmp_path / "node_3"
+    dst.mkdir()
+    assert cache.get("entry-0", dst)
+
+    assert cache.evict() == 1
+
+    assert [entry.name for entry, _, _ in cache.get_entries()] == ["entry-2", "entry-0"]
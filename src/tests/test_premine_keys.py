@@ -0,0 +1,29 @@
+"""Premine accounts derived once per seed match eth_account's derivation."""
+import pytest
+
+Account = pytest.importorskip("eth_account").Account
+
+from etb.common.premine_keys import PremineKeyStore, derive_premine_accounts  # noqa: E402
+
+MNEMONIC = "test test test test test test test test test test test junk"
+PATHS = [f"m/44'/60'/0'/0/{ndx}" for ndx in range(3)]
+
+
+def test_derived_accounts_match_account_from_mnemonic():
+    Account.enable_unaudited_hdwallet_features()
+    for account in derive_premine_accounts(MNEMONIC, PATHS):
+        expected = Account.from_mnemonic(MNEMONIC, account_path=account.path)
+        assert account.address == expected.address
+        assert account.private_key == f"0x{expected.key.hex().removeprefix('0x')}"
+
+
+def test_premine_keys_file_is_used_instead_of_deriving(tmp_path):
+    keys_file = tmp_path / "premine-keys.json"
+    PremineKeyStore(keys_file).write(MNEMONIC, PATHS, max_workers=1)
+
+    store = PremineKeyStore(keys_file)
+    store._derive = None  # any derivation would fail.
+    accounts = store.get_accounts(MNEMONIC, PATHS[::-1])
+
+    assert [account.path for account in accounts] == PATHS[::-1]
+    assert accounts == derive_premine_accounts(MNEMONIC, PATHS[::-1])
@@ -0,0 +1,35 @@
+"""RequestEngine concurrency limits hold while an abandoned call runs."""
+import asyncio
+import threading
+
+from etb.interfaces.request_engine import RequestEngine
+
+
+def test_cancelled_call_keeps_its_permit_until_it_returns():
+    engine = RequestEngine(max_concurrency=4, max_concurrency_per_host=1)
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocking_call():
+        started.set()
+        release.wait(5)
+        return "first"
+
+    async def cancel_after_start():
+        task = asyncio.ensure_future(engine.run_blocking("10.0.0.1", blocking_call))
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+    try:
+        engine.run(cancel_after_start())
+        # the first call is still running, so the host has no permit left.
+        second = engine.submit_blocking("10.0.0.1", lambda: "second")
+        assert not release.wait(0.1)
+        assert not second.done()
+
+        release.set()
+        assert second.result(timeout=5) == "second"
+    finally:
+        release.set()
+        engine.shutdown()
@@ -0,0 +1,44 @@
+"""SkippedSlotAnalysis over the slots of a few nodes."""
+from etb.monitoring.skipped_slots import SkippedSlotAnalysis, SlotBitset
+
+
+def test_missed_by_all_and_missed_by_some():
+    analysis = SkippedSlotAnalysis(
+        {"node-a": [0, 1, 3, 7], "node-b": [0, 3, 7], "node-c": [0, 1, 3, 7]},
+        start_slot=0,
+        end_slot=8,
+    )
+    # nobody has a block at 2, 4, 5 or 6; only node-b missed 1.
+    assert list(analysis.missed_by_all) == [2, 4, 5, 6]
+    assert list(analysis.missed_by_some) == [1]
+    assert analysis.get_skipped_slots("node-b") == [1, 2, 4, 5, 6]
+    assert analysis.get_longest_run("node-a") == 3
+    assert analysis.get_longest_run("node-b") == 3
+
+
+def test_epoch_summary():
+    analysis = SkippedSlotAnalysis({"node-a": [4, 5, 9], "node-b": [4, 9]}, 4, 12)
+    assert analysis.get_epoch_summary(slots_per_epoch=4) == {
+        1: {"missed_by_all": 2, "missed_by_some": 1, "nodes": {"node-a": 2, "node-b": 3}},
+        2: {"missed_by_all": 3, "missed_by_some": 0, "nodes": {"node-a": 3, "node-b": 3}},
+    }
+
+
+def test_slots_outside_the_range_are_ignored():
+    bitset = SlotBitset.from_slots([1, 5, 10, 12], 5, 12)
+    assert list(bitset) == [5, 10]
+    assert bitset.get_runs() == [(5, 1), (10, 1)]
+    assert list(bitset.complement()) == [6, 7, 8, 9, 11]
+
+
+def test_slots_before_a_nodes_window_are_not_skipped():
+    # node-a's chain goes back to slot 2, node-b's only to slot 5.
+    analysis = SkippedSlotAnalysis.from_chains(
+        {"node-a": [2, 3, 5, 7], "node-b": [5, 6, 7]}, end_slot=8
+    )
+    assert analysis.start_slot == 2
+    assert analysis.get_skipped_slots("node-a") == [4, 6]
+    assert analysis.get_skipped_slots("node-b") == []
+    # only node-a covers 4, and it has no block there.
+    assert list(analysis.missed_by_all) == [4]
+    assert list(analysis.missed_by_some) == [6]
@@ -0,0 +1,54 @@
+"""The SlotSnapshotCollector only fetches the data due in a slot."""
+from etb.monitoring.slot_snapshot import SlotSnapshotCollector, SnapshotData
+
+
+class CountingRequest:
+    """Stands in for a request, counts the calls per slot."""
+
+    def __init__(self, calls: list):
+        self.calls = calls
+
+    async def perform_request_async(self, client, deadline=None):
+        self.calls.append(client.name)
+        return client.name
+
+
+def make_collector(clients, slot: list[int]) -> tuple[SlotSnapshotCollector, dict]:
+    collector = SlotSnapshotCollector(clients, get_slot=lambda: slot[0])
+    calls = {data_type: [] for data_type in SnapshotData}
+    collector.requests = {data_type: CountingRequest(calls[data_type]) for data_type in SnapshotData}
+    return collector, calls
+
+
+def test_requests_per_slot(make_client):
+    clients = [make_client(f"node-{ndx}") for ndx in range(4)]
+    slot = [1]
+    collector, calls = make_collector(clients, slot)
+
+    def num_requests() -> int:
+        return sum(len(c) for c in calls.values())
+
+    # a slot monitor and an epoch monitor: off epoch only the slot one runs.
+    collector.get_snapshot([SnapshotData.HeadBlock], slot_offset=0.0)
+    assert num_requests() == len(clients)
+    # a second monitor at the same offset shares the snapshot.
+    collector.get_snapshot([SnapshotData.HeadBlock], slot_offset=0.0)
+    assert num_requests() == len(clients)
+
+    slot[0] = 32
+    snapshot = collector.get_snapshot([SnapshotData.HeadBlock], slot_offset=0.0)
+    collector.get_snapshot(
+        [SnapshotData.FinalityCheckpoints, SnapshotData.Peers], slot_offset=0.0
+    )
+    assert num_requests() == 2 * len(clients) + 2 * len(clients)
+    assert set(snapshot.data) == {
+        SnapshotData.HeadBlock,
+        SnapshotData.FinalityCheckpoints,
+        SnapshotData.Peers,
+    }
+    assert snapshot.get_results(SnapshotData.Peers) == {c: c.name for c in clients}
+
+    # a monitor later in the slot gets fresh data.
+    collector.get_snapshot([SnapshotData.HeadBlock], slot_offset=0.5)
+    assert len(calls[SnapshotData.HeadBlock]) == 3 * len(clients)
+    assert len(calls[SnapshotData.Identity]) == 0
@@ -0,0 +1,90 @@
+"""The TestnetMonitor scheduler: a monitor scheduled at two offsets, one
+time actions and deadlines."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+# imported as a module, pytest would collect the Testnet* classes.
+from etb.monitoring import testnet_monitor
+
+
+def make_etb_config(genesis_time=None) -> SimpleNamespace:
+    preset_base = SimpleNamespace(
+        SECONDS_PER_SLOT=SimpleNamespace(value=12),
+        SLOTS_PER_EPOCH=SimpleNamespace(value=32),
+    )
+    return SimpleNamespace(
+        genesis_time=genesis_time,
+        testnet_config=SimpleNamespace(
+            consensus_layer=SimpleNamespace(preset_base=preset_base)
+        ),
+    )
+
+
+class BlockingAction(testnet_monitor.TestnetMonitorAction):
+    def __init__(self, slot_offset: float, release: threading.Event):
+        super().__init__(
+            name="heads-monitor",
+            interval=testnet_monitor.TestnetMonitorActionInterval.EVERY_SLOT,
+            slot_offset=slot_offset,
+        )
+        self.release = release
+
+    def perform_action(self):
+        self.release.wait(5)
+
+
+def test_same_action_at_two_offsets_is_scheduled_twice():
+    monitor = testnet_monitor.TestnetMonitor(make_etb_config())
+    release = threading.Event()
+    early = BlockingAction(0.33, release)
+    late = BlockingAction(0.66, release)
+    for action in (early, late):
+        monitor.action_stats[action] = testnet_monitor.TestnetMonitorActionStats()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        monitor._start_action(executor, early, 1)
+        # still running, but the late schedule is a different action.
+        monitor._start_action(executor, late, 1)
+        monitor._start_action(executor, early, 2)
+        release.set()
+
+    stats = monitor.get_scheduler_stats()["actions"]
+    assert stats["heads-monitor:every_slot:0.33"]["runs"] == 1
+    assert stats["heads-monitor:every_slot:0.33"]["skipped"] == 1
+    assert stats["heads-monitor:every_slot:0.66"]["runs"] == 1
+    assert stats["heads-monitor:every_slot:0.66"]["skipped"] == 0
+
+
+class FailingAction(testnet_monitor.TestnetMonitorAction):
+    def __init__(self):
+        super().__init__(
+            name="deploy", interval=testnet_monitor.TestnetMonitorActionInterval.ONCE
+        )
+
+    def perform_action(self):
+        raise ValueError("deployment failed")
+
+
+def test_one_time_action_failure_is_raised():
+    monitor = testnet_monitor.TestnetMonitor(make_etb_config())
+    monitor.add_action(FailingAction())
+
+    with pytest.raises(ValueError):
+        monitor.run()
+    stats = monitor.get_scheduler_stats()["actions"]
+    assert stats["deploy:once:0"]["failures"] == 1
+
+
+def test_epoch_actions_have_until_the_end_of_the_epoch():
+    monitor = testnet_monitor.TestnetMonitor(make_etb_config(genesis_time=1000))
+    release = threading.Event()
+    slot_action = BlockingAction(0.5, release)
+    epoch_action = BlockingAction(0.5, release)
+    epoch_action.interval = testnet_monitor.TestnetMonitorActionInterval.EVERY_EPOCH
+
+    # 12s slots, 32 slots per epoch, 0.5s margin.
+    assert monitor.get_action_deadline(64, slot_action) == 1000 + 65 * 12 - 0.5
+    assert monitor.get_action_deadline(64, epoch_action) == 1000 + 96 * 12 - 0.5
@@ -9,7 +9,8 @@ import random
 
 from web3.auto import w3
 
-from etb.common.utils import create_logger, PremineKey
+from etb.common.premine_keys import get_premine_accounts
+from etb.common.utils import create_logger
 from etb.config.etb_config import ETBConfig, ClientInstance, get_etb_config
 from etb.monitoring.testnet_monitor import TestnetMonitor
 from etb.interfaces.external.live_fuzzer import LiveFuzzer
@@ -148,17 +149,7 @@ if __name__ == "__main__":
 
     if args.sk is None:
         # get the private keys to use.
-        mnemonic = etb_config.testnet_config.execution_layer.account_mnemonic
-        account_pass = etb_config.testnet_config.execution_layer.keystore_passphrase
-        premine_accts = etb_config.testnet_config.execution_layer.premines
-
-        private_keys = []
-        for acc in premine_accts:
-            private_keys.append(
-                PremineKey(
-                    mnemonic=mnemonic, account=acc, passphrase=account_pass
-                ).private_key
-            )
+        private_keys = [acct.private_key for acct in get_premine_accounts(etb_config)]
         private_key = random.choice(private_keys)
     else:
         private_key = args.sk